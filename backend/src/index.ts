@@ -12,7 +12,7 @@ import { errorHandler } from './middleware/errorHandler';
 import healthRouter from './routes/health';
 import authRouter from './routes/auth';
 import resumesRouter from './routes/resumes';
-import jobsRouter from './routes/jobs';
+import jobsRouter, { syncJobIndex } from './routes/jobs';
 import analyticsRouter from './routes/analytics';
 
 const app = express();
@@ -65,6 +65,7 @@ app.listen(config.port, '0.0.0.0', () => {
     console.log(
         `[Server] Running in ${config.env} mode on port ${config.port}`
     );
+    syncJobIndex().catch((err) => console.error('[Server] JD index sync failed', err));
 });
 
 export default app;
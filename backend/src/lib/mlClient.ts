@@ -6,15 +6,19 @@ interface TriggerPayload {
     s3_key: string;
     file_type: string;
     callback_url: string;
+    pool?: string;
 }
 
 /**
  * Fire-and-forget: tells the ML service to analyze a resume.
+ * `pool` (the owning user) scopes the resume in the ML service's ANN, skill and
+ * near-duplicate indexes; duplicates are only ever looked up within it.
  */
 export async function triggerAnalysis(
     resumeId: string,
     s3Key: string,
-    fileType: string
+    fileType: string,
+    pool?: string
 ): Promise<void> {
     const callbackUrl = `${process.env.BACKEND_INTERNAL_URL || 'http://backend:4000'
         }/api/resumes/${resumeId}/analysis`;
@@ -24,6 +28,7 @@ export async function triggerAnalysis(
         s3_key: s3Key,
         file_type: fileType,
         callback_url: callbackUrl,
+        pool,
     };
 
     try {
@@ -48,13 +53,23 @@ interface ResumeForMatch {
     raw_result: Record<string, unknown>;
 }
 
+/** Hard (must_have) and soft (nice_to_have) skill requirements for a match run. */
+export interface SkillRequirements {
+    must_have?: string[];
+    nice_to_have?: string[];
+}
+
 /**
  * Fire-and-forget: asks the ML service to rank resumes against a JD.
+ * In incremental mode the ML service only scores new / changed resumes and
+ * the callback carries rank deltas (falls back to a full run on its own).
  */
 export async function triggerMatch(
     jobId: string,
     jdText: string,
-    resumes: ResumeForMatch[]
+    resumes: ResumeForMatch[],
+    incremental = true,
+    requirements: SkillRequirements = {}
 ): Promise<void> {
     const callbackUrl = `${process.env.BACKEND_INTERNAL_URL || 'http://backend:4000'
         }/api/jobs/${jobId}/match-result`;
@@ -63,6 +78,9 @@ export async function triggerMatch(
         job_id: jobId,
         jd_text: jdText,
         callback_url: callbackUrl,
+        incremental,
+        must_have: requirements.must_have,
+        nice_to_have: requirements.nice_to_have,
         resumes: resumes.map((r) => ({
             id: r.id,
             name: r.original_name,
@@ -73,6 +91,8 @@ export async function triggerMatch(
             quality_score: r.quality_score ?? 0,
             // Full text if available in raw_result
             text: (r.raw_result as Record<string, unknown>)?.text ?? '',
+            // Pre-hashed features over the full text; lets the ML service skip re-tokenising
+            fingerprint: (r.raw_result as Record<string, unknown>)?.fingerprint ?? null,
         })),
     };
 
@@ -84,3 +104,68 @@ export async function triggerMatch(
         console.error('[ML] Failed to trigger match for job', jobId, err);
     }
 }
+
+// ──────────────────────────────────────────────────────────────
+// JD index (resume → many JDs matching)
+// ──────────────────────────────────────────────────────────────
+
+interface JobForIndex {
+    id: string;
+    title: string;
+    company?: string | null;
+    content: string;
+}
+
+/**
+ * Fire-and-forget: adds or replaces JDs in the ML service's JD index.
+ */
+export async function indexJobs(jobs: JobForIndex[]): Promise<void> {
+    if (jobs.length === 0) return;
+    const payload = {
+        jobs: jobs.map((j) => ({
+            job_id: j.id,
+            text: j.content,
+            title: j.title,
+            company: j.company ?? null,
+        })),
+    };
+
+    try {
+        await axios.post(`${config.mlServiceUrl}/jobs/index`, payload, {
+            timeout: 30_000,
+        });
+    } catch (err) {
+        console.error('[ML] Failed to index', jobs.length, 'job(s)', err);
+    }
+}
+
+/**
+ * Fire-and-forget: removes a JD from the ML service's JD index.
+ */
+export async function unindexJob(jobId: string): Promise<void> {
+    try {
+        await axios.delete(`${config.mlServiceUrl}/jobs/index/${jobId}`, {
+            timeout: 5_000,
+        });
+    } catch (err) {
+        console.error('[ML] Failed to unindex job', jobId, err);
+    }
+}
+
+// ──────────────────────────────────────────────────────────────
+// Near-duplicate index
+// ──────────────────────────────────────────────────────────────
+
+/**
+ * Fire-and-forget: drops a deleted resume from the ML resume indexes
+ * (near-duplicate + ANN).
+ */
+export async function forgetResume(resumeId: string): Promise<void> {
+    try {
+        await axios.delete(`${config.mlServiceUrl}/resumes/${resumeId}`, {
+            timeout: 5_000,
+        });
+    } catch (err) {
+        console.error('[ML] Failed to drop resume from ML indexes', resumeId, err);
+    }
+}
@@ -1,7 +1,9 @@
 import { Router, Request, Response } from 'express';
 import { requireAuth } from '../middleware/auth';
+import axios from 'axios';
 import { query } from '../db';
-import { triggerMatch } from '../lib/mlClient';
+import { config } from '../config';
+import { triggerMatch, indexJobs, unindexJob, SkillRequirements } from '../lib/mlClient';
 
 const router = Router();
 
@@ -25,6 +27,9 @@ router.post('/', requireAuth, async (req: Request, res: Response) => {
         [req.user!.id, title.trim(), company?.trim() ?? null, content.trim()]
     );
 
+    // Keep the ML JD index in sync for resume → jobs matching
+    void indexJobs([result.rows[0]]);
+
     res.status(201).json({ job: result.rows[0] });
 });
 
@@ -81,6 +86,8 @@ router.get('/:id', requireAuth, async (req: Request, res: Response) => {
 // ──────────────────────────────────────────────────────────────
 router.post('/:id/match', requireAuth, async (req: Request, res: Response) => {
     const { id } = req.params;
+    // Optional hard / soft skill requirements: { must_have?: string[], nice_to_have?: string[] }
+    const { must_have, nice_to_have } = (req.body ?? {}) as SkillRequirements;
 
     const jdResult = await query(
         'SELECT * FROM job_descriptions WHERE id = $1 AND user_id = $2',
@@ -110,11 +117,17 @@ router.post('/:id/match', requireAuth, async (req: Request, res: Response) => {
         return;
     }
 
-    // Clear previous matches for this JD
-    await query('DELETE FROM jd_matches WHERE jd_id = $1', [id]);
+    // Previous matches are kept: the ML service re-ranks incrementally and the
+    // callback updates / removes only what changed.
 
     // Trigger async ML matching (non-blocking)
-    void triggerMatch(jd.id, jd.content, resumesResult.rows as unknown as Parameters<typeof triggerMatch>[2]);
+    void triggerMatch(
+        jd.id,
+        jd.content,
+        resumesResult.rows as unknown as Parameters<typeof triggerMatch>[2],
+        true,
+        { must_have, nice_to_have }
+    );
 
     res.json({
         message: `Matching ${resumesResult.rows.length} resume(s) against "${jd.title}". Results will appear shortly.`,
@@ -122,12 +135,98 @@ router.post('/:id/match', requireAuth, async (req: Request, res: Response) => {
     });
 });
 
+// ──────────────────────────────────────────────────────────────
+// GET /api/jobs/:id/duplicates — near-duplicate clusters in the candidate pool
+// ──────────────────────────────────────────────────────────────
+router.get('/:id/duplicates', requireAuth, async (req: Request, res: Response) => {
+    const { id } = req.params;
+
+    const jdResult = await query(
+        'SELECT id FROM job_descriptions WHERE id = $1 AND user_id = $2',
+        [id, req.user!.id]
+    );
+    if (jdResult.rows.length === 0) {
+        res.status(404).json({ error: 'Job description not found' });
+        return;
+    }
+
+    // Candidate pool: resumes matched against this JD
+    const poolResult = await query(
+        `SELECT jm.resume_id, r.original_name
+     FROM jd_matches jm
+     JOIN resumes r ON r.id = jm.resume_id
+     WHERE jm.jd_id = $1`,
+        [id]
+    );
+    const names = new Map<string, string>(
+        poolResult.rows.map((r: { resume_id: string; original_name: string }) => [r.resume_id, r.original_name])
+    );
+    if (names.size === 0) {
+        res.json({ clusters: [], pool_size: 0 });
+        return;
+    }
+
+    try {
+        const mlRes = await axios.post(
+            `${config.mlServiceUrl}/dedup/clusters`,
+            { resume_ids: [...names.keys()] },
+            { timeout: 10_000 }
+        );
+        const { clusters, pool_size } = mlRes.data as {
+            clusters: Array<{ resume_ids: string[]; size: number; min_similarity: number; max_similarity: number }>;
+            pool_size: number;
+        };
+        res.json({
+            pool_size,
+            clusters: clusters.map((c) => ({
+                ...c,
+                resumes: c.resume_ids.map((rid) => ({ id: rid, original_name: names.get(rid) })),
+            })),
+        });
+    } catch (err) {
+        console.error('[duplicates] ML error:', err);
+        res.status(502).json({ error: 'ML service error' });
+    }
+});
+
+// ──────────────────────────────────────────────────────────────
+// GET /api/jobs/:id/skill-gaps — JD keyword coverage across the candidate pool
+// ──────────────────────────────────────────────────────────────
+router.get('/:id/skill-gaps', requireAuth, async (req: Request, res: Response) => {
+    const { id } = req.params;
+
+    const jdResult = await query(
+        'SELECT id FROM job_descriptions WHERE id = $1 AND user_id = $2',
+        [id, req.user!.id]
+    );
+    if (jdResult.rows.length === 0) {
+        res.status(404).json({ error: 'Job description not found' });
+        return;
+    }
+
+    try {
+        const mlRes = await axios.get(`${config.mlServiceUrl}/jobs/${id}/skill-gaps`, {
+            params: { top: req.query.top },
+            timeout: 10_000,
+        });
+        res.json(mlRes.data);
+    } catch (err) {
+        if (axios.isAxiosError(err) && err.response?.status === 404) {
+            res.status(404).json({ error: 'No match results for this job yet. Run a match first.' });
+            return;
+        }
+        console.error('[skill-gaps] ML error:', err);
+        res.status(502).json({ error: 'ML service error' });
+    }
+});
+
 // ──────────────────────────────────────────────────────────────
 // POST /api/jobs/:id/match-result — ML callback
 // ──────────────────────────────────────────────────────────────
 router.post('/:id/match-result', async (req: Request, res: Response) => {
     const { id } = req.params;
-    const { matches, error } = req.body as {
+    const { mode, matches, rank_changes, removed, error } = req.body as {
+        mode?: 'full' | 'incremental';
         matches?: Array<{
             resume_id: string;
             similarity_score: number;
@@ -139,6 +238,8 @@ router.post('/:id/match-result', async (req: Request, res: Response) => {
             anomalies: string[];
             explanation: Record<string, number>;
         }>;
+        rank_changes?: Array<{ resume_id: string; rank: number; previous_rank: number }>;
+        removed?: string[];
         error?: string;
     };
 
@@ -148,13 +249,11 @@ router.post('/:id/match-result', async (req: Request, res: Response) => {
         return;
     }
 
-    if (!matches || matches.length === 0) {
-        res.json({ ok: true });
-        return;
-    }
+    const fullRun = mode !== 'incremental';
+    const saved = matches ?? [];
 
-    // Bulk insert match results
-    for (const m of matches) {
+    // Bulk insert new / changed match results
+    for (const m of saved) {
         await query(
             `INSERT INTO jd_matches
          (resume_id, jd_id, similarity_score, hiring_probability,
@@ -181,7 +280,37 @@ router.post('/:id/match-result', async (req: Request, res: Response) => {
         );
     }
 
-    res.json({ ok: true, saved: matches.length });
+    // Unchanged resumes that moved in the ranking
+    const changes = rank_changes ?? [];
+    if (changes.length > 0) {
+        await query(
+            `UPDATE jd_matches AS jm SET rank = c.rank
+       FROM UNNEST($2::uuid[], $3::int[]) AS c(resume_id, rank)
+       WHERE jm.jd_id = $1 AND jm.resume_id = c.resume_id`,
+            [id, changes.map((c) => c.resume_id), changes.map((c) => c.rank)]
+        );
+    }
+
+    // A full run replaces the job's matches; an incremental one names what left
+    if (fullRun) {
+        await query(
+            'DELETE FROM jd_matches WHERE jd_id = $1 AND NOT (resume_id = ANY($2::uuid[]))',
+            [id, saved.map((m) => m.resume_id)]
+        );
+    } else if (removed && removed.length > 0) {
+        await query(
+            'DELETE FROM jd_matches WHERE jd_id = $1 AND resume_id = ANY($2::uuid[])',
+            [id, removed]
+        );
+    }
+
+    res.json({
+        ok: true,
+        mode: fullRun ? 'full' : 'incremental',
+        saved: saved.length,
+        rank_changes: changes.length,
+        removed: fullRun ? undefined : (removed ?? []).length,
+    });
 });
 
 // ──────────────────────────────────────────────────────────────
@@ -197,7 +326,16 @@ router.delete('/:id', requireAuth, async (req: Request, res: Response) => {
         res.status(404).json({ error: 'Job description not found' });
         return;
     }
+    void unindexJob(id);
     res.json({ message: 'Job description deleted' });
 });
 
+// ──────────────────────────────────────────────────────────────
+// Startup: push every stored JD into the ML JD index
+// ──────────────────────────────────────────────────────────────
+export async function syncJobIndex(): Promise<void> {
+    const result = await query('SELECT id, title, company, content FROM job_descriptions');
+    await indexJobs(result.rows);
+}
+
 export default router;
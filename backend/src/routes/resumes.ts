@@ -7,7 +7,7 @@ import axios from 'axios';
 import { requireAuth } from '../middleware/auth';
 import { query } from '../db';
 import { uploadFile, deleteFile, getPresignedUrl } from '../lib/s3';
-import { triggerAnalysis } from '../lib/mlClient';
+import { triggerAnalysis, forgetResume } from '../lib/mlClient';
 import { config } from '../config';
 
 const router = Router();
@@ -120,7 +120,7 @@ router.post(
         );
 
         // 3. Kick off ML analysis (non-blocking)
-        void triggerAnalysis(resumeId, s3Key, fileType);
+        void triggerAnalysis(resumeId, s3Key, fileType, req.user!.id);
 
         res.status(201).json({
             message: 'Resume uploaded successfully. Analysis is in progress.',
@@ -216,6 +216,7 @@ router.delete('/:id', requireAuth, async (req: Request, res: Response) => {
         await deleteFile(resume.s3_key);
     }
     await query('DELETE FROM resumes WHERE id = $1', [id]);
+    void forgetResume(id);
     res.json({ message: 'Resume deleted' });
 });
 
@@ -263,6 +264,52 @@ router.post('/:id/keyword-scan', requireAuth, async (req: Request, res: Response
     }
 });
 
+// ──────────────────────────────────────────────────────────────
+// GET /api/resumes/:id/matching-jobs — best-fitting indexed JDs
+// ──────────────────────────────────────────────────────────────
+router.get('/:id/matching-jobs', requireAuth, async (req: Request, res: Response) => {
+    const { id } = req.params;
+    const topK = Math.min(Math.max(parseInt(String(req.query.top_k ?? '10'), 10) || 10, 1), 100);
+
+    const resumeResult = await query(
+        'SELECT id FROM resumes WHERE id = $1 AND user_id = $2',
+        [id, req.user!.id]
+    );
+    if (resumeResult.rows.length === 0) {
+        res.status(404).json({ error: 'Resume not found' });
+        return;
+    }
+
+    const analysisResult = await query(
+        `SELECT raw_result FROM analyses WHERE resume_id = $1 ORDER BY created_at DESC LIMIT 1`,
+        [id]
+    );
+    if (analysisResult.rows.length === 0) {
+        res.status(404).json({ error: 'Analysis not found. Upload and analyze the resume first.' });
+        return;
+    }
+
+    let rawResult = analysisResult.rows[0].raw_result as Record<string, unknown>;
+    if (typeof rawResult === 'string') rawResult = JSON.parse(rawResult as string) as Record<string, unknown>;
+
+    try {
+        const mlRes = await axios.post(
+            `${config.mlServiceUrl}/match/jobs`,
+            {
+                resume_id: id,
+                text: (rawResult?.text as string) ?? '',
+                fingerprint: rawResult?.fingerprint ?? null,
+                top_k: topK,
+            },
+            { timeout: 10_000 }
+        );
+        res.json(mlRes.data);
+    } catch (err) {
+        console.error('[matching-jobs] ML error:', err);
+        res.status(502).json({ error: 'ML service error' });
+    }
+});
+
 // ──────────────────────────────────────────────────────────────
 // GET /api/resumes/:id/interview-questions
 // ──────────────────────────────────────────────────────────────
@@ -0,0 +1,399 @@
+"""
+Approximate nearest-neighbour index over resume vectors, for candidate
+pools too large to score exhaustively.
+
+Vectors
+    A resume's hashed TF-IDF vector (fingerprint terms × corpus IDF) is
+    count-sketched down to D dimensions (every hash bucket adds its signed
+    weight to one of D slots) and L2-normalised: a sparse random
+    projection that preserves inner products in expectation, with error
+    ~1/sqrt(D). Resume ↔ JD cosines are small (top matches ~0.1–0.3), so D
+    is kept large; vectors are stored as float16.
+
+Retrieval (IVF)
+    Once the index holds TRAIN_MIN_ROWS live rows, spherical k-means over
+    the projected vectors partitions it into ~sqrt(n) lists; each row is
+    assigned to its nearest centroid on insert. A query scans only the
+    rows of its NPROBE nearest lists (all rows before training), orders
+    them by projected cosine, and the best `rerank` are re-scored exactly
+    (match_terms_to_jd on the stored fingerprint + hiring probability) —
+    retrieve-then-rerank.
+
+    Half of the hiring probability (ATS + quality) does not depend on the
+    JD, so the best candidates by probability need not be near the JD
+    vector. The rows with the highest ATS/quality prior join the candidate
+    set too, and the rerank covers the best `rerank` rows both by projected
+    cosine and by estimated probability (projected cosine + prior).
+
+    Centroids are retrained once the live rows have grown
+    RETRAIN_GROWTH-fold since the last training (rows left dead by
+    re-analysis or deletes do not count).
+
+Storage (ML_DATA_DIR/ann)
+    meta.bin / vectors.f16  fixed-width rows, memory-mapped
+    records.jsonl           fingerprint + scores per row (read on rerank)
+    ids.jsonl               resume id + pool per row
+    centroids.npz           IVF centroids + rows they were trained on
+    count                   number of committed rows
+    Inserts append rows under a file lock; deletes and re-inserts clear the
+    old row's alive flag in place. Workers share the mapped files and
+    replay new ids before each search.
+
+Projected vectors use the IDF snapshot current at insert time; the exact
+rerank always uses the current one.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from anomaly import anomalies_from_features
+from fingerprint import unpack_terms, role_scores_from
+from matcher import match_terms_to_jd, _jd_terms
+from hiring_probability import W_SIM, W_ATS, W_QUAL
+from role_predictor import role_from_scores
+from vectorizer import N_FEATURES, get_corpus
+from storage import data_path, locked, atomic_write, file_signature
+
+D = 1024
+NPROBE = int(os.getenv("ML_ANN_NPROBE", "8"))
+TRAIN_MIN_ROWS = int(os.getenv("ML_ANN_TRAIN_MIN_ROWS", "2000"))
+RETRAIN_GROWTH = 4
+_MIN_LISTS = 16
+_KMEANS_SAMPLE = 20_000
+_KMEANS_ITERS = 10
+_CHUNK = 16_384
+_INITIAL_CAPACITY = 1024
+_RESORT_MIN = 10_000
+
+_rng = np.random.RandomState(0xA11)
+_SLOT = _rng.randint(0, D, N_FEATURES).astype(np.int64)
+_SIGN = (_rng.randint(0, 2, N_FEATURES) * 2 - 1).astype(np.float64)
+
+_META = np.dtype([
+    ("alive", "u1"), ("pool", "<u4"), ("list", "<u4"),
+    ("ats", "<f4"), ("quality", "<f4"), ("rec_off", "<u8"), ("rec_len", "<u4"),
+])
+
+
+def project(idx: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Count-sketch a sparse hashed vector to D dims, L2-normalised (float32)."""
+    idx = idx.astype(np.int64)
+    v = np.bincount(_SLOT[idx], weights=_SIGN[idx] * weights, minlength=D)
+    norm = np.linalg.norm(v)
+    return (v / norm if norm else v).astype(np.float32)
+
+
+def _spherical_kmeans(x: np.ndarray, k: int, rng: np.random.RandomState) -> np.ndarray:
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(_KMEANS_ITERS):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        used, starts = np.unique(assign[order], return_index=True)
+        sums = np.zeros_like(centroids)
+        sums[used] = np.add.reduceat(x[order], starts, axis=0)
+        norms = np.linalg.norm(sums, axis=1)
+        filled = norms > 0
+        centroids[filled] = sums[filled] / norms[filled, None]
+    return centroids
+
+
+class AnnIndex:
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.dir = directory or data_path("ann")
+        os.makedirs(self.dir, exist_ok=True)
+        self._p = {name: os.path.join(self.dir, name) for name in (
+            "meta.bin", "vectors.f16", "records.jsonl", "ids.jsonl", "centroids.npz", "count",
+        )}
+        self._lock = threading.RLock()
+        self._cap = 0
+        self._meta = self._vectors = None
+        self._rows = 0                       # rows replayed into this worker
+        self._ids_offset = 0
+        self._id_row: Dict[str, int] = {}
+        self._row_id: List[str] = []
+        self._pools: Dict[str, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_rows = 0
+        self._centroid_sig = None
+        self._sorted_n = 0                   # rows covered by the list-sorted order
+        self._order = np.zeros(0, dtype=np.int64)
+        self._sorted_lists = np.zeros(0, dtype=np.uint32)
+
+    # ── files ─────────────────────────────────────────────────
+
+    def _map(self, cap: int) -> None:
+        for name, width in (("meta.bin", _META.itemsize), ("vectors.f16", 2 * D)):
+            path = self._p[name]
+            if not os.path.exists(path) or os.path.getsize(path) < cap * width:
+                with open(path, "ab") as fh:
+                    fh.truncate(cap * width)
+        self._meta = np.memmap(self._p["meta.bin"], dtype=_META, mode="r+", shape=(cap,))
+        self._vectors = np.memmap(self._p["vectors.f16"], dtype=np.float16, mode="r+", shape=(cap, D))
+        self._cap = cap
+
+    def _committed(self) -> int:
+        try:
+            with open(self._p["count"], "rb") as fh:
+                return int.from_bytes(fh.read(8), "little")
+        except FileNotFoundError:
+            return 0
+
+    def _catch_up(self) -> None:
+        n = self._committed()
+        if self._meta is None or n > self._cap:
+            path = self._p["meta.bin"]
+            on_disk = os.path.getsize(path) // _META.itemsize if os.path.exists(path) else 0
+            self._map(max(on_disk, n, _INITIAL_CAPACITY))
+
+        sig = file_signature(self._p["centroids.npz"])
+        if sig != self._centroid_sig:
+            if sig is None:
+                self._centroids, self._trained_rows = None, 0
+            else:
+                with np.load(self._p["centroids.npz"]) as npz:
+                    self._centroids, self._trained_rows = npz["centroids"], int(npz["trained_rows"])
+            self._centroid_sig = sig
+            self._sorted_n = 0               # rows were reassigned
+
+        if n > self._rows:
+            with open(self._p["ids.jsonl"], "rb") as fh:
+                fh.seek(self._ids_offset)
+                for _ in range(n - self._rows):
+                    line = fh.readline()
+                    self._ids_offset += len(line)
+                    rec = json.loads(line)
+                    self._id_row[rec["id"]] = len(self._row_id)
+                    self._row_id.append(rec["id"])
+                    self._pools.setdefault(rec["pool"], len(self._pools))
+            self._rows = n
+        if self._rows - self._sorted_n > max(_RESORT_MIN, self._sorted_n // 10):
+            self._resort()
+
+    def _resort(self) -> None:
+        lists = np.asarray(self._meta["list"][:self._rows])
+        self._order = np.argsort(lists, kind="stable")
+        self._sorted_lists = lists[self._order]
+        self._sorted_n = self._rows
+
+    def _train(self) -> None:
+        """(Re)fit the IVF centroids and reassign every row. Caller holds the file lock."""
+        alive = np.flatnonzero(np.asarray(self._meta["alive"][:self._rows]))
+        rng = np.random.RandomState(len(alive))
+        sample = alive if len(alive) <= _KMEANS_SAMPLE else rng.choice(alive, _KMEANS_SAMPLE, replace=False)
+        k = min(int(np.clip(np.sqrt(len(alive)), _MIN_LISTS, 4096)), len(alive))
+        centroids = _spherical_kmeans(np.asarray(self._vectors[np.sort(sample)], dtype=np.float32), k, rng)
+        for lo in range(0, self._rows, _CHUNK):
+            hi = min(lo + _CHUNK, self._rows)
+            block = np.asarray(self._vectors[lo:hi], dtype=np.float32)
+            self._meta["list"][lo:hi] = np.argmax(block @ centroids.T, axis=1)
+        self._meta.flush()
+        with atomic_write(self._p["centroids.npz"]) as fh:
+            np.savez(fh, centroids=centroids, trained_rows=len(alive))
+
+    # ── mutation ──────────────────────────────────────────────
+
+    def insert(self, items: List[Dict[str, Any]]) -> int:
+        """
+        Add or replace resumes: {resume_id, fingerprint, pool?, ats_score?, quality_score?}.
+        Returns the number of rows written.
+        """
+        if not items:
+            return 0
+        _version, idf = get_corpus().idf()
+        vectors = np.stack([
+            project(idx, tf * idf[idx])
+            for idx, tf in (unpack_terms(item["fingerprint"]) for item in items)
+        ])
+
+        with self._lock, locked(self._p["count"]):
+            self._catch_up()
+            start = self._committed()
+            need = start + len(items)
+            if need > self._cap:
+                cap = self._cap
+                while cap < need:
+                    cap *= 2
+                self._map(cap)
+
+            lists = (
+                np.argmax(vectors @ self._centroids.T, axis=1)
+                if self._centroids is not None else np.zeros(len(items), dtype=np.int64)
+            )
+            with open(self._p["records.jsonl"], "ab") as rec_fh, open(self._p["ids.jsonl"], "ab") as ids_fh:
+                for i, item in enumerate(items):
+                    rid, pool = item["resume_id"], item.get("pool") or ""
+                    ats = float(item.get("ats_score") or 0.0)
+                    quality = float(item.get("quality_score") or 0.0)
+                    line = json.dumps({
+                        "id": rid, "fingerprint": item["fingerprint"],
+                        "ats_score": ats, "quality_score": quality,
+                    }).encode("utf-8") + b"\n"
+                    offset = rec_fh.tell()
+                    rec_fh.write(line)
+                    ids_fh.write(json.dumps({"id": rid, "pool": pool}).encode("utf-8") + b"\n")
+
+                    old = self._id_row.get(rid)
+                    if old is not None:
+                        self._meta["alive"][old] = 0
+                    row = start + i
+                    self._meta[row] = (
+                        1, self._pools.setdefault(pool, len(self._pools)), lists[i],
+                        ats, quality, offset, len(line),
+                    )
+                    self._id_row[rid] = row
+            self._vectors[start:need] = vectors
+            self._meta.flush()
+            self._vectors.flush()
+            with atomic_write(self._p["count"]) as fh:
+                fh.write(need.to_bytes(8, "little"))
+            self._catch_up()
+
+            trained = self._trained_rows
+            alive = int(np.count_nonzero(self._meta["alive"][:self._rows]))
+            if alive >= max(RETRAIN_GROWTH * trained if trained else TRAIN_MIN_ROWS, _MIN_LISTS):
+                self._train()
+                self._catch_up()
+        return len(items)
+
+    def delete(self, resume_id: str) -> bool:
+        with self._lock, locked(self._p["count"]):
+            self._catch_up()
+            row = self._id_row.get(resume_id)
+            if row is None or not self._meta["alive"][row]:
+                return False
+            self._meta["alive"][row] = 0
+            self._meta.flush()
+            return True
+
+    # ── search ────────────────────────────────────────────────
+
+    def _candidates(self, q: np.ndarray, nprobe: int) -> np.ndarray:
+        if self._centroids is None:
+            return np.arange(self._rows)
+        probe = np.argsort(-(self._centroids @ q))[:nprobe].astype(np.uint32)
+        lo = np.searchsorted(self._sorted_lists, probe, side="left")
+        hi = np.searchsorted(self._sorted_lists, probe, side="right")
+        found = [self._order[a:b] for a, b in zip(lo.tolist(), hi.tolist()) if b > a]
+        if self._rows > self._sorted_n:
+            tail = np.asarray(self._meta["list"][self._sorted_n:self._rows])
+            found.append(np.flatnonzero(np.isin(tail, probe)) + self._sorted_n)
+        return np.sort(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def retrieve(
+        self,
+        jd_text: str,
+        pool: Optional[str] = None,
+        limit: int = 200,
+        nprobe: int = NPROBE,
+        only: Optional[List[str]] = None,
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Stage 1: (candidate rows for the exact rerank, number of live rows
+        scanned). Returns the best `limit` by projected cosine plus the best
+        `limit` by estimated hiring probability (up to 2 × limit rows).
+        `only` restricts the search to the given resume ids.
+        """
+        idx, tf, _names = _jd_terms(jd_text)
+        _version, idf = get_corpus().idf()
+        q = project(idx, tf * idf[idx])
+
+        with self._lock:
+            self._catch_up()
+            meta = np.asarray(self._meta[:self._rows])
+            live = meta["alive"] == 1
+            if pool is not None:
+                live &= meta["pool"] == self._pools.get(pool, -1)
+            if only is not None:
+                allowed = np.zeros(self._rows, dtype=bool)
+                allowed[[self._id_row[rid] for rid in only if rid in self._id_row]] = True
+                live &= allowed
+            prior = np.where(
+                live,
+                W_ATS * meta["ats"].astype(np.float64) / 100.0 + W_QUAL * meta["quality"] / 100.0,
+                -np.inf,
+            )
+            n_live = int(np.count_nonzero(live))
+            if not n_live:
+                return np.zeros(0, dtype=np.int64), 0
+            by_prior = np.argpartition(-prior, limit - 1)[:limit] if n_live > limit else np.flatnonzero(live)
+            near = self._candidates(q, nprobe)
+            rows = np.union1d(near[live[near]], by_prior[live[by_prior]])
+
+            sim = np.empty(len(rows), dtype=np.float64)
+            for lo in range(0, len(rows), _CHUNK):
+                block = rows[lo:lo + _CHUNK]
+                sim[lo:lo + len(block)] = np.asarray(self._vectors[block], dtype=np.float32) @ q
+        if len(rows) <= limit:
+            return rows, len(rows)
+        estimate = W_SIM * sim + prior[rows]
+        top = np.union1d(
+            np.argpartition(-sim, limit - 1)[:limit],
+            np.argpartition(-estimate, limit - 1)[:limit],
+        )
+        return rows[top], len(rows)
+
+    def records(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """Stored fingerprints + scores for the given rows."""
+        if not len(rows):
+            return []
+        meta = self._meta[rows]
+        out = []
+        with open(self._p["records.jsonl"], "rb") as fh:
+            for off, length in zip(meta["rec_off"].tolist(), meta["rec_len"].tolist()):
+                out.append(json.loads(os.pread(fh.fileno(), length, off)))
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._catch_up()
+            alive = int(np.count_nonzero(self._meta["alive"][:self._rows])) if self._rows else 0
+            return {
+                "rows": self._rows,
+                "alive": alive,
+                "capacity": self._cap,
+                "pools": len(self._pools),
+                "dims": D,
+                "lists": 0 if self._centroids is None else len(self._centroids),
+                "trained_rows": self._trained_rows,
+                "nprobe": NPROBE,
+            }
+
+
+def rerank(
+    records: List[Dict[str, Any]],
+    jd_text: str,
+) -> Tuple[List[Dict[str, Any]], List[Tuple[float, float, int, int]]]:
+    """Stage 2: exact match results + hiring-probability factors for retrieved records."""
+    results, factors = [], []
+    for rec in records:
+        fp = rec["fingerprint"]
+        idx, tf = unpack_terms(fp)
+        match_result = match_terms_to_jd(idx, tf, jd_text)
+        results.append({
+            "resume_id":        rec["id"],
+            "resume_name":      None,
+            "similarity_score": match_result["similarity_score"],
+            "matched_keywords": match_result["matched_keywords"],
+            "skill_gaps":       match_result["skill_gaps"],
+            "role_prediction":  role_from_scores(role_scores_from(fp)),
+            "anomalies":        anomalies_from_features(fp["features"]["anomaly"]),
+        })
+        factors.append((
+            rec["ats_score"], rec["quality_score"],
+            len(match_result["matched_keywords"]), len(match_result["jd_keywords"]),
+        ))
+    return results, factors
+
+
+_INDEX: Optional[AnnIndex] = None
+
+
+def get_index() -> AnnIndex:
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = AnnIndex()
+    return _INDEX
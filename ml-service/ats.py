@@ -26,6 +26,9 @@ METRIC_PATTERN = re.compile(
     re.IGNORECASE,
 )
 
+# ── Line prefixes counted as bullets ─────────────────────────
+BULLET_CHARS = ("•", "-", "*", "·", "▪", "–", "○", "►")
+
 # ── Key ATS sections (required for good score) ───────────────
 ATS_REQUIRED_SECTIONS = {"contact", "summary", "experience", "education", "skills"}
 ATS_BONUS_SECTIONS = {"projects", "certifications", "awards"}
@@ -35,49 +38,66 @@ OPTIMAL_MIN_WORDS = 350
 OPTIMAL_MAX_WORDS = 900
 
 
-def compute_ats_score(
+def extract_ats_features(
     text: str,
     sections: Dict[str, Optional[str]],
-) -> float:
+) -> Dict[str, int]:
     """
-    Compute ATS compatibility score (0–100).
+    Raw, unweighted ATS signals for a resume.
 
-    Breakdown:
-      - Section presence    : 35 pts
-      - Bullet usage        : 20 pts
-      - Action verbs        : 20 pts
-      - Quantified metrics  : 15 pts
-      - Length optimality   : 10 pts
+    Returns:
+        word_count, required_sections, bonus_sections,
+        bullet_lines, action_verbs, metrics
     """
     words = text.split()
     word_count = len(words)
     lower_words = {w.lower().strip(".,;:") for w in words}
     detected = {k for k, v in sections.items() if v}
 
-    # 1. Section presence (35 pts)
-    required_present = len(ATS_REQUIRED_SECTIONS & detected)
-    bonus_present = len(ATS_BONUS_SECTIONS & detected)
-    section_score = (required_present / len(ATS_REQUIRED_SECTIONS)) * 30
-    section_score += min(bonus_present, 2) * 2.5  # up to 5 bonus pts
-    section_score = min(section_score, 35)
-
-    # 2. Bullet point usage (20 pts) — presence of bullet chars
     bullet_lines = len(
         [
             l
             for l in text.splitlines()
-            if l.strip().startswith(("•", "-", "*", "·", "▪", "–", "○", "►"))
+            if l.strip().startswith(BULLET_CHARS)
         ]
     )
-    bullet_score = min((bullet_lines / max(word_count / 20, 1)) * 20, 20)
+
+    return {
+        "word_count": word_count,
+        "required_sections": len(ATS_REQUIRED_SECTIONS & detected),
+        "bonus_sections": len(ATS_BONUS_SECTIONS & detected),
+        "bullet_lines": bullet_lines,
+        "action_verbs": len(lower_words & ACTION_VERBS),
+        "metrics": len(METRIC_PATTERN.findall(text)),
+    }
+
+
+def ats_score_from_features(features: Dict[str, int]) -> float:
+    """
+    Compute ATS compatibility score (0–100) from extract_ats_features() output.
+
+    Breakdown:
+      - Section presence    : 35 pts
+      - Bullet usage        : 20 pts
+      - Action verbs        : 20 pts
+      - Quantified metrics  : 15 pts
+      - Length optimality   : 10 pts
+    """
+    word_count = features["word_count"]
+
+    # 1. Section presence (35 pts)
+    section_score = (features["required_sections"] / len(ATS_REQUIRED_SECTIONS)) * 30
+    section_score += min(features["bonus_sections"], 2) * 2.5  # up to 5 bonus pts
+    section_score = min(section_score, 35)
+
+    # 2. Bullet point usage (20 pts) — presence of bullet chars
+    bullet_score = min((features["bullet_lines"] / max(word_count / 20, 1)) * 20, 20)
 
     # 3. Action verbs (20 pts)
-    verb_matches = lower_words & ACTION_VERBS
-    action_score = min((len(verb_matches) / 8) * 20, 20)
+    action_score = min((features["action_verbs"] / 8) * 20, 20)
 
     # 4. Quantified metrics (15 pts)
-    metric_matches = METRIC_PATTERN.findall(text)
-    metric_score = min((len(metric_matches) / 5) * 15, 15)
+    metric_score = min((features["metrics"] / 5) * 15, 15)
 
     # 5. Word count optimality (10 pts)
     if OPTIMAL_MIN_WORDS <= word_count <= OPTIMAL_MAX_WORDS:
@@ -90,3 +110,11 @@ def compute_ats_score(
 
     total = section_score + bullet_score + action_score + metric_score + length_score
     return round(min(max(total, 0), 100), 2)
+
+
+def compute_ats_score(
+    text: str,
+    sections: Dict[str, Optional[str]],
+) -> float:
+    """Compute ATS compatibility score (0–100). See ats_score_from_features()."""
+    return ats_score_from_features(extract_ats_features(text, sections))
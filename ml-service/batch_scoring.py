@@ -0,0 +1,221 @@
+"""
+Columnar batch scoring for ATS, quality, strength and anomalies.
+
+extract_features() turns many resumes into one int64 feature matrix (a
+row per resume, a column per COLUMNS entry) holding the same raw signals
+as extract_ats_features / extract_quality_features /
+extract_anomaly_features, in a single pass per text that shares the
+split / lower-cased copies between the three. Scores are then plain
+array arithmetic over the matrix, so they can be recomputed (e.g. with
+different weights) without touching the texts again:
+
+    X = extract_features(texts, sections, skills, grammar).values
+    ats = ats_scores(X)
+    quality = quality_scores(X, ats)
+
+Every score equals its scalar counterpart exactly: the arithmetic is
+done in the same order on float64 and rounded with round_half_even().
+The point allotments can be overridden (ATS_WEIGHTS / QUALITY_WEIGHTS
+keys); with the defaults each component's scale factor is exactly 1.0.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from ats import (
+    ACTION_VERBS, METRIC_PATTERN, BULLET_CHARS, ATS_REQUIRED_SECTIONS, ATS_BONUS_SECTIONS,
+    OPTIMAL_MIN_WORDS, OPTIMAL_MAX_WORDS,
+)
+from quality import QUALITY_SECTIONS, THRESHOLDS
+from anomaly import (
+    GENERIC_PHRASES, EMAIL_PATTERN, PHONE_PATTERN, YEAR_PATTERN, MAX_WORDS, MIN_WORDS, STUFFING_MIN_WORDS,
+    RULES, anomalies_from_features, literal_hits, overused_words, phrase_signals, word_counts,
+)
+from hiring_probability import round_half_even
+
+COLUMNS = (
+    # ats
+    "word_count", "required_sections", "bonus_sections", "bullet_lines", "action_verbs", "metrics",
+    # quality
+    "skill_count", "grammar_errors", "grammar_warnings", "sections_covered",
+    # anomaly
+    "has_email", "has_phone", "overused_count", "experience_present", "experience_has_dates",
+    "generic_phrase",       # index into GENERIC_PHRASES, -1 for none
+    "has_profile_link",
+)
+COL = {name: i for i, name in enumerate(COLUMNS)}
+
+ATS_WEIGHTS = {"sections": 35.0, "bullets": 20.0, "action_verbs": 20.0, "metrics": 15.0, "length": 10.0}
+QUALITY_WEIGHTS = {"skills": 25.0, "grammar": 25.0, "sections": 25.0, "ats": 25.0}
+
+
+class FeatureMatrix(NamedTuple):
+    values: np.ndarray          # (n, len(COLUMNS)) int64
+    overused: List[List[str]]   # first three overused words per row (for the warning text)
+
+
+def extract_features(
+    texts: Sequence[str],
+    sections: Sequence[Dict[str, Optional[str]]],
+    skills: Sequence[List[str]],
+    grammar_issues: Sequence[List[Dict[str, Any]]],
+) -> FeatureMatrix:
+    """Feature matrix for many resumes; row i matches the scalar extractors on resume i."""
+    rows: List[List[int]] = []
+    overused: List[List[str]] = []
+    for text, secs, skill_list, issues in zip(texts, sections, skills, grammar_issues):
+        words = text.split()
+        lower = text.lower()
+        detected = {k for k, v in secs.items() if v}
+        experience = secs.get("experience") or ""
+        stuffed = overused_words(word_counts(lower))
+        overused.append(stuffed[:3])
+        generic, profile = phrase_signals(literal_hits(lower))
+        rows.append([
+            len(words),
+            len(ATS_REQUIRED_SECTIONS & detected),
+            len(ATS_BONUS_SECTIONS & detected),
+            sum(1 for line in text.splitlines() if line.strip().startswith(BULLET_CHARS)),
+            len({w.lower().strip(".,;:") for w in words} & ACTION_VERBS),
+            len(METRIC_PATTERN.findall(text)),
+            len(skill_list),
+            sum(1 for g in issues if g.get("severity") == "error"),
+            sum(1 for g in issues if g.get("severity") == "warning"),
+            len({k for k, v in secs.items() if v and v.strip()} & QUALITY_SECTIONS),
+            EMAIL_PATTERN.search(text) is not None,
+            PHONE_PATTERN.search(text) is not None,
+            len(stuffed),
+            bool(experience),
+            YEAR_PATTERN.search(experience) is not None,
+            generic,
+            profile,
+        ])
+    X = np.array(rows, dtype=np.int64).reshape(len(rows), len(COLUMNS))
+    return FeatureMatrix(X, overused)
+
+
+def from_feature_dicts(features: Sequence[Dict[str, Dict[str, Any]]]) -> FeatureMatrix:
+    """Feature matrix from stored {"ats", "quality", "anomaly"} dicts (e.g. fingerprint features)."""
+    X = np.zeros((len(features), len(COLUMNS)), dtype=np.int64)
+    overused: List[List[str]] = []
+    for i, f in enumerate(features):
+        flat = {**f["ats"], **f["quality"], **f["anomaly"]}
+        phrase = flat["generic_phrase"]
+        flat["generic_phrase"] = GENERIC_PHRASES.index(phrase) if phrase else -1
+        X[i] = [int(flat[c]) for c in COLUMNS]
+        overused.append(list(f["anomaly"]["overused"]))
+    return FeatureMatrix(X, overused)
+
+
+def _weights(defaults: Dict[str, float], overrides: Optional[Dict[str, float]]) -> Dict[str, float]:
+    unknown = set(overrides or {}) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown weight(s): {', '.join(sorted(unknown))} (expected {', '.join(defaults)})")
+    return {**defaults, **(overrides or {})}
+
+
+def ats_scores(X: np.ndarray, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Vectorised ats_score_from_features() over matrix rows."""
+    w = _weights(ATS_WEIGHTS, weights)
+    f = X.astype(np.float64)
+    word_count = f[:, COL["word_count"]]
+
+    section_scale = w["sections"] / ATS_WEIGHTS["sections"]
+    section = (f[:, COL["required_sections"]] / len(ATS_REQUIRED_SECTIONS)) * (30 * section_scale)
+    section = section + np.minimum(f[:, COL["bonus_sections"]], 2) * (2.5 * section_scale)
+    section = np.minimum(section, w["sections"])
+
+    bullet = np.minimum((f[:, COL["bullet_lines"]] / np.maximum(word_count / 20, 1)) * w["bullets"], w["bullets"])
+    action = np.minimum((f[:, COL["action_verbs"]] / 8) * w["action_verbs"], w["action_verbs"])
+    metric = np.minimum((f[:, COL["metrics"]] / 5) * w["metrics"], w["metrics"])
+
+    overage = (word_count - OPTIMAL_MAX_WORDS) / OPTIMAL_MAX_WORDS
+    length = np.where(
+        (word_count >= OPTIMAL_MIN_WORDS) & (word_count <= OPTIMAL_MAX_WORDS),
+        w["length"],
+        np.where(
+            word_count < OPTIMAL_MIN_WORDS,
+            np.maximum(0, (word_count / OPTIMAL_MIN_WORDS) * w["length"]),
+            np.maximum(0, w["length"] - overage * w["length"]),
+        ),
+    )
+
+    total = section + bullet + action + metric + length
+    return round_half_even(np.clip(total, 0, 100), 2)
+
+
+def quality_scores(
+    X: np.ndarray,
+    ats: np.ndarray,
+    weights: Optional[Dict[str, float]] = None,
+) -> np.ndarray:
+    """Vectorised quality_score_from_features() over matrix rows."""
+    w = _weights(QUALITY_WEIGHTS, weights)
+    f = X.astype(np.float64)
+    skill = np.minimum((f[:, COL["skill_count"]] / 15) * w["skills"], w["skills"])
+    penalty = X[:, COL["grammar_errors"]] * 4 + X[:, COL["grammar_warnings"]] * 2
+    grammar = np.maximum(0, w["grammar"] - penalty)
+    section = (f[:, COL["sections_covered"]] / len(QUALITY_SECTIONS)) * w["sections"]
+    ats_part = (np.asarray(ats, dtype=np.float64) / 100) * w["ats"]
+    total = skill + grammar + section + ats_part
+    return round_half_even(np.clip(total, 0, 100), 2)
+
+
+def strength_labels(quality: np.ndarray, thresholds: Optional[Dict[str, float]] = None) -> List[str]:
+    """Vectorised classify_strength(); `thresholds` overrides quality.THRESHOLDS keys."""
+    t = _weights(THRESHOLDS, thresholds)
+    labels = np.select(
+        [quality >= t["excellent"], quality >= t["strong"], quality >= t["average"]],
+        ["excellent", "strong", "average"],
+        "weak",
+    )
+    return labels.tolist()
+
+
+ANOMALY_RULES = tuple(rule.name for rule in RULES)
+
+
+def anomaly_flags(X: np.ndarray) -> np.ndarray:
+    """(n, len(ANOMALY_RULES)) bool: which anomaly.RULES fire per row (same conditions, same order)."""
+    col = lambda name: X[:, COL[name]]  # noqa: E731
+    return np.column_stack([
+        (col("has_email") == 0) & (col("has_phone") == 0),
+        col("word_count") > MAX_WORDS,
+        col("word_count") < MIN_WORDS,
+        col("overused_count") >= STUFFING_MIN_WORDS,
+        (col("experience_present") != 0) & (col("experience_has_dates") == 0),
+        col("generic_phrase") >= 0,
+        col("has_profile_link") == 0,
+    ]) if len(X) else np.zeros((0, len(ANOMALY_RULES)), dtype=bool)
+
+
+def anomaly_warnings(fm: FeatureMatrix) -> List[List[str]]:
+    """anomalies_from_features() per row; rows where no rule fires are skipped."""
+    flagged = anomaly_flags(fm.values).any(axis=1)
+    out: List[List[str]] = []
+    for i, row in enumerate(fm.values.tolist()):
+        if not flagged[i]:
+            out.append([])
+            continue
+        f = dict(zip(COLUMNS, row))
+        f["generic_phrase"] = GENERIC_PHRASES[f["generic_phrase"]] if f["generic_phrase"] >= 0 else None
+        f["overused"] = fm.overused[i]
+        out.append(anomalies_from_features(f))
+    return out
+
+
+def score_features(
+    fm: FeatureMatrix,
+    ats_weights: Optional[Dict[str, float]] = None,
+    quality_weights: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """ats_score, quality_score, strength and anomalies for every row."""
+    ats = ats_scores(fm.values, ats_weights)
+    quality = quality_scores(fm.values, ats, quality_weights)
+    return {
+        "ats_score": ats,
+        "quality_score": quality,
+        "strength": strength_labels(quality),
+        "anomalies": anomaly_warnings(fm),
+    }
@@ -0,0 +1,136 @@
+"""
+Recall@k of ANN retrieve-then-rerank versus exhaustive scoring.
+
+Builds a synthetic topic-mixture corpus in a temporary ML_DATA_DIR,
+indexes every resume in the ANN index, then for each query JD compares:
+
+    exact   every resume scored with match_terms_to_jd + hiring probability
+            (what run_match_pipeline does for a full candidate list)
+    ann     AnnIndex.retrieve (top `rerank` by projected cosine) followed by
+            the same exact scoring on the retrieved candidates only
+
+and reports recall@k of the ANN top-k against the exact top-k, ranked by
+similarity and by hiring probability, plus per-query latency.
+
+    cd ml-service && python benchmarks/ann_recall.py --n 20000 --queries 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ["ML_DATA_DIR"] = tempfile.mkdtemp(prefix="ann-bench-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+import ann  # noqa: E402
+from anomaly import extract_anomaly_features  # noqa: E402
+from fingerprint import build_fingerprint, unpack_terms  # noqa: E402
+from hiring_probability import compute_hiring_probability_batch, rank_candidates  # noqa: E402
+from matcher import match_terms_to_jd  # noqa: E402
+from vectorizer import get_corpus  # noqa: E402
+
+_LETTERS = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+
+
+def _phrases(rng: np.random.RandomState, size: int) -> np.ndarray:
+    """Random 1–3 word phrases, so documents share bigrams the way real text does."""
+    words = np.array(sorted({"".join(rng.choice(_LETTERS, rng.randint(5, 10))) for _ in range(size * 2)})[:size])
+    return np.array([" ".join(rng.choice(words, rng.randint(1, 4))) for _ in range(size)])
+
+
+def _document(rng, phrases, topics, topic_ids, length, topic_share):
+    """`length` phrases: `topic_share` drawn from the given topics, the rest background."""
+    n_topic = int(length * topic_share)
+    parts = [phrases[rng.choice(topics[t], n_topic // len(topic_ids))] for t in topic_ids]
+    parts.append(rng.choice(phrases, length - sum(len(p) for p in parts)))
+    picked = np.concatenate(parts)
+    rng.shuffle(picked)
+    return " . ".join(picked.tolist())
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000, help="resumes in the index")
+    ap.add_argument("--queries", type=int, default=20)
+    ap.add_argument("--topics", type=int, default=50)
+    ap.add_argument("--rerank", type=int, default=200)
+    ap.add_argument("--nprobe", type=int, default=ann.NPROBE)
+    ap.add_argument("--k", default="10,50")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+    ks = [int(k) for k in args.k.split(",")]
+
+    rng = np.random.RandomState(args.seed)
+    phrases = _phrases(rng, 6000)
+    topics = [rng.choice(len(phrases), 80, replace=False) for _ in range(args.topics)]
+
+    t0 = time.perf_counter()
+    fingerprints, ats, quality = [], rng.uniform(40, 95, args.n), rng.uniform(40, 95, args.n)
+    corpus = get_corpus()
+    for _ in range(args.n):
+        picked = rng.choice(args.topics, rng.randint(1, 4), replace=False)
+        text = _document(rng, phrases, topics, picked, rng.randint(80, 250), 0.5)
+        fp = build_fingerprint(text, [], {}, {
+            "anomaly": extract_anomaly_features(text, {}, len(text.split())),
+        })
+        fingerprints.append(fp)
+        corpus.observe(unpack_terms(fp)[0])
+    corpus.flush()
+    t_build = time.perf_counter() - t0
+
+    index = ann.get_index()
+    t0 = time.perf_counter()
+    for lo in range(0, args.n, 1000):
+        index.insert([
+            {"resume_id": f"r{i}", "fingerprint": fingerprints[i],
+             "ats_score": ats[i], "quality_score": quality[i]}
+            for i in range(lo, min(lo + 1000, args.n))
+        ])
+    t_insert = time.perf_counter() - t0
+    terms = [unpack_terms(fp) for fp in fingerprints]
+
+    recall = {(kind, k): [] for kind in ("similarity", "probability") for k in ks}
+    exact_ms, ann_ms, scanned = [], [], []
+    for _q in range(args.queries):
+        jd = _document(rng, phrases, topics, [rng.randint(args.topics)], 60, 0.7)
+
+        t0 = time.perf_counter()
+        exact = [match_terms_to_jd(idx, tf, jd) for idx, tf in terms]
+        exact_sim = np.array([m["similarity_score"] for m in exact])
+        exact_prob = compute_hiring_probability_batch(
+            exact_sim, ats, quality,
+            [len(m["matched_keywords"]) for m in exact], [len(m["jd_keywords"]) for m in exact],
+        )["probability"]
+        exact_order = {"similarity": rank_candidates(exact_sim), "probability": rank_candidates(exact_prob)}
+        exact_ms.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        rows, n_scanned = index.retrieve(jd, None, args.rerank, args.nprobe)
+        results, factors = ann.rerank(index.records(rows), jd)
+        sim = [r["similarity_score"] for r in results]
+        prob = compute_hiring_probability_batch(sim, *zip(*factors))["probability"] if results else []
+        ann_ms.append((time.perf_counter() - t0) * 1000)
+        scanned.append(n_scanned)
+
+        rids = np.array([int(r["resume_id"][1:]) for r in results], dtype=np.int64)
+        ann_order = {"similarity": rids[rank_candidates(sim)], "probability": rids[rank_candidates(prob)]}
+        for kind in ("similarity", "probability"):
+            for k in ks:
+                truth = set(exact_order[kind][:k].tolist())
+                recall[(kind, k)].append(len(truth & set(ann_order[kind][:k].tolist())) / k)
+
+    print(f"corpus: {args.n} resumes, {args.topics} topics  (built in {t_build:.1f}s, indexed in {t_insert:.1f}s)")
+    stats = index.stats()
+    print(f"ann: D={ann.D}, {stats['lists']} lists, nprobe={args.nprobe}, rerank={args.rerank}, "
+          f"mean rows scanned={np.mean(scanned):.0f} ({np.mean(scanned) / args.n:.1%} of corpus)")
+    for (kind, k), values in recall.items():
+        print(f"recall@{k:<3} by {kind:<11}: {np.mean(values):.3f}  (min {np.min(values):.2f})")
+    print(f"latency per query: exact {np.median(exact_ms):.1f} ms, ann {np.median(ann_ms):.1f} ms (median)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+IPC overhead of passing buffers to a process pool: pickling vs. shm.py.
+
+For each payload size, submits a trivial job to a one-process pool (the
+same forkserver pool type procpool.py uses) and times the round trip:
+
+    pickle in    job(data: bytes)                 -> int
+    shm in       job(handle), worker attaches     -> int
+    pickle echo  job(data: bytes)                 -> bytes   (e.g. extracted text back)
+    shm echo     job(handle) -> export(...)       -> adopt() in the parent
+
+Reported per call: median wall time and parent CPU time (the cost the
+service worker's event loop thread pays).
+
+    cd ml-service && python benchmarks/shm_transfer.py --sizes 65536,262144,1048576,10485760
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shm  # noqa: E402
+
+
+def _touch(view) -> int:
+    return len(view) + (view[-1] if len(view) else 0)
+
+
+def pickle_in(data: bytes) -> int:
+    return _touch(data)
+
+
+def shm_in(handle: shm.Transfer) -> int:
+    with shm.attached(handle) as view:
+        return _touch(view)
+
+
+def pickle_echo(data: bytes) -> bytes:
+    return data
+
+
+def shm_echo(handle: shm.Transfer) -> shm.Transfer:
+    with shm.attached(handle) as view:
+        return shm.export(view)
+
+
+def _always_map() -> None:
+    shm.INLINE_MAX = 0  # measure the mapped path at every size, to find the crossover
+
+
+def _time(pool: ProcessPoolExecutor, call, reps: int):
+    call(pool)  # warm up
+    wall, cpu = [], []
+    for _ in range(reps):
+        w0, c0 = time.perf_counter(), time.process_time()
+        call(pool)
+        wall.append(time.perf_counter() - w0)
+        cpu.append(time.process_time() - c0)
+    return statistics.median(wall) * 1000, statistics.median(cpu) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="65536,262144,1048576,10485760")
+    parser.add_argument("--reps", type=int, default=30)
+    args = parser.parse_args()
+    _always_map()
+
+    pool = ProcessPoolExecutor(
+        1, mp_context=multiprocessing.get_context("forkserver"), initializer=_always_map,
+    )
+    cases = {
+        "pickle in": lambda data: lambda p: p.submit(pickle_in, data).result(),
+        "shm in": lambda data: lambda p: _with_shm(p, shm_in, data),
+        "pickle echo": lambda data: lambda p: p.submit(pickle_echo, data).result(),
+        "shm echo": lambda data: lambda p: shm.adopt(_with_shm(p, shm_echo, data)),
+    }
+    print(f"{'size':>10}  {'case':<12} {'wall ms':>9} {'parent cpu ms':>14}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        data = os.urandom(size)
+        for name, make in cases.items():
+            wall, cpu = _time(pool, make(data), args.reps)
+            print(f"{size:>10}  {name:<12} {wall:9.3f} {cpu:14.3f}")
+    pool.shutdown()
+    print(f"segments still owned: {shm.owned()}")
+
+
+def _with_shm(pool: ProcessPoolExecutor, job, data: bytes):
+    with shm.shared(data) as handle:
+        return pool.submit(job, handle).result()
+
+
+if __name__ == "__main__":
+    main()
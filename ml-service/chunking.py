@@ -0,0 +1,73 @@
+"""
+Chunked processing for very long documents (academic CVs, portfolios).
+
+Above CHUNK_THRESHOLD characters the pipeline runs its spaCy, LanguageTool
+and anomaly word-count stages over chunks of at most CHUNK_CHARS
+characters instead of the whole text, one chunk at a time, and merges
+the per-chunk outputs (see skills.extract_skills_chunked,
+grammar.check_grammar_chunked, anomaly.extract_anomaly_features_chunked).
+Parser / NER activations and LanguageTool requests are then sized by the
+chunk, and spaCy's max_length is never reached.
+
+Chunks end, in order of preference, before a section heading, after a
+blank line (paragraph), at a line end, or at whitespace; never inside a
+word. A chunk is only cut at a preferred boundary that leaves it at least
+a quarter full, so headings every few lines do not produce tiny chunks.
+
+split_chunks() is a generator: chunks are sliced from the text as they
+are consumed. The text itself, the section texts and the fingerprint's
+term counts are still whole-document sized.
+"""
+
+import os
+import re
+from typing import Dict, Iterator, Tuple
+
+from sections import heading_of
+
+CHUNK_CHARS = int(os.getenv("ML_CHUNK_CHARS", "20000"))
+CHUNK_THRESHOLD = int(os.getenv("ML_CHUNK_THRESHOLD", "50000"))
+
+_LINE = re.compile(r"[^\n]*\n|[^\n]+")
+_PREFERENCE = ("section", "paragraph", "line")
+
+
+def is_long(text: str) -> bool:
+    return len(text) > CHUNK_THRESHOLD
+
+
+def _cut(text: str, start: int, cuts: Dict[str, int], max_chars: int) -> int:
+    """End offset for the chunk starting at `start` (exclusive, > start)."""
+    for kind in _PREFERENCE:
+        pos = cuts.get(kind, start)
+        if pos - start >= max_chars // 4:
+            return pos
+    if cuts.get("line", start) > start:
+        return cuts["line"]
+    # A single line longer than a chunk: last whitespace that fits, else a hard cut
+    end = start + max_chars
+    space = max(text.rfind(c, start + 1, end) for c in " \t\r\f\v")
+    return space + 1 if space > start else end
+
+
+def split_chunks(text: str, max_chars: int = CHUNK_CHARS) -> Iterator[Tuple[int, str]]:
+    """(offset, chunk) pairs covering `text` in order; chunks concatenate back to it."""
+    start = 0
+    cuts: Dict[str, int] = {}
+    prev_blank = False
+    for m in _LINE.finditer(text):
+        line_start, line_end = m.span()
+        if line_start > start:
+            if heading_of(m.group()):
+                cuts["section"] = line_start
+            if prev_blank:
+                cuts["paragraph"] = line_start
+            cuts["line"] = line_start
+        prev_blank = not m.group().strip()
+        while line_end - start > max_chars:
+            end = _cut(text, start, cuts, max_chars)
+            yield start, text[start:end]
+            start = end
+            cuts = {k: v for k, v in cuts.items() if v > start}
+    if start < len(text):
+        yield start, text[start:]
@@ -0,0 +1,189 @@
+"""
+Cluster mode: consistent-hash sharding of work across ml-service nodes.
+
+With ML_CLUSTER_SELF set (this node's base URL, as peers reach it) the
+nodes share a membership list and every keyed request has one owner:
+
+    /analyze, /analyze/sync   owner of resume_id
+    /match                    owner of job_id
+
+A request that lands on another node is forwarded to its owner (marked
+with X-Cluster-Forwarded so it is never forwarded twice), so each
+resume's / job's caches and incremental match state live on one node. If
+the owner cannot be reached the request is served locally.
+
+Ring
+    Each live node is placed at VNODES points (blake2b of "node#i") on a
+    64-bit ring; a key belongs to the first point clockwise of its hash.
+    Adding or removing a node moves only ~1/n of the keys.
+
+Membership
+    {node: {"status": "up" | "left", "incarnation": int}}. Merging two
+    views keeps, per node, the entry with the higher incarnation ("left"
+    wins a tie), so views converge whatever order updates arrive in. Join
+    and leave bump the node's incarnation; a running node that sees itself
+    marked "left" re-joins with a higher one. Changes are pushed to every
+    live peer, and each node also pushes its view to the seeds and one
+    random peer every HEARTBEAT_SECS (anti-entropy). The view is kept in
+    ML_DATA_DIR/cluster/members.json, shared by the node's workers.
+
+Handoff
+    After a membership change each node sends the match state of jobs it
+    no longer owns to their new owner (POST /cluster/handoff); a leaving
+    node hands off everything first. Match state is per worker, so with
+    prefork workers each worker hands off its own jobs.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from storage import data_path, locked, atomic_write, file_signature
+
+SELF = os.getenv("ML_CLUSTER_SELF", "").rstrip("/")
+SEEDS = [s.strip().rstrip("/") for s in os.getenv("ML_CLUSTER_SEEDS", "").split(",") if s.strip()]
+VNODES = int(os.getenv("ML_CLUSTER_VNODES", "64"))
+HEARTBEAT_SECS = float(os.getenv("ML_CLUSTER_HEARTBEAT_SECS", "10"))
+FORWARDED_HEADER = "X-Cluster-Forwarded"
+ENABLED = bool(SELF)
+
+Members = Dict[str, Dict[str, Any]]
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, nodes: List[str], vnodes: int = VNODES) -> None:
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self._points = [p for p, _node in points]
+        self._owners = [node for _p, node in points]
+        self.nodes = sorted(set(nodes))
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        i = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[i]
+
+
+def _newer(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """True if membership entry `a` supersedes `b`."""
+    return (a["incarnation"], a["status"] == "left") > (b["incarnation"], b["status"] == "left")
+
+
+def merge_members(local: Members, remote: Members) -> Members:
+    merged = dict(local)
+    for node, entry in remote.items():
+        if node not in merged or _newer(entry, merged[node]):
+            merged[node] = {"status": entry["status"], "incarnation": int(entry["incarnation"])}
+    return merged
+
+
+def live_nodes(members: Members) -> List[str]:
+    return sorted(node for node, e in members.items() if e["status"] == "up")
+
+
+class Membership:
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.path.join(data_path("cluster"), "members.json")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._members: Members = {}
+        self._signature = None
+        self._ring = HashRing([])
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        sig = file_signature(self.path)
+        if sig is not None and sig != self._signature:
+            with open(self.path) as fh:
+                self._members = json.load(fh)
+            self._signature = sig
+            self._ring = HashRing(live_nodes(self._members))
+
+    def members(self) -> Members:
+        with self._lock:
+            self._refresh()
+            return dict(self._members)
+
+    def ring(self) -> HashRing:
+        with self._lock:
+            self._refresh()
+            return self._ring
+
+    def _update(self, fn) -> bool:
+        """Apply fn(members) -> members under the file lock; True if the view changed."""
+        with self._lock, locked(self.path):
+            self._signature = None
+            self._refresh()
+            updated = fn(dict(self._members))
+            if updated == self._members:
+                return False
+            with atomic_write(self.path, "w") as fh:
+                json.dump(updated, fh, sort_keys=True)
+            self._members = updated
+            self._signature = file_signature(self.path)
+            self._ring = HashRing(live_nodes(updated))
+            return True
+
+    def join(self, node: str) -> bool:
+        def fn(m: Members) -> Members:
+            entry = m.get(node)
+            if entry is None or entry["status"] != "up":
+                m[node] = {"status": "up", "incarnation": (entry["incarnation"] + 1) if entry else 1}
+            return m
+        return self._update(fn)
+
+    def leave(self, node: str) -> bool:
+        def fn(m: Members) -> Members:
+            entry = m.get(node)
+            if entry is not None and entry["status"] != "left":
+                m[node] = {"status": "left", "incarnation": entry["incarnation"] + 1}
+            return m
+        return self._update(fn)
+
+    def merge(self, remote: Members, refute: bool = True) -> bool:
+        """Merge a peer's view. With `refute`, a 'left' entry for this running node is overridden."""
+        def fn(m: Members) -> Members:
+            m = merge_members(m, remote)
+            mine = m.get(SELF)
+            if refute and ENABLED and (mine is None or mine["status"] != "up"):
+                m[SELF] = {"status": "up", "incarnation": (mine["incarnation"] + 1) if mine else 1}
+            return m
+        return self._update(fn)
+
+    def snapshot(self) -> Dict[str, Any]:
+        members = self.members()
+        return {"self": SELF or None, "enabled": ENABLED, "members": members, "live": live_nodes(members)}
+
+
+def owner_of(key: str) -> Optional[str]:
+    """The node that owns `key`, or None when it is this node (or cluster mode is off)."""
+    if not ENABLED:
+        return None
+    owner = get_membership().ring().owner(key)
+    return None if owner in (None, SELF) else owner
+
+
+def handoff_plan(jobs: List[tuple], ring: HashRing) -> Dict[str, Dict[str, Any]]:
+    """Group (job_id, state) pairs by their new owner, skipping jobs this node still owns."""
+    plan: Dict[str, Dict[str, Any]] = {}
+    for job_id, state in jobs:
+        owner = ring.owner(job_id)
+        if owner is not None and owner != SELF:
+            plan.setdefault(owner, {})[job_id] = state
+    return plan
+
+
+_MEMBERSHIP: Optional[Membership] = None
+
+
+def get_membership() -> Membership:
+    global _MEMBERSHIP
+    if _MEMBERSHIP is None:
+        _MEMBERSHIP = Membership()
+    return _MEMBERSHIP
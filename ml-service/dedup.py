@@ -0,0 +1,281 @@
+"""
+Near-duplicate resume detection: MinHash signatures + LSH banding.
+
+Each extracted text is reduced to a set of word 5-gram shingles and a
+128-value MinHash signature (the fraction of equal values estimates the
+Jaccard similarity of the shingle sets). Signatures are split into 16
+bands of 8 rows; two resumes become candidates when any band hashes to the
+same bucket, so a lookup touches only a few buckets instead of every
+resume. With 16×8 the candidate probability is ~60% at Jaccard 0.7,
+~99.4% at 0.85 and >99.9% at 0.9.
+
+The index is an append-only signature log under ML_DATA_DIR/dedup
+(add / remove records, appended under a file lock); each worker replays
+records it has not seen yet before every lookup.
+
+Every resume is indexed with its pool (the owning user) and lookups only
+ever return resumes from the caller's pool, so neither the existence nor
+the id nor the text of another user's resume leaks through a match.
+
+For duplicate reuse, every resume analysed at full fidelity keeps a
+compressed snapshot (text, skills, grammar issues), so a later
+near-duplicate can be updated from it instead of re-analysed from scratch.
+"""
+
+import gzip
+import json
+import os
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from lookup import tokenize
+from storage import data_path, locked, atomic_write
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE = 5
+DUPLICATE_THRESHOLD = float(os.getenv("ML_DEDUP_THRESHOLD", "0.85"))
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(0x5EED)
+_A = _rng.randint(1, _PRIME, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, NUM_PERM).astype(np.uint64)
+_CHUNK = 4096
+
+_ID_BYTES = 64
+_RECORD = np.dtype([("op", "u1"), ("id", f"S{_ID_BYTES}"), ("pool", f"S{_ID_BYTES}"), ("sig", "<u4", NUM_PERM)])
+_OP_ADD, _OP_REMOVE = 1, 0
+
+
+def _shingles(text: str) -> np.ndarray:
+    tokens = tokenize(text)
+    if len(tokens) < SHINGLE:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = [" ".join(tokens[i:i + SHINGLE]) for i in range(len(tokens) - SHINGLE + 1)]
+    return np.unique(np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams),
+    ))
+
+
+def signature(text: str) -> np.ndarray:
+    """128 × uint32 MinHash signature of the text's word 5-gram shingles."""
+    sh = _shingles(text)
+    sig = np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    for lo in range(0, len(sh), _CHUNK):
+        block = (np.outer(sh[lo:lo + _CHUNK], _A) + _B) % _PRIME
+        np.minimum(sig, block.min(axis=0), out=sig)
+    return sig.astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def _band_keys(sig: np.ndarray) -> List[bytes]:
+    return [band.tobytes() for band in sig.reshape(BANDS, ROWS)]
+
+
+class DedupIndex:
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.dir = directory or data_path("dedup")
+        os.makedirs(os.path.join(self.dir, "snapshots"), exist_ok=True)
+        self.log_path = os.path.join(self.dir, "signatures.v2.log")  # v2: records carry the pool
+        self._offset = 0
+        self._sigs: Dict[str, np.ndarray] = {}
+        self._pools: Dict[str, str] = {}
+        self._bands: List[Dict[bytes, Set[str]]] = [{} for _ in range(BANDS)]
+        self._lock = threading.Lock()
+
+    # ── log replay ────────────────────────────────────────────
+
+    def _apply(self, op: int, resume_id: str, pool: str, sig: np.ndarray) -> None:
+        old = self._sigs.pop(resume_id, None)
+        self._pools.pop(resume_id, None)
+        if old is not None:
+            for band, key in zip(self._bands, _band_keys(old)):
+                bucket = band.get(key)
+                if bucket is not None:
+                    bucket.discard(resume_id)
+                    if not bucket:
+                        del band[key]
+        if op == _OP_ADD:
+            self._sigs[resume_id] = sig
+            self._pools[resume_id] = pool
+            for band, key in zip(self._bands, _band_keys(sig)):
+                band.setdefault(key, set()).add(resume_id)
+
+    def _catch_up(self) -> None:
+        try:
+            size = os.path.getsize(self.log_path)
+        except FileNotFoundError:
+            return
+        n = (size - self._offset) // _RECORD.itemsize
+        if n <= 0:
+            return
+        records = np.fromfile(self.log_path, dtype=_RECORD, count=n, offset=self._offset)
+        for rec in records:
+            self._apply(int(rec["op"]), rec["id"].decode("utf-8"), rec["pool"].decode("utf-8"), rec["sig"].copy())
+        self._offset += n * _RECORD.itemsize
+
+    def _append(self, op: int, resume_id: str, sig: np.ndarray, pool: Optional[str] = None) -> None:
+        encoded, encoded_pool = resume_id.encode("utf-8"), (pool or "").encode("utf-8")
+        if len(encoded) > _ID_BYTES or len(encoded_pool) > _ID_BYTES:
+            raise ValueError(f"resume id / pool longer than {_ID_BYTES} bytes")
+        rec = np.zeros(1, dtype=_RECORD)
+        rec["op"], rec["id"], rec["pool"], rec["sig"] = op, encoded, encoded_pool, sig
+        with locked(self.log_path):
+            self._catch_up()
+            with open(self.log_path, "ab") as fh:
+                fh.write(rec.tobytes())
+            self._catch_up()
+
+    # ── public API ────────────────────────────────────────────
+
+    def add(self, resume_id: str, sig: np.ndarray, pool: Optional[str] = None) -> None:
+        with self._lock:
+            self._append(_OP_ADD, resume_id, sig, pool)
+
+    def remove(self, resume_id: str) -> bool:
+        with self._lock:
+            self._catch_up()
+            if resume_id not in self._sigs:
+                return False
+            self._append(_OP_REMOVE, resume_id, np.zeros(NUM_PERM, dtype=np.uint32))
+        delete_snapshot(resume_id, self.dir)
+        return True
+
+    def query(
+        self,
+        sig: np.ndarray,
+        threshold: float = DUPLICATE_THRESHOLD,
+        exclude: Optional[str] = None,
+        pool: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """Resumes of `pool` with estimated Jaccard ≥ threshold, most similar first."""
+        pool = pool or ""
+        with self._lock:
+            self._catch_up()
+            candidates: Set[str] = set()
+            for band, key in zip(self._bands, _band_keys(sig)):
+                candidates |= band.get(key, set())
+            candidates.discard(exclude)
+            scored = [(rid, similarity(sig, self._sigs[rid])) for rid in candidates if self._pools[rid] == pool]
+        return sorted(
+            ((rid, s) for rid, s in scored if s >= threshold),
+            key=lambda t: (-t[1], t[0]),
+        )
+
+    def clusters(
+        self,
+        resume_ids: List[str],
+        threshold: float = DUPLICATE_THRESHOLD,
+    ) -> Dict[str, Any]:
+        """
+        Group a candidate pool into near-duplicate clusters (union-find over
+        LSH candidate pairs within the pool). Singletons are omitted.
+        """
+        with self._lock:
+            self._catch_up()
+            pool = [rid for rid in dict.fromkeys(resume_ids) if rid in self._sigs]
+            missing = [rid for rid in resume_ids if rid not in self._sigs]
+            sigs = {rid: self._sigs[rid] for rid in pool}
+
+        parent = {rid: rid for rid in pool}
+
+        def find(x: str) -> str:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        edges: Dict[Tuple[str, str], float] = {}
+        for b in range(BANDS):
+            buckets: Dict[bytes, List[str]] = {}
+            for rid in pool:
+                buckets.setdefault(sigs[rid][b * ROWS:(b + 1) * ROWS].tobytes(), []).append(rid)
+            for members in buckets.values():
+                for i, a in enumerate(members):
+                    for c in members[i + 1:]:
+                        if (a, c) not in edges:
+                            edges[(a, c)] = similarity(sigs[a], sigs[c])
+
+        close = {pair: s for pair, s in edges.items() if s >= threshold}
+        for a, c in close:
+            parent[find(a)] = find(c)
+
+        groups: Dict[str, List[str]] = {}
+        for rid in pool:
+            groups.setdefault(find(rid), []).append(rid)
+        spread: Dict[str, List[float]] = {}
+        for (a, _c), s in close.items():
+            lo_hi = spread.setdefault(find(a), [s, s])
+            lo_hi[0], lo_hi[1] = min(lo_hi[0], s), max(lo_hi[1], s)
+
+        clusters = [
+            {
+                "resume_ids": members,
+                "size": len(members),
+                "min_similarity": round(spread[root][0], 4),
+                "max_similarity": round(spread[root][1], 4),
+            }
+            for root, members in groups.items() if len(members) > 1
+        ]
+        clusters.sort(key=lambda c: (-c["size"], c["resume_ids"][0]))
+        return {"clusters": clusters, "pool_size": len(pool), "missing": missing}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._catch_up()
+            return {
+                "resumes": len(self._sigs),
+                "log_bytes": self._offset,
+                "threshold": DUPLICATE_THRESHOLD,
+                "bands": BANDS,
+                "rows": ROWS,
+            }
+
+
+# ── analysis snapshots (for duplicate reuse) ──────────────────
+
+def _snapshot_path(resume_id: str, directory: str) -> str:
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in resume_id)
+    return os.path.join(directory, "snapshots", f"{safe}.json.gz")
+
+
+def save_snapshot(resume_id: str, text: str, result: Dict[str, Any]) -> None:
+    """Keep the text and the expensive stage outputs of an analysis."""
+    keep = {k: result[k] for k in ("extracted_skills", "grammar_issues") if k in result}
+    path = _snapshot_path(resume_id, get_index().dir)
+    with atomic_write(path) as fh:
+        fh.write(gzip.compress(json.dumps({"text": text, "result": keep}).encode("utf-8")))
+
+
+def load_snapshot(resume_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_snapshot_path(resume_id, get_index().dir), "rb") as fh:
+            return json.loads(gzip.decompress(fh.read()))
+    except FileNotFoundError:
+        return None
+
+
+def delete_snapshot(resume_id: str, directory: str) -> None:
+    try:
+        os.unlink(_snapshot_path(resume_id, directory))
+    except FileNotFoundError:
+        pass
+
+
+_INDEX: Optional[DedupIndex] = None
+
+
+def get_index() -> DedupIndex:
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = DedupIndex()
+    return _INDEX
@@ -0,0 +1,172 @@
+"""
+Persisted raw scoring features, for re-scoring without re-analysis.
+
+Two columnar stores under ML_DATA_DIR/features:
+
+    resumes   one int64 row of batch_scoring.COLUMNS per analysed resume
+              (the unweighted ATS / quality / anomaly signals). Rows are
+              appended to resumes.i64 and memory-mapped on read; the
+              resumes.log JSON-lines log maps resume ids to rows (add /
+              remove records, latest add wins) and is replayed by each
+              worker, like the skill index.
+    jobs      per job, the hiring-probability inputs of its last /match
+              run: resume ids, similarity, supplied ATS / quality scores,
+              matched and total JD keyword counts, in ranking input
+              order. One .npz per job, replaced atomically.
+
+Re-added resumes get a new row; old rows are dead weight until the
+directory is rebuilt (a row is len(COLUMNS) * 8 = 136 bytes).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from batch_scoring import COLUMNS, from_feature_dicts
+from storage import atomic_write, data_path, locked
+
+ROW_BYTES = len(COLUMNS) * 8
+
+JOB_COLUMNS = ("similarity", "ats", "quality", "matched", "total")
+
+# (resume_id, similarity, ats, quality, matched, total)
+MatchFeatures = Tuple[str, float, float, float, int, int]
+
+
+class FeatureStore:
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.dir = directory or data_path("features")
+        self.jobs_dir = os.path.join(self.dir, "jobs")
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self.rows_path = os.path.join(self.dir, "resumes.i64")
+        self.log_path = os.path.join(self.dir, "resumes.log")
+        self._offset = 0
+        self._id_row: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    # ── resume rows ───────────────────────────────────────────
+
+    def _catch_up(self) -> None:
+        try:
+            size = os.path.getsize(self.log_path)
+        except FileNotFoundError:
+            return
+        if size <= self._offset:
+            return
+        with open(self.log_path, "rb") as fh:
+            fh.seek(self._offset)
+            data = fh.read(size - self._offset)
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            rec = json.loads(line)
+            if rec["op"] == "add":
+                self._id_row[rec["id"]] = rec["row"]
+            else:
+                self._id_row.pop(rec["id"], None)
+        self._offset += len(complete)
+
+    def add(self, items: Sequence[Tuple[str, Dict[str, Dict[str, Any]]]]) -> int:
+        """Add or replace resumes from (resume_id, {"ats", "quality", "anomaly"} features) pairs."""
+        if not items:
+            return 0
+        X = from_feature_dicts([f for _, f in items]).values
+        with self._lock, locked(self.log_path):
+            # Rows first, then the log records that point at them
+            with open(self.rows_path, "ab") as fh:
+                first = fh.tell() // ROW_BYTES
+                fh.write(np.ascontiguousarray(X, dtype="<i8").tobytes())
+            with open(self.log_path, "ab") as fh:
+                fh.write(b"".join(
+                    json.dumps({"op": "add", "id": rid, "row": first + i}).encode("utf-8") + b"\n"
+                    for i, (rid, _) in enumerate(items)
+                ))
+        return len(items)
+
+    def remove(self, resume_id: str) -> bool:
+        with self._lock:
+            self._catch_up()
+            if resume_id not in self._id_row:
+                return False
+            with locked(self.log_path):
+                with open(self.log_path, "ab") as fh:
+                    fh.write(json.dumps({"op": "remove", "id": resume_id}).encode("utf-8") + b"\n")
+            self._catch_up()
+            return True
+
+    def resumes(self) -> Tuple[List[str], np.ndarray]:
+        """(resume ids, (n, len(COLUMNS)) int64 feature matrix) of every stored resume."""
+        with self._lock:
+            self._catch_up()
+            ids = list(self._id_row)
+            rows = np.fromiter(self._id_row.values(), dtype=np.int64, count=len(ids))
+        if not ids:
+            return [], np.zeros((0, len(COLUMNS)), dtype=np.int64)
+        mm = np.memmap(self.rows_path, dtype="<i8", mode="r", shape=(int(rows.max()) + 1, len(COLUMNS)))
+        return ids, np.asarray(mm[rows], dtype=np.int64)
+
+    # ── per-job match features ────────────────────────────────
+
+    def _job_path(self, job_id: str) -> str:
+        digest = hashlib.blake2b(job_id.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.jobs_dir, f"{digest}.npz")
+
+    def put_job(self, job_id: str, rows: Sequence[MatchFeatures]) -> None:
+        """Replace a job's match features (rows in ranking input order)."""
+        ids, *cols = zip(*rows) if rows else ((),) * (len(JOB_COLUMNS) + 1)
+        arrays = {
+            name: np.asarray(col, dtype=np.int64 if name in ("matched", "total") else np.float64)
+            for name, col in zip(JOB_COLUMNS, cols)
+        }
+        path = self._job_path(job_id)
+        with atomic_write(path) as fh:
+            np.savez(fh, job_id=np.array(job_id), resume_ids=np.array(ids, dtype=str), **arrays)
+
+    def drop_job(self, job_id: str) -> bool:
+        try:
+            os.unlink(self._job_path(job_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def jobs(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """job_id → {"resume_ids", *JOB_COLUMNS} arrays for every stored job."""
+        out: Dict[str, Dict[str, np.ndarray]] = {}
+        for name in sorted(os.listdir(self.jobs_dir)):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                with np.load(os.path.join(self.jobs_dir, name)) as data:
+                    out[str(data["job_id"])] = {k: data[k] for k in ("resume_ids",) + JOB_COLUMNS}
+            except FileNotFoundError:
+                continue  # dropped while listing
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._catch_up()
+            resumes = len(self._id_row)
+        try:
+            rows = os.path.getsize(self.rows_path) // ROW_BYTES
+        except FileNotFoundError:
+            rows = 0
+        return {
+            "resumes": resumes,
+            "rows": rows,
+            "row_bytes": ROW_BYTES,
+            "jobs": sum(1 for n in os.listdir(self.jobs_dir) if n.endswith(".npz")),
+            "log_bytes": self._offset,
+        }
+
+
+_STORE: Optional[FeatureStore] = None
+
+
+def get_store() -> FeatureStore:
+    global _STORE
+    if _STORE is None:
+        _STORE = FeatureStore()
+    return _STORE
@@ -0,0 +1,85 @@
+"""
+Compact, versioned resume feature fingerprint.
+
+Built once at analysis time over the full text and stored in
+raw_result.fingerprint, so /match can score a resume without
+re-tokenising (or truncating) its text.
+
+Layout (v1):
+    {
+      "v": 1,
+      "n_features": 262144,           # hashed term space size
+      "n_terms": int,
+      "terms": str,                   # base64(zlib(uint32 idx deltas + uint16 counts))
+      "skills": [str],                # canonical (lower-case) skills
+      "role_scores": [int],           # aligned with role_predictor.ROLE_SKILLS
+      "features": {"ats": {...}, "quality": {...}, "anomaly": {...}},
+      "text_length": int,
+    }
+"""
+
+import base64
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from matcher import hashed_term_counts
+from role_predictor import ROLE_SKILLS
+from vectorizer import N_FEATURES
+
+FINGERPRINT_VERSION = 1
+
+
+def _pack_terms(idx: np.ndarray, tf: np.ndarray) -> str:
+    deltas = np.diff(idx.astype(np.int64), prepend=0).astype("<u4")
+    counts = np.minimum(tf, np.iinfo(np.uint16).max).astype("<u2")
+    return base64.b64encode(zlib.compress(deltas.tobytes() + counts.tobytes(), 6)).decode("ascii")
+
+
+def unpack_terms(fingerprint: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (sorted bucket indices, counts) from a fingerprint."""
+    n = int(fingerprint.get("n_terms", 0))
+    if not n:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float64)
+    raw = zlib.decompress(base64.b64decode(fingerprint["terms"]))
+    deltas = np.frombuffer(raw, dtype="<u4", count=n)
+    counts = np.frombuffer(raw, dtype="<u2", count=n, offset=4 * n)
+    return np.cumsum(deltas, dtype=np.uint64).astype(np.uint32), counts.astype(np.float64)
+
+
+def build_fingerprint(
+    text: str,
+    skills: List[str],
+    role_scores: Dict[str, int],
+    features: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Build a fingerprint from the full resume text and the raw feature
+    dicts produced during analysis (ats / quality / anomaly).
+    """
+    idx, tf = hashed_term_counts(text)
+    return {
+        "v": FINGERPRINT_VERSION,
+        "n_features": N_FEATURES,
+        "n_terms": int(len(idx)),
+        "terms": _pack_terms(idx, tf),
+        "skills": sorted({s.lower() for s in skills}),
+        "role_scores": [int(role_scores.get(role, 0)) for role in ROLE_SKILLS],
+        "features": features,
+        "text_length": len(text),
+    }
+
+
+def is_current(fingerprint: Optional[Dict[str, Any]]) -> bool:
+    """True if the fingerprint was built by this version of the hashing scheme."""
+    return bool(
+        fingerprint
+        and fingerprint.get("v") == FINGERPRINT_VERSION
+        and fingerprint.get("n_features") == N_FEATURES
+    )
+
+
+def role_scores_from(fingerprint: Dict[str, Any]) -> Dict[str, int]:
+    """Re-key the stored role scores by role name."""
+    return dict(zip(ROLE_SKILLS, fingerprint.get("role_scores", [])))
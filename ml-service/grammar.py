@@ -3,14 +3,23 @@ Grammar and language quality checker using language-tool-python.
 Caches the LanguageTool instance (slow to initialise).
 """
 
+import difflib
 import functools
-from typing import List, Dict, Any
+import os
+import re
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+
+# URL of an already-running LanguageTool server (e.g. started by the prefork parent)
+_SHARED_SERVER_URL = os.getenv("LANGUAGETOOL_URL", "")
+_INHERITED_TOOLS: List[Any] = []
 
 try:
     import language_tool_python  # type: ignore
 
     @functools.lru_cache(maxsize=1)
     def _get_tool() -> language_tool_python.LanguageTool:
+        if _SHARED_SERVER_URL:
+            return language_tool_python.LanguageTool("en-US", remote_server=_SHARED_SERVER_URL)
         return language_tool_python.LanguageTool("en-US")
 
     _LT_AVAILABLE = True
@@ -18,6 +27,8 @@ except Exception:
     _LT_AVAILABLE = False
 
 
+MAX_ISSUES = 50  # cap per response
+
 # Rules to suppress (style suggestions that aren't real errors)
 _IGNORED_RULES = {
     "WHITESPACE_RULE",
@@ -54,12 +65,146 @@ def check_grammar(text: str) -> List[Dict[str, Any]]:
                     "severity": _classify_severity(m.ruleId),
                 }
             )
-        return issues[:50]  # cap at 50 issues for response size
+        return issues[:MAX_ISSUES]  # cap for response size
     except Exception as e:
         print(f"[grammar] check failed: {e}")
         return []
 
 
+_REPEATED_WORD = re.compile(r"\b(\w+)\s+\1\b", re.IGNORECASE)
+
+
+def quick_grammar_check(text: str) -> List[Dict[str, Any]]:
+    """
+    Regex-only stand-in for check_grammar() when LanguageTool is skipped
+    (fast tiers / tight latency budgets). Flags repeated words only.
+    """
+    issues = []
+    for m in _REPEATED_WORD.finditer(text):
+        if m.group(1).isdigit():
+            continue
+        issues.append(
+            {
+                "rule_id": "ENGLISH_WORD_REPEAT_RULE",
+                "message": f"Possible typo: you repeated a word (\"{m.group(1)}\").",
+                "context": text[max(0, m.start() - 20): m.end() + 20],
+                "offset": m.start(),
+                "length": m.end() - m.start(),
+                "suggestions": [m.group(1)],
+                "severity": _classify_severity("ENGLISH_WORD_REPEAT_RULE"),
+            }
+        )
+    return issues[:MAX_ISSUES]
+
+
+def check_grammar_chunked(chunks: Iterable[Tuple[int, str]]) -> List[Dict[str, Any]]:
+    """
+    check_grammar() over a long document given as (offset, chunk) pairs
+    (see chunking.py): one LanguageTool request per chunk, issue offsets
+    shifted to the whole text. Stops once MAX_ISSUES issues are found.
+    """
+    issues: List[Dict[str, Any]] = []
+    for offset, chunk in chunks:
+        issues.extend({**issue, "offset": issue["offset"] + offset} for issue in check_grammar(chunk))
+        if len(issues) >= MAX_ISSUES:
+            break
+    return issues[:MAX_ISSUES]
+
+
+def _line_starts(lines: List[str]) -> List[int]:
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line))
+    return starts
+
+
+def recheck_grammar(
+    old_text: str,
+    old_issues: List[Dict[str, Any]],
+    new_text: str,
+    max_changed_ratio: float = 0.5,
+) -> List[Dict[str, Any]]:
+    """
+    Update a previous check_grammar() result for an edited text: issues
+    inside unchanged lines are kept (offsets shifted), and LanguageTool runs
+    only on the changed line ranges. Falls back to a full check when more
+    than `max_changed_ratio` of the text changed.
+    """
+    old_lines = old_text.splitlines(keepends=True)
+    new_lines = new_text.splitlines(keepends=True)
+    old_at, new_at = _line_starts(old_lines), _line_starts(new_lines)
+    opcodes = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes()
+
+    changed = [(new_at[j1], new_at[j2]) for tag, _i1, _i2, j1, j2 in opcodes if tag in ("replace", "insert")]
+    if sum(end - start for start, end in changed) > max_changed_ratio * max(len(new_text), 1):
+        return check_grammar(new_text)
+
+    issues: List[Dict[str, Any]] = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag != "equal":
+            continue
+        lo, hi, shift = old_at[i1], old_at[i2], new_at[j1] - old_at[i1]
+        for issue in old_issues:
+            if lo <= issue["offset"] and issue["offset"] + issue["length"] <= hi:
+                issues.append({**issue, "offset": issue["offset"] + shift})
+
+    for start, end in changed:
+        for issue in check_grammar(new_text[start:end]):
+            issues.append({**issue, "offset": issue["offset"] + start})
+
+    issues.sort(key=lambda i: i["offset"])
+    return issues[:MAX_ISSUES]
+
+
+def start_shared_server() -> Optional[str]:
+    """
+    Start the local LanguageTool JVM and return its base URL.
+    Called once by the prefork parent so every worker talks to one JVM.
+    language_tool_python chooses the port itself and only exposes the
+    server URL privately; if that is unavailable, returns None and every
+    worker starts its own server.
+    """
+    if not _LT_AVAILABLE:
+        return None
+    try:
+        tool = _get_tool()
+    except Exception as e:
+        print(f"[grammar] LanguageTool start failed: {e}")
+        return None
+    url = getattr(tool, "_url", None)
+    if not isinstance(url, str) or not url:
+        print("[grammar] LanguageTool server URL unavailable, using per-worker servers")
+        # Don't let forked workers inherit a handle to a JVM they don't own
+        tool.close()
+        _get_tool.cache_clear()
+        return None
+    return url[: -len("v2/")] if url.endswith("v2/") else url
+
+
+def attach_shared_server(url: Optional[str]) -> None:
+    """
+    Point this (forked) process at the parent's LanguageTool server.
+    The inherited JVM handle is dropped from the atexit kill list so a
+    worker exiting never takes the shared server down with it.
+    """
+    global _SHARED_SERVER_URL
+    if not _LT_AVAILABLE or not url:
+        return
+    from language_tool_python import server as _lt_server  # type: ignore
+
+    _lt_server.RUNNING_SERVER_PROCESSES.clear()
+    if _get_tool.cache_info().currsize:
+        # Keep the parent's client alive (its __del__ would try to stop the JVM)
+        _INHERITED_TOOLS.append(_get_tool())
+    _SHARED_SERVER_URL = url
+    _get_tool.cache_clear()
+
+
+def shared_server_url() -> Optional[str]:
+    """LanguageTool server this process uses, if it is a shared one."""
+    return _SHARED_SERVER_URL or None
+
+
 def _classify_severity(rule_id: str) -> str:
     """Map known rule categories to a severity level."""
     if any(k in rule_id for k in ("SPELL", "TYPO")):
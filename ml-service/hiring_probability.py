@@ -2,7 +2,16 @@
 Hiring probability scoring with logistic-style formula + explainability.
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+# Factor weights — shared by the scalar and batch paths
+W_SIM, W_ATS, W_QUAL, W_KW = 0.35, 0.25, 0.25, 0.15
+PROB_MIN, PROB_MAX = 0.02, 0.98
+FACTOR_WEIGHTS = {"jd_similarity": W_SIM, "ats_score": W_ATS, "quality_score": W_QUAL, "keyword_match": W_KW}
+
+ArrayLike = Union[Sequence[float], np.ndarray]
 
 
 def compute_hiring_probability(
@@ -33,7 +42,7 @@ def compute_hiring_probability(
     kw_ratio   = min(skills_matched_count / max(total_jd_keywords, 1), 1.0)
 
     # Weighted sum
-    w_sim, w_ats, w_qual, w_kw = 0.35, 0.25, 0.25, 0.15
+    w_sim, w_ats, w_qual, w_kw = W_SIM, W_ATS, W_QUAL, W_KW
 
     raw_prob = (
         w_sim  * sim_norm +
@@ -44,7 +53,7 @@ def compute_hiring_probability(
 
     # Apply sigmoid-like boost to spread out scores
     # Clamp to reasonable bounds
-    probability = round(max(0.02, min(0.98, raw_prob)), 4)
+    probability = round(max(PROB_MIN, min(PROB_MAX, raw_prob)), 4)
 
     explanation = {
         "jd_similarity": round(w_sim * sim_norm, 4),
@@ -54,3 +63,85 @@ def compute_hiring_probability(
     }
 
     return {"probability": probability, "explanation": explanation}
+
+
+def round_half_even(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Vectorised round() that matches Python's built-in bit for bit.
+    np.round scales by 10**n first, which can flip values sitting on a
+    half; those few are re-rounded with round() itself.
+    """
+    out = np.round(values, ndigits)
+    scaled = values * (10.0 ** ndigits)
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        out[near_half] = [round(v, ndigits) for v in values[near_half].tolist()]
+    return out
+
+
+def compute_hiring_probability_batch(
+    similarity_scores: ArrayLike,
+    ats_scores: ArrayLike,
+    quality_scores: ArrayLike,
+    skills_matched_counts: ArrayLike,
+    total_jd_keywords: Union[int, ArrayLike] = 20,
+    weights: Optional[Dict[str, float]] = None,
+) -> Dict[str, object]:
+    """
+    Vectorised compute_hiring_probability() over N candidates.
+    Element i equals compute_hiring_probability() on row i exactly.
+    `weights` overrides factor weights by explanation key (see FACTOR_WEIGHTS).
+
+    Returns:
+        probability : np.ndarray (N,)
+        explanation : dict of factor names → np.ndarray (N,)
+    """
+    sim_norm  = np.asarray(similarity_scores, dtype=np.float64)
+    ats_norm  = np.asarray(ats_scores, dtype=np.float64) / 100.0
+    qual_norm = np.asarray(quality_scores, dtype=np.float64) / 100.0
+    matched   = np.asarray(skills_matched_counts, dtype=np.float64)
+    total     = np.maximum(np.asarray(total_jd_keywords, dtype=np.float64), 1)
+    kw_ratio  = np.minimum(matched / total, 1.0)
+
+    unknown = set(weights or {}) - set(FACTOR_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown weight(s): {', '.join(sorted(unknown))} (expected {', '.join(FACTOR_WEIGHTS)})")
+    w = {**FACTOR_WEIGHTS, **(weights or {})}
+
+    raw_prob = (
+        w["jd_similarity"] * sim_norm +
+        w["ats_score"]     * ats_norm +
+        w["quality_score"] * qual_norm +
+        w["keyword_match"] * kw_ratio
+    )
+    probability = round_half_even(np.clip(raw_prob, PROB_MIN, PROB_MAX), 4)
+
+    explanation = {
+        "jd_similarity": round_half_even(w["jd_similarity"] * sim_norm, 4),
+        "ats_score":     round_half_even(w["ats_score"] * ats_norm, 4),
+        "quality_score": round_half_even(w["quality_score"] * qual_norm, 4),
+        "keyword_match": round_half_even(w["keyword_match"] * kw_ratio, 4),
+    }
+
+    return {"probability": probability, "explanation": explanation}
+
+
+def rank_candidates(scores: ArrayLike, top_k: Optional[int] = None) -> np.ndarray:
+    """
+    Row indices ordered by descending score; ties keep input order, exactly
+    like list.sort(key=..., reverse=True). With top_k, only the best k are
+    selected (argpartition) and sorted.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    n = len(scores)
+    if top_k is None or top_k >= n:
+        return np.argsort(-scores, kind="stable")
+    if top_k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # k-th largest value; everything above it is in, ties at it fill by position
+    threshold = scores[np.argpartition(-scores, top_k - 1)[top_k - 1]]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[: top_k - len(above)]
+    chosen = np.sort(np.concatenate([above, ties]))
+    return chosen[np.argsort(-scores[chosen], kind="stable")]
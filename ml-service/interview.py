@@ -2,7 +2,10 @@
 Interview question generator — rule-based, skill-keyed.
 """
 
-from typing import List, Dict, Any
+import functools
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
+
+from lookup import TermIndex
 
 # Skill → question bank  (easy / medium / hard)
 _SKILL_QUESTIONS: Dict[str, Dict[str, List[str]]] = {
@@ -165,6 +168,88 @@ _ROLE_QUESTIONS: Dict[str, List[str]] = {
 }
 
 
+# ── Lookup indexes (built once) ───────────────────────────────
+_SKILL_ALIASES: Dict[str, str] = {
+    "python3": "python",
+    "js": "javascript",
+    "es6": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "reactjs": "react",
+    "react.js": "react",
+    "postgresql": "sql",
+    "postgres": "sql",
+    "mysql": "sql",
+    "sqlite": "sql",
+    "mssql": "sql",
+    "ml": "machine learning",
+    "dockerfile": "docker",
+    "github": "git",
+    "gitlab": "git",
+}
+
+_ROLE_ALIASES: Dict[str, str] = {
+    "backend engineer": "backend developer",
+    "back end developer": "backend developer",
+    "frontend engineer": "frontend developer",
+    "front end developer": "frontend developer",
+    "devops": "devops engineer",
+    "sre": "devops engineer",
+    "site reliability engineer": "devops engineer",
+}
+
+_SKILL_INDEX = TermIndex(_SKILL_QUESTIONS, _SKILL_ALIASES)
+_ROLE_INDEX = TermIndex(_ROLE_QUESTIONS, _ROLE_ALIASES)
+_DEFAULT_ROLE = "software engineer"
+
+_DIFFICULTIES = ("easy", "medium", "hard")
+
+
+@functools.lru_cache(maxsize=4096)
+def _resolve_skill(skill: str) -> Optional[str]:
+    return _SKILL_INDEX.resolve(skill)
+
+
+def _resolve_role(role: str) -> str:
+    return _ROLE_INDEX.resolve(role, anchored=False) or _DEFAULT_ROLE
+
+
+@functools.lru_cache(maxsize=1024)
+def _build_questions(
+    skill_keys: FrozenSet[str],
+    role_key: str,
+) -> Tuple[Dict[str, Tuple[str, ...]], Tuple[str, ...]]:
+    """Technical + role questions for a canonical skill set; cached across requests."""
+    technical: Dict[str, List[str]] = {d: [] for d in _DIFFICULTIES}
+
+    # Walk banks in declaration order so equal skill sets give identical output
+    for key, bank in _SKILL_QUESTIONS.items():
+        if key not in skill_keys:
+            continue
+        for difficulty in _DIFFICULTIES:
+            # Add up to 1 per difficulty per matched skill to avoid bloat
+            for q in bank.get(difficulty, [])[:1]:
+                if q not in technical[difficulty]:
+                    technical[difficulty].append(q)
+
+    # If we matched very few skills, pad with generic engineering questions
+    if sum(len(v) for v in technical.values()) < 3:
+        technical["easy"].append("Describe your software development workflow.")
+        technical["medium"].append("How do you approach debugging a production issue?")
+        technical["hard"].append("Describe the most complex system you have designed or contributed to.")
+
+    return (
+        {d: tuple(qs) for d, qs in technical.items()},
+        tuple(_ROLE_QUESTIONS.get(role_key, [])),
+    )
+
+
+def canonical_key(skills: List[str], role: str = "") -> Tuple[FrozenSet[str], str]:
+    """The (skill bank keys, role bank key) a request resolves to — the cache key."""
+    skill_keys = frozenset(k for k in map(_resolve_skill, skills) if k)
+    return skill_keys, _resolve_role(role)
+
+
 def generate_interview_questions(
     skills: List[str],
     role: str = "",
@@ -180,36 +265,7 @@ def generate_interview_questions(
           "total": int,
         }
     """
-    technical: Dict[str, List[str]] = {"easy": [], "medium": [], "hard": []}
-
-    for skill in skills:
-        skill_lower = skill.lower()
-        # Fuzzy match against known skill keys
-        for key, bank in _SKILL_QUESTIONS.items():
-            if key in skill_lower or skill_lower in key:
-                for difficulty in ("easy", "medium", "hard"):
-                    qs = bank.get(difficulty, [])
-                    # Add up to 1 per difficulty per matched skill to avoid bloat
-                    for q in qs[:1]:
-                        if q not in technical[difficulty]:
-                            technical[difficulty].append(q)
-                break
-
-    # If we matched very few skills, pad with generic engineering questions
-    if sum(len(v) for v in technical.values()) < 3:
-        technical["easy"].append("Describe your software development workflow.")
-        technical["medium"].append("How do you approach debugging a production issue?")
-        technical["hard"].append("Describe the most complex system you have designed or contributed to.")
-
-    # Role-specific questions
-    role_lower = role.lower()
-    role_specific: List[str] = []
-    for rkey, rqs in _ROLE_QUESTIONS.items():
-        if rkey in role_lower or role_lower in rkey:
-            role_specific = rqs
-            break
-    if not role_specific:
-        role_specific = _ROLE_QUESTIONS.get("software engineer", [])
+    technical, role_specific = _build_questions(*canonical_key(skills, role))
 
     total = (
         len(_BEHAVIORAL)
@@ -218,8 +274,13 @@ def generate_interview_questions(
     )
 
     return {
-        "behavioral": _BEHAVIORAL,
-        "technical": technical,
-        "role_specific": role_specific,
+        "behavioral": list(_BEHAVIORAL),
+        "technical": {d: list(qs) for d, qs in technical.items()},
+        "role_specific": list(role_specific),
         "total": total,
     }
+
+
+def question_cache_info() -> Dict[str, int]:
+    info = _build_questions.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
@@ -0,0 +1,217 @@
+"""
+Persistent index of active job descriptions for resume → many-JDs matching.
+
+Each JD is hashed once into the same term space as resume fingerprints
+(vectorizer.hash_term) and stored as a row of a sparse term-count matrix,
+together with its precomputed keywords. A query scores one resume against
+every JD in a single sparse pass over the resume's columns, weighting both
+sides with the corpus IDF snapshot — the same cosine /match computes:
+
+    score = Σ_shared r·j·idf² / (‖r·idf‖ · ‖j·idf‖)
+
+‖j·idf‖ for all JDs is recomputed only when the IDF snapshot changes.
+JD keywords are ranked by TF-IDF weight at indexing time, so they do not
+depend on the resume being scored.
+
+The index is stored as one .npz under ML_DATA_DIR. Writers update it under
+a file lock; every worker reloads it when the file changes.
+"""
+
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from matcher import _jd_terms, hash_term, jd_keywords
+from vectorizer import N_FEATURES, get_corpus
+from hiring_probability import rank_candidates
+from storage import data_path, locked, atomic_write, file_signature
+
+INDEX_FILE = "jd_index.npz"
+
+
+class _Entry:
+    __slots__ = ("idx", "tf", "keywords", "meta")
+
+    def __init__(self, idx: np.ndarray, tf: np.ndarray, keywords: List[str], meta: Dict[str, Any]):
+        self.idx = idx
+        self.tf = tf
+        self.keywords = keywords
+        self.meta = meta
+
+
+def _stack(rows: List[_Entry]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CSR (indptr, indices, data) over the rows' term counts."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(e.idx) for e in rows])
+    indices = np.concatenate([e.idx for e in rows]) if rows else np.zeros(0, dtype=np.int32)
+    data = np.concatenate([e.tf for e in rows]) if rows else np.zeros(0)
+    return indptr, indices, data
+
+
+def _entry_from_text(text: str, meta: Dict[str, Any]) -> _Entry:
+    idx, tf, names = _jd_terms(text)
+    _version, idf = get_corpus().idf()
+    keywords = jd_keywords(idx, tf * idf[idx], names)
+    return _Entry(idx.astype(np.int32), tf.astype(np.float64), keywords, meta)
+
+
+class JDIndex:
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or data_path(INDEX_FILE)
+        self._entries: Dict[str, _Entry] = {}
+        self._signature = None
+        self._lock = threading.RLock()
+        # Built lazily from _entries after every change
+        self._ids: List[str] = []
+        self._matrix: Optional[sp.csc_matrix] = None
+        self._j_norm: Optional[Tuple[int, np.ndarray]] = None  # (idf version, ‖j·idf‖)
+        self._kw_hashes: Dict[str, List[Tuple[int, ...]]] = {}
+
+    # ── persistence ───────────────────────────────────────────
+
+    def _load(self) -> None:
+        entries: Dict[str, _Entry] = {}
+        sig = file_signature(self.path)
+        if sig is not None:
+            with np.load(self.path, allow_pickle=False) as z:
+                ids = z["ids"].tolist()
+                indptr, indices, data = z["indptr"], z["indices"], z["data"]
+                records = json.loads(str(z["records"]))
+            for i, job_id in enumerate(ids):
+                lo, hi = indptr[i], indptr[i + 1]
+                rec = records[i]
+                entries[job_id] = _Entry(
+                    indices[lo:hi].copy(), data[lo:hi].copy(), rec["keywords"], rec["meta"],
+                )
+        self._entries = entries
+        self._signature = sig
+        self._matrix = None
+
+    def _save(self) -> None:
+        ids = sorted(self._entries)
+        rows = [self._entries[i] for i in ids]
+        indptr, indices, data = _stack(rows)
+        records = json.dumps([{"keywords": e.keywords, "meta": e.meta} for e in rows])
+        with atomic_write(self.path) as fh:
+            np.savez(
+                fh, ids=np.array(ids, dtype=np.str_), indptr=indptr,
+                indices=indices, data=data, records=np.array(records),
+            )
+        self._signature = file_signature(self.path)
+        self._matrix = None
+
+    def _refresh(self) -> None:
+        """Pick up changes written by other workers."""
+        if file_signature(self.path) != self._signature:
+            self._load()
+
+    # ── mutation ──────────────────────────────────────────────
+
+    def upsert(self, jobs: List[Dict[str, Any]]) -> List[str]:
+        """Add or replace JDs given as {job_id, text, title?, company?}."""
+        built = {
+            job["job_id"]: _entry_from_text(job["text"], {
+                "title": job.get("title"),
+                "company": job.get("company"),
+                "indexed_at": time.time(),
+            })
+            for job in jobs
+        }
+        with self._lock, locked(self.path):
+            self._load()
+            self._entries.update(built)
+            self._save()
+        return list(built)
+
+    def delete(self, job_ids: List[str]) -> List[str]:
+        with self._lock, locked(self.path):
+            self._load()
+            removed = [j for j in job_ids if self._entries.pop(j, None) is not None]
+            if removed:
+                self._save()
+        return removed
+
+    # ── query ─────────────────────────────────────────────────
+
+    def _build(self) -> None:
+        self._ids = sorted(self._entries)
+        rows = [self._entries[i] for i in self._ids]
+        indptr, indices, data = _stack(rows)
+        csr = sp.csr_matrix((data, indices, indptr), shape=(len(rows), N_FEATURES))
+        self._matrix = csr.tocsc()
+        self._j_norm = None
+        self._kw_hashes = {
+            job_id: [tuple(hash_term(w) for w in kw.split()) for kw in e.keywords]
+            for job_id, e in zip(self._ids, rows)
+        }
+
+    def query(
+        self,
+        resume_idx: np.ndarray,
+        resume_tf: np.ndarray,
+        top_k: int = 10,
+        min_score: float = 0.0,
+    ) -> List[Dict[str, Any]]:
+        """Top-k JDs for one resume (pre-hashed term counts), best first."""
+        version, idf = get_corpus().idf()
+        with self._lock:
+            self._refresh()
+            if self._matrix is None:
+                self._build()
+            if self._j_norm is None or self._j_norm[0] != version:
+                self._j_norm = (version, np.sqrt(self._matrix.power(2) @ (idf * idf)))
+            matrix, j_norm, ids = self._matrix, self._j_norm[1], self._ids
+            entries, kw_hashes = self._entries, self._kw_hashes
+
+        if not ids or not len(resume_idx):
+            return []
+
+        cols = np.asarray(resume_idx, dtype=np.int64)
+        r_w = np.asarray(resume_tf, dtype=np.float64) * idf[cols]
+        r_norm = np.linalg.norm(r_w)
+        if not r_norm:
+            return []
+        dot = matrix[:, cols] @ (r_w * idf[cols])  # n_jobs × resume terms, one pass
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(dot > 0, dot / (r_norm * j_norm), 0.0)
+
+        resume_buckets = set(np.asarray(resume_idx).tolist())
+        results = []
+        for row in rank_candidates(scores, top_k).tolist():
+            score = round(float(scores[row]), 4)
+            if score <= min_score:
+                break
+            job_id = ids[row]
+            entry = entries[job_id]
+            matched, gaps = [], []
+            for kw, hashes in zip(entry.keywords, kw_hashes[job_id]):
+                (matched if all(h in resume_buckets for h in hashes) else gaps).append(kw)
+            results.append({
+                "job_id": job_id,
+                "title": entry.meta.get("title"),
+                "company": entry.meta.get("company"),
+                "similarity_score": score,
+                "matched_keywords": matched[:20],
+                "skill_gaps": gaps[:15],
+            })
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            n_terms = sum(len(e.idx) for e in self._entries.values())
+            return {"jobs": len(self._entries), "postings": n_terms, "path": self.path}
+
+
+_INDEX: Optional[JDIndex] = None
+
+
+def get_index() -> JDIndex:
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = JDIndex()
+    return _INDEX
@@ -0,0 +1,95 @@
+"""
+Multi-pattern keyword scanner with word-boundary semantics.
+
+A keyword set is compiled once into a token trie (cached per set), then
+each text is tokenised once and walked against the trie, so a scan costs
+O(tokens × longest keyword) no matter how many keywords there are.
+"Go" no longer matches "Google" and "R" only matches a standalone "R".
+"""
+
+import functools
+from typing import Any, Dict, List, Sequence, Tuple
+
+from lookup import TOKEN_RE, tokenize
+
+_END = ""  # trie terminal marker (never a token)
+
+
+class KeywordScanner:
+    """Compiled automaton for one keyword set."""
+
+    def __init__(self, keywords: Tuple[str, ...]):
+        self.keywords = keywords
+        self._trie: Dict[str, Any] = {}
+        for i, kw in enumerate(keywords):
+            tokens = tokenize(kw)
+            if not tokens:
+                continue  # punctuation-only keyword can never match
+            node = self._trie
+            for t in tokens:
+                node = node.setdefault(t, {})
+            node.setdefault(_END, []).append(i)
+
+    def find(self, text: str) -> Dict[int, List[Tuple[int, int]]]:
+        """Keyword index → [(start, end)] character spans in `text` (overlaps included)."""
+        tokens: List[str] = []
+        starts: List[int] = []
+        ends: List[int] = []
+        for m in TOKEN_RE.finditer(text):
+            tokens.append(m.group().lower())
+            starts.append(m.start())
+            ends.append(m.end())
+
+        hits: Dict[int, List[Tuple[int, int]]] = {}
+        root = self._trie
+        n = len(tokens)
+        for i in range(n):
+            node = root.get(tokens[i])
+            j = i
+            while node is not None:
+                for k in node.get(_END, ()):
+                    hits.setdefault(k, []).append((starts[i], ends[j]))
+                j += 1
+                if j >= n:
+                    break
+                node = node.get(tokens[j])
+        return hits
+
+    def scan(self, text: str) -> Dict[str, Any]:
+        """Coverage stats + match positions, in the /keyword-scan response shape."""
+        hits = self.find(text)
+        matched, missing = [], []
+        positions: Dict[str, List[List[int]]] = {}
+        for i, kw in enumerate(self.keywords):
+            spans = hits.get(i)
+            if spans:
+                matched.append(kw)
+                positions.setdefault(kw, [list(s) for s in spans])
+            else:
+                missing.append(kw)
+
+        coverage = round(len(matched) / max(len(self.keywords), 1) * 100, 2)
+        return {
+            "total": len(self.keywords),
+            "matched_count": len(matched),
+            "missing_count": len(missing),
+            "coverage_pct": coverage,
+            "matched": matched,
+            "missing": missing,
+            "positions": positions,
+        }
+
+
+@functools.lru_cache(maxsize=64)
+def _compiled(keywords: Tuple[str, ...]) -> KeywordScanner:
+    return KeywordScanner(keywords)
+
+
+def get_scanner(keywords: Sequence[str]) -> KeywordScanner:
+    """Scanner for a keyword set; compiled once and cached."""
+    return _compiled(tuple(keywords))
+
+
+def scanner_cache_info() -> Dict[str, int]:
+    info = _compiled.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
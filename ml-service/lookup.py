@@ -0,0 +1,58 @@
+"""
+Precomputed term → bank-key index (exact, alias and token-prefix matches).
+Used by the interview question and learning resource banks instead of a
+substring scan over every key.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Word tokens that keep tech punctuation: "c++", "c#", "node.js", "next.js"
+TOKEN_RE = re.compile(r"(?:[^\W_]|[+#])+(?:\.(?:[^\W_]|[+#])+)*")
+
+
+def tokenize(term: str) -> List[str]:
+    return TOKEN_RE.findall(term.lower())
+
+
+def normalize(term: str) -> str:
+    """Canonical form used as index key: lower-case tokens joined by one space."""
+    return " ".join(tokenize(term))
+
+
+class TermIndex:
+    """
+    Resolve free-form terms ("Python 3", "ReactJS", "Senior Backend Engineer")
+    to a bank key in O(tokens) dictionary lookups.
+
+    Resolution order:
+      1. exact   — normalized term is a key or alias
+      2. prefix  — longest leading run of tokens that is a key or alias
+                   ("docker compose" → docker, "python 3.11" → python)
+      3. n-gram  — with anchored=False, any contiguous run of tokens
+                   ("senior data scientist" → data scientist)
+    """
+
+    def __init__(self, keys: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        self._index: Dict[str, str] = {}
+        for key in keys:
+            self._index.setdefault(normalize(key), key)
+        for alias, key in (aliases or {}).items():
+            self._index.setdefault(normalize(alias), key)
+        self._max_tokens = max((len(k.split()) for k in self._index), default=0)
+
+    def resolve(self, term: str, anchored: bool = True) -> Optional[str]:
+        tokens = tokenize(term)
+        if not tokens:
+            return None
+
+        key = self._index.get(" ".join(tokens))
+        if key is not None:
+            return key
+
+        for start in range(1 if anchored else len(tokens)):
+            for n in range(min(len(tokens) - start, self._max_tokens), 0, -1):
+                key = self._index.get(" ".join(tokens[start:start + n]))
+                if key is not None:
+                    return key
+        return None
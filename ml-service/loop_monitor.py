@@ -0,0 +1,187 @@
+"""
+Event-loop lag monitor.
+
+Much of main.py still runs CPU-bound code on the event loop (scoring in
+the match pipelines, index updates, JSON encoding). While it runs, every
+other request on the worker waits: /health included. This module makes
+those stalls visible:
+
+    heartbeat   an asyncio task that sleeps INTERVAL and records how late
+                it woke up (scheduling delay), continuously
+    watchdog    a thread that notices when the heartbeat is overdue by
+                more than STALL_MS, and grabs the loop thread's stack
+                (sys._current_frames) while it is still blocked
+
+Each stall is attributed to:
+
+    request   "METHOD /path" of the task that was running (set by the
+              HTTP middleware; background tasks keep their request's label)
+    entry     outermost ml-service frame: the handler / pipeline
+    site      innermost ml-service frame: the blocking call site
+
+GET /health/loop returns lag percentiles, stall counts and the top
+blocking sites by total blocked time. State is per worker process.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+ENABLED = os.getenv("ML_LOOP_MONITOR", "true").lower() == "true"
+INTERVAL = float(os.getenv("ML_LOOP_INTERVAL_MS", "50")) / 1000
+STALL_MS = float(os.getenv("ML_LOOP_STALL_MS", "100"))
+
+_SAMPLES = 4096     # recent lag samples kept for percentiles
+_RECENT = 20        # recent stalls kept with their stack
+_STACK_DEPTH = 30   # innermost frames kept per stall
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _frame_label(frame) -> str:
+    path = frame.f_code.co_filename
+    if path.startswith(_SRC_DIR):
+        path = os.path.relpath(path, _SRC_DIR)
+    else:
+        path = "/".join(path.split(os.sep)[-2:])   # e.g. starlette/routing.py
+    return f"{path}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = INTERVAL, stall_ms: float = STALL_MS) -> None:
+        self.interval = interval
+        self.stall_ms = stall_ms
+        self._lags = deque(maxlen=_SAMPLES)
+        self._beat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._labels: "weakref.WeakKeyDictionary[asyncio.Task, str]" = weakref.WeakKeyDictionary()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._sites: Dict[str, Dict[str, Any]] = {}
+        self._recent = deque(maxlen=_RECENT)
+        self._stalls = 0
+        self._blocked_ms = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # ── lifecycle ─────────────────────────────────────────────
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.create_task(self._heartbeat())
+        threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def label(self, text: str) -> None:
+        """Attribute the current task (and its background tasks) to `text`."""
+        task = asyncio.current_task()
+        if task is not None:
+            self._labels[task] = text
+
+    # ── measurement ───────────────────────────────────────────
+
+    async def _heartbeat(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag_ms = max(0.0, (now - start - self.interval) * 1000)
+            with self._lock:
+                self._beat = now
+                self._lags.append(lag_ms)
+                pending, self._pending = self._pending, None
+                if pending is not None:
+                    self._record(pending, lag_ms)
+
+    def _watchdog(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            with self._lock:
+                overdue_ms = (time.monotonic() - self._beat - self.interval) * 1000
+                if overdue_ms < self.stall_ms or self._pending is not None:
+                    continue
+                self._pending = self._capture()
+
+    def _capture(self) -> Dict[str, Any]:
+        """Stack of the (blocked) loop thread and the task it is running."""
+        frame = sys._current_frames().get(self._loop_thread)
+        stack: List[str] = []
+        ours: List[str] = []
+        while frame is not None:
+            label = _frame_label(frame)
+            stack.append(label)
+            if frame.f_code.co_filename.startswith(_SRC_DIR) and frame.f_code.co_filename != __file__:
+                ours.append(label)
+            frame = frame.f_back
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        return {
+            "request": self._labels.get(task) if task is not None else None,
+            "entry": ours[-1] if ours else None,
+            "site": ours[0] if ours else (stack[0] if stack else None),
+            "stack": stack[:_STACK_DEPTH][::-1],
+        }
+
+    def _record(self, stall: Dict[str, Any], blocked_ms: float) -> None:
+        self._stalls += 1
+        self._blocked_ms += blocked_ms
+        site = self._sites.setdefault(stall["site"] or "?", {
+            "site": stall["site"], "entry": stall["entry"], "stalls": 0,
+            "total_ms": 0.0, "max_ms": 0.0, "requests": {},
+        })
+        site["stalls"] += 1
+        site["total_ms"] += blocked_ms
+        site["max_ms"] = max(site["max_ms"], blocked_ms)
+        request = stall["request"] or "(no request)"
+        site["requests"][request] = site["requests"].get(request, 0) + 1
+        self._recent.append({**stall, "blocked_ms": round(blocked_ms, 1), "at": time.time()})
+
+    # ── reporting ─────────────────────────────────────────────
+
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            lags = np.fromiter(self._lags, dtype=np.float64, count=len(self._lags))
+            sites = sorted(self._sites.values(), key=lambda s: s["total_ms"], reverse=True)[:top]
+            return {
+                "enabled": self._task is not None,
+                "interval_ms": self.interval * 1000,
+                "stall_ms": self.stall_ms,
+                "samples": len(lags),
+                "lag_ms": {
+                    f"p{q}": round(float(np.percentile(lags, q)), 2) if len(lags) else 0.0
+                    for q in (50, 90, 99)
+                } | {"max": round(float(lags.max()), 2) if len(lags) else 0.0},
+                "stalls": self._stalls,
+                "blocked_ms": round(self._blocked_ms, 1),
+                "top_sites": [
+                    {**s, "total_ms": round(s["total_ms"], 1), "max_ms": round(s["max_ms"], 1)}
+                    for s in sites
+                ],
+                "recent": list(self._recent)[::-1],
+            }
+
+
+class RequestLabels:
+    """ASGI middleware: label each HTTP request's task for stall attribution."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            MONITOR.label(f"{scope['method']} {scope['path']}")
+        await self.app(scope, receive, send)
+
+
+MONITOR = LoopMonitor()
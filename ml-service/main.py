@@ -5,27 +5,53 @@ Full pipeline: NLP analysis + JD matching + hiring probability + role prediction
 
 import os
 import io
+import json
+import random
+import asyncio
 import httpx
+import numpy as np
 from dotenv import load_dotenv
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List, Any, Dict
+from fastapi.responses import Response
+from pydantic import BaseModel, ValidationError
+from typing import Optional, List, Any, Dict, Tuple
 
 load_dotenv()
 
 from extractor import extract_text
-from sections import detect_sections, get_detected_section_names
-from skills import extract_skills
-from grammar import check_grammar
-from ats import compute_ats_score
-from quality import compute_quality_score, classify_strength, build_insights
-from matcher import match_resume_to_jd
-from hiring_probability import compute_hiring_probability
-from role_predictor import predict_role
-from anomaly import detect_anomalies
-from interview import generate_interview_questions
-from recommendations import get_learning_recommendations
+from pipeline import (
+    analyze_text, seed_from_prior, validate_fields, FIELDS, TIERS, DEFAULT_TIER, STAGE_COSTS,
+)
+from matcher import match_resume_to_jd, match_terms_to_jd, hashed_term_counts, jd_keyword_list
+from vectorizer import get_corpus
+from hiring_probability import compute_hiring_probability_batch, rank_candidates
+from role_predictor import predict_role, role_from_scores
+from anomaly import detect_anomalies, anomalies_from_features, rule_stats
+from fingerprint import unpack_terms, is_current, role_scores_from
+from interview import generate_interview_questions, question_cache_info
+from recommendations import get_learning_recommendations, get_learning_recommendations_batch
+from memory import worker_memory
+from keyword_scan import get_scanner, scanner_cache_info
+from jd_index import get_index
+import match_state
+import dedup
+import ann
+import skill_index
+import streaming
+import cluster
+from singleflight import FLIGHTS
+import loop_monitor
+import procpool
+import batch_scoring
+import feature_store
+import rescore
+import skill_gaps
+import payloads
+from sections import detect_sections
+from skills import extract_skills_fast
+from grammar import quick_grammar_check
 
 app = FastAPI(
     title="AI Resume Analyzer — ML Service",
@@ -40,10 +66,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(loop_monitor.RequestLabels)
 
 BACKEND_URL = os.getenv("BACKEND_INTERNAL_URL", "http://backend:4000")
 S3_BUCKET   = os.getenv("AWS_S3_BUCKET", "")
 AWS_REGION  = os.getenv("AWS_REGION", "us-east-1")
+DEDUP_REUSE = os.getenv("ML_DEDUP_REUSE", "false").lower() == "true"
+ANN_ENABLED = os.getenv("ML_ANN_ENABLED", "false").lower() == "true"
+STREAM_BATCH = 256  # NDJSON /match: resumes parsed + scored per batch
 USE_LOCAL   = os.getenv("USE_LOCAL_STORAGE", "true").lower() == "true" or not S3_BUCKET
 
 
@@ -57,6 +87,12 @@ class AnalyzeRequest(BaseModel):
     file_type: Optional[str] = "pdf"
     text: Optional[str] = None
     callback_url: Optional[str] = None
+    tier: Optional[str] = DEFAULT_TIER       # fast | standard | full
+    budget_ms: Optional[float] = None        # latency budget; stages degrade to fit
+    fields: Optional[List[str]] = None       # sync only: subset of result fields to compute
+    reuse_duplicates: Optional[bool] = None  # update a near-duplicate's analysis (default ML_DEDUP_REUSE)
+    pool: Optional[str] = None               # owning recruiter: ANN / skill pool and dedup scope
+    compact: bool = False                    # sync only: compact response (see payloads.py)
 
 
 class ResumeForMatch(BaseModel):
@@ -66,6 +102,7 @@ class ResumeForMatch(BaseModel):
     ats_score: float = 0.0
     quality_score: float = 0.0
     text: Optional[str] = ""
+    fingerprint: Optional[Dict[str, Any]] = None  # raw_result.fingerprint — preferred over text
 
 
 class MatchRequest(BaseModel):
@@ -73,6 +110,111 @@ class MatchRequest(BaseModel):
     jd_text: str
     resumes: List[ResumeForMatch]
     callback_url: Optional[str] = None
+    incremental: bool = False  # score only new / changed resumes, report rank deltas
+    retrieval: Optional[str] = None  # "ann": retrieve from the ANN index instead of `resumes`
+    pool: Optional[str] = None       # ANN pool to search (required with retrieval="ann")
+    top_k: int = 50                  # ANN: results returned
+    rerank: int = 200                # ANN: candidates re-scored exactly
+    must_have: Optional[List[str]] = None     # only resumes with every one of these skills are scored
+    nice_to_have: Optional[List[str]] = None  # matches reported per result (nice_to_have_matched)
+
+
+class ResumeForAnn(BaseModel):
+    resume_id: str
+    fingerprint: Dict[str, Any]
+    pool: Optional[str] = None
+    ats_score: float = 0.0
+    quality_score: float = 0.0
+
+
+class AnnInsertRequest(BaseModel):
+    resumes: List[ResumeForAnn]
+
+
+class ResumeSkills(BaseModel):
+    resume_id: str
+    skills: List[str]
+    pool: Optional[str] = None
+
+
+class SkillIndexRequest(BaseModel):
+    resumes: List[ResumeSkills]
+
+
+class SkillFilterRequest(BaseModel):
+    must_have: List[str] = []
+    nice_to_have: List[str] = []
+    pool: Optional[str] = None
+
+
+class DedupCheckRequest(BaseModel):
+    text: str
+    threshold: Optional[float] = None
+    pool: Optional[str] = None
+
+
+class DedupClustersRequest(BaseModel):
+    resume_ids: List[str]
+    threshold: Optional[float] = None
+
+
+class JobForIndex(BaseModel):
+    job_id: str
+    text: str
+    title: Optional[str] = None
+    company: Optional[str] = None
+
+
+class JobIndexRequest(BaseModel):
+    jobs: List[JobForIndex]
+
+
+class MatchJobsRequest(BaseModel):
+    resume_id: Optional[str] = None
+    text: Optional[str] = ""
+    fingerprint: Optional[Dict[str, Any]] = None  # preferred over text
+    top_k: int = 10
+    min_score: float = 0.0
+
+
+class ClusterNodeRequest(BaseModel):
+    node: str
+
+
+class ClusterMembersRequest(BaseModel):
+    members: Dict[str, Dict[str, Any]]
+
+
+class ClusterHandoffRequest(BaseModel):
+    match_state: Dict[str, Dict[str, Any]]
+
+
+class HiringProbabilityBatchRequest(BaseModel):
+    similarity_scores: List[float]
+    ats_scores: List[float]
+    quality_scores: List[float]
+    skills_matched_counts: List[int]
+    total_jd_keywords: List[int]
+    ids: Optional[List[str]] = None
+    top_k: Optional[int] = None
+
+
+class ScoreBatchRequest(BaseModel):
+    texts: List[str]
+    ids: Optional[List[str]] = None
+    skills: Optional[List[List[str]]] = None
+    grammar_issues: Optional[List[List[Dict[str, Any]]]] = None
+    ats_weights: Optional[Dict[str, float]] = None
+    quality_weights: Optional[Dict[str, float]] = None
+
+
+class RescoreRequest(BaseModel):
+    ats_weights: Optional[Dict[str, float]] = None
+    quality_weights: Optional[Dict[str, float]] = None
+    strength_thresholds: Optional[Dict[str, float]] = None
+    hiring_weights: Optional[Dict[str, float]] = None
+    top: int = 20
+    scores: bool = False
 
 
 # ──────────────────────────────────────────────────────────────
@@ -97,55 +239,176 @@ async def _fetch_file_bytes(s3_key: str) -> bytes:
 # Resume analysis pipeline (background)
 # ──────────────────────────────────────────────────────────────
 
+def _find_duplicate(
+    resume_id: str,
+    raw_text: str,
+    signature: np.ndarray,
+    reuse: bool,
+    pool: Optional[str],
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Look up the closest near-duplicate within the uploader's pool; with
+    `reuse`, build a stage seed from its snapshot so only the changed lines
+    are re-checked. Returns (duplicate info or None, seed or None).
+    """
+    try:
+        found = dedup.get_index().query(signature, exclude=resume_id, pool=pool)
+        if not found:
+            return None, None
+        dup_id, sim = found[0]
+        duplicate = {"of": dup_id, "similarity": round(sim, 4), "reused": False}
+        prior = dedup.load_snapshot(dup_id) if reuse else None
+        if not prior:
+            return duplicate, None
+        duplicate["reused"] = True
+        return duplicate, seed_from_prior(raw_text, prior["text"], prior["result"])
+    except Exception as exc:
+        print(f"[dedup] lookup failed for {resume_id}: {exc}")
+        return None, None
+
+
+def _index_for_dedup(
+    resume_id: str,
+    raw_text: str,
+    signature: np.ndarray,
+    result: Dict[str, Any],
+    reused: bool,
+    pool: Optional[str],
+) -> None:
+    try:
+        dedup.get_index().add(resume_id, signature, pool)
+        # Only full-fidelity analyses become reuse sources
+        if not reused and not result["degraded"]:
+            dedup.save_snapshot(resume_id, raw_text, result)
+    except Exception as exc:
+        print(f"[dedup] indexing failed for {resume_id}: {exc}")
+
+
+def _index_skills(resume_id: str, pool: Optional[str], fingerprint: Dict[str, Any]) -> None:
+    try:
+        skill_index.get_index().add([{"resume_id": resume_id, "skills": fingerprint["skills"], "pool": pool}])
+    except Exception as exc:
+        print(f"[skills] indexing failed for {resume_id}: {exc}")
+
+
+def _index_features(resume_id: str, fingerprint: Dict[str, Any]) -> None:
+    try:
+        feature_store.get_store().add([(resume_id, fingerprint["features"])])
+    except Exception as exc:
+        print(f"[features] storing failed for {resume_id}: {exc}")
+
+
+def _index_for_ann(
+    resume_id: str,
+    pool: Optional[str],
+    fingerprint: Dict[str, Any],
+    result: Dict[str, Any],
+) -> None:
+    try:
+        ann.get_index().insert([{
+            "resume_id": resume_id,
+            "pool": pool,
+            "fingerprint": fingerprint,
+            "ats_score": result.get("ats_score"),
+            "quality_score": result.get("quality_score"),
+        }])
+    except Exception as exc:
+        print(f"[ann] indexing failed for {resume_id}: {exc}")
+
+
+async def _analyze_content(
+    raw_text: str,
+    tier: str,
+    budget_ms: Optional[float],
+    seed: Optional[Dict[str, Any]],
+) -> Tuple[Dict[str, Any], Dict[str, str], Dict[str, Any]]:
+    """
+    analyze_text off the event loop (in the process pool when enabled);
+    concurrent calls for the same text (and tier / budget) share one run.
+    Seeded runs are cheap and not shared.
+    """
+    def run():
+        if procpool.ENABLED:
+            return procpool.analyze(raw_text, tier, budget_ms, seed)
+        return asyncio.to_thread(analyze_text, raw_text, tier, budget_ms, seed=seed)
+
+    if seed is not None:
+        return await run()
+    key = f"content:{tier}|{budget_ms}|{match_state.content_hash(raw_text)}"
+    (result, sections, fingerprint), _shared = await FLIGHTS.run(key, run)
+    return dict(result), sections, fingerprint
+
+
+async def _analyze_resume(
+    resume_id: str,
+    s3_key: Optional[str],
+    file_type: str,
+    text_override: Optional[str],
+    tier: str,
+    budget_ms: Optional[float],
+    reuse_duplicates: bool,
+    pool: Optional[str],
+) -> Dict[str, Any]:
+    """Fetch, analyse and index one resume; returns the callback payload."""
+    if text_override:
+        raw_text = text_override
+    elif s3_key:
+        file_bytes = await _fetch_file_bytes(s3_key)
+        if procpool.ENABLED:
+            raw_text = await procpool.extract(file_bytes, file_type)
+        else:
+            raw_text = extract_text(file_bytes, file_type)
+    else:
+        raise ValueError("No text or s3_key provided")
+
+    if not raw_text.strip():
+        raise ValueError("Extracted text is empty — file may be image-based")
+
+    signature = dedup.signature(raw_text)
+    duplicate, seed = _find_duplicate(resume_id, raw_text, signature, reuse_duplicates, pool)
+
+    result, sections, fingerprint = await _analyze_content(raw_text, tier, budget_ms, seed)
+    result["raw_result"] = {
+        "text_length": len(raw_text),
+        "sections": {k: bool(v) for k, v in sections.items()},
+        "text": raw_text[:5000],  # kept for keyword scans / legacy matching
+        "fingerprint": fingerprint,
+        "duplicate": duplicate,
+    }
+    _index_for_dedup(resume_id, raw_text, signature, result, reused=seed is not None, pool=pool)
+    if duplicate is None:
+        # Near-duplicates would double-count their terms in the corpus DF
+        get_corpus().observe(unpack_terms(fingerprint)[0])
+    _index_skills(resume_id, pool, fingerprint)
+    _index_features(resume_id, fingerprint)
+    if ANN_ENABLED:
+        _index_for_ann(resume_id, pool, fingerprint, result)
+    return result
+
+
 async def run_analysis_pipeline(
     resume_id: str,
     s3_key: Optional[str],
     file_type: str,
     text_override: Optional[str],
     callback_url: str,
+    tier: str = DEFAULT_TIER,
+    budget_ms: Optional[float] = None,
+    reuse_duplicates: bool = DEDUP_REUSE,
+    pool: Optional[str] = None,
 ) -> None:
     try:
-        if text_override:
-            raw_text = text_override
-        elif s3_key:
-            file_bytes = await _fetch_file_bytes(s3_key)
-            raw_text = extract_text(file_bytes, file_type)
-        else:
-            raise ValueError("No text or s3_key provided")
-
-        if not raw_text.strip():
-            raise ValueError("Extracted text is empty — file may be image-based")
-
-        sections        = detect_sections(raw_text)
-        skills          = extract_skills(raw_text)
-        grammar_issues  = check_grammar(raw_text)
-        ats_score       = compute_ats_score(raw_text, sections)
-        quality_score   = compute_quality_score(raw_text, sections, grammar_issues, skills, ats_score)
-        strength        = classify_strength(quality_score)
-        insights        = build_insights(ats_score, quality_score, sections, grammar_issues, skills)
-        role_info       = predict_role(skills, raw_text)
-        anomalies       = detect_anomalies(raw_text, sections, len(raw_text.split()))
-
-        result = {
-            "ats_score": ats_score,
-            "quality_score": quality_score,
-            "strength": strength,
-            "extracted_skills": skills,
-            "grammar_issues": grammar_issues,
-            "sections_detected": get_detected_section_names(sections),
-            "word_count": len(raw_text.split()),
-            "insights": insights,
-            "role_prediction": role_info,
-            "anomalies": anomalies,
-            "raw_result": {
-                "text_length": len(raw_text),
-                "sections": {k: bool(v) for k, v in sections.items()},
-                "text": raw_text[:5000],  # store first 5k chars for JD matching
-            },
-        }
+        # Repeat uploads / retries of the same resume join the run in flight;
+        # each caller still gets its own callback.
+        source = s3_key or match_state.content_hash(text_override or "")
+        key = f"resume:{resume_id}|{tier}|{budget_ms}|{reuse_duplicates}|{pool}|{source}"
+        result, _shared = await FLIGHTS.run(key, lambda: _analyze_resume(
+            resume_id, s3_key, file_type, text_override, tier, budget_ms, reuse_duplicates, pool,
+        ))
 
+        body, headers = payloads.encode(result)
         async with httpx.AsyncClient(timeout=10) as client:
-            await client.post(callback_url, json=result)
+            await client.post(callback_url, content=body, headers=headers)
 
     except Exception as exc:
         print(f"[analysis] Error for {resume_id}: {exc}")
@@ -160,54 +423,321 @@ async def run_analysis_pipeline(
 # JD match pipeline (background)
 # ──────────────────────────────────────────────────────────────
 
-async def run_match_pipeline(
-    job_id: str,
+def _attach_probability(
+    results: List[Dict[str, Any]],
+    factors: List[Tuple[float, float, int, int]],
+) -> None:
+    """Attach hiring probability + explanation to each result (one vectorised pass)."""
+    if not results:
+        return
+    ats, quality, matched, total = zip(*factors)
+    batch = compute_hiring_probability_batch(
+        [r["similarity_score"] for r in results], ats, quality, matched, total,
+    )
+    probability = batch["probability"].tolist()
+    explanation = {k: v.tolist() for k, v in batch["explanation"].items()}
+    for i, r in enumerate(results):
+        r["hiring_probability"] = probability[i]
+        r["explanation"] = {k: v[i] for k, v in explanation.items()}
+
+
+def _score_resume(
+    resume: ResumeForMatch,
     jd_text: str,
+) -> Tuple[Dict[str, Any], Tuple[float, float, int, int]]:
+    """Match one resume against the JD; returns (result, hiring-probability factors)."""
+    fingerprint = resume.fingerprint if is_current(resume.fingerprint) else None
+    if fingerprint:
+        # Score straight from the stored term counts — no re-tokenisation
+        idx, tf = unpack_terms(fingerprint)
+        match_result = match_terms_to_jd(idx, tf, jd_text)
+        role_info = role_from_scores(role_scores_from(fingerprint))
+        anomalies = anomalies_from_features(fingerprint["features"]["anomaly"])
+    else:
+        resume_text = resume.text or " ".join(resume.skills)
+        match_result = match_resume_to_jd(resume_text, jd_text)
+        role_info = predict_role(resume.skills, resume_text)
+        sections_dummy = {}  # already analyzed; no text needed for anomaly
+        anomalies = detect_anomalies(resume_text, sections_dummy, len(resume_text.split()))
+
+    factors = (
+        resume.ats_score,
+        resume.quality_score,
+        len(match_result["matched_keywords"]),
+        len(match_result["jd_keywords"]),
+    )
+    return {
+        "resume_id":         resume.id,
+        "resume_name":       resume.name,
+        "similarity_score":  match_result["similarity_score"],
+        "matched_keywords":  match_result["matched_keywords"],
+        "skill_gaps":        match_result["skill_gaps"],
+        "role_prediction":   role_info,
+        "anomalies":         anomalies,
+    }, factors
+
+
+def _score_batch(
     resumes: List[ResumeForMatch],
-    callback_url: str,
+    jd_text: str,
+    nice: Optional[Dict[str, int]] = None,
+) -> Tuple[List[Dict[str, Any]], List[Tuple[float, float, int, int]]]:
+    """
+    Score resumes against the JD, with hiring probability (one vectorised
+    pass). Returns (results, hiring-probability factors).
+    """
+    results, factors = [], []
+    for resume in resumes:
+        result, f = _score_resume(resume, jd_text)
+        if nice is not None:
+            result["nice_to_have_matched"] = nice[resume.id]
+        results.append(result)
+        factors.append(f)
+    _attach_probability(results, factors)
+    return results, factors
+
+
+def _store_match_features(job_id: str, rows: List[feature_store.MatchFeatures]) -> None:
+    try:
+        feature_store.get_store().put_job(job_id, rows)
+    except Exception as exc:
+        print(f"[features] storing match features failed for job {job_id}: {exc}")
+
+
+def _update_skill_gaps(
+    job_id: str,
+    keywords: List[str],
+    fresh: Dict[str, np.ndarray],
+    removed: List[str] = (),
+    replace: bool = False,
 ) -> None:
     try:
-        results = []
-        for resume in resumes:
-            resume_text = resume.text or " ".join(resume.skills)
-
-            match_result = match_resume_to_jd(resume_text, jd_text)
-
-            prob_result  = compute_hiring_probability(
-                similarity_score    = match_result["similarity_score"],
-                ats_score           = resume.ats_score,
-                quality_score       = resume.quality_score,
-                skills_matched_count= len(match_result["matched_keywords"]),
-                total_jd_keywords   = len(match_result["jd_keywords"]),
-            )
+        skill_gaps.get_store().update(job_id, keywords, fresh, removed, replace)
+    except Exception as exc:
+        print(f"[skill-gaps] update failed for job {job_id}: {exc}")
+
+
+def _filter_by_skills(
+    resumes: List[ResumeForMatch],
+    must_have: Optional[List[str]],
+    nice_to_have: Optional[List[str]],
+) -> Tuple[List[ResumeForMatch], Dict[str, int]]:
+    """
+    Resumes holding every must-have skill (one vectorised AND over their
+    skill bitsets), with nice-to-have match counts by resume id.
+    """
+    vocab = skill_index.SkillVocab()
+    bits = vocab.encode(
+        r.fingerprint["skills"] if is_current(r.fingerprint) else r.skills for r in resumes
+    )
+    must, nice = skill_index.requirement_masks(vocab, must_have, nice_to_have)
+    survivors, nice_counts = skill_index.apply_requirements(bits, must, nice)
+    rows = np.flatnonzero(survivors).tolist()
+    return [resumes[i] for i in rows], {resumes[i].id: int(nice_counts[i]) for i in rows}
+
+
+def _match_resumes(
+    job_id: str,
+    jd_text: str,
+    resumes: List[ResumeForMatch],
+    incremental: bool,
+    must_have: Optional[List[str]] = None,
+    nice_to_have: Optional[List[str]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Score resumes against the JD and rank them. In incremental mode only
+    resumes that are new or changed since the job's last run are scored.
+    With must_have / nice_to_have, resumes missing a must-have skill are
+    dropped before any scoring. Returns (payload, new match state); the
+    caller saves the state only once the payload has been delivered.
+    """
+    filtered_out = 0
+    nice: Dict[str, int] = {}
+    if must_have or nice_to_have:
+        kept, nice = _filter_by_skills(resumes, must_have, nice_to_have)
+        filtered_out, resumes = len(resumes) - len(kept), kept
+
+    # Scores depend on the IDF snapshot (and requirements) too; a change means a full re-score
+    jd_hash = match_state.content_hash([
+        jd_text, get_corpus().version(), sorted(must_have or []), sorted(nice_to_have or []),
+    ])
+    keyed = [(r.id, match_state.content_hash(r.model_dump(exclude={"id"}))) for r in resumes]
+    state = match_state.STORE.get(job_id) if incremental else None
+
+    todo = match_state.diff(state, jd_hash, keyed)
+    by_id = {r.id: r for r in resumes}
+    to_score = list(by_id.values()) if todo is None else [by_id[rid] for rid in todo]
 
-            role_info = predict_role(resume.skills, resume_text)
+    results, factors = _score_batch(to_score, jd_text, nice if nice_to_have else None)
+
+    new_state, payload = match_state.merge(
+        state, jd_hash, keyed, {r["resume_id"]: r for r in results},
+        {r["resume_id"]: f for r, f in zip(results, factors)},
+    )
+    keywords = jd_keyword_list(jd_text)
+    _update_skill_gaps(
+        job_id, keywords, skill_gaps.masks(keywords, results), payload["removed"],
+        replace=payload["mode"] == "full",
+    )
+    entries = new_state["entries"]
+    if all("factors" in e for e in entries.values()):  # not for state handed off without them
+        _store_match_features(job_id, [
+            (rid, e["result"]["similarity_score"], *e["factors"]) for rid, e in entries.items()
+        ])
+    payload["scored"] = len(results)
+    payload["filtered_out"] = filtered_out
+    return payload, new_state
 
-            sections_dummy = {}  # already analyzed; no text needed for anomaly
-            anomalies = detect_anomalies(resume_text, sections_dummy, len(resume_text.split()))
 
-            results.append({
-                "resume_id":         resume.id,
-                "resume_name":       resume.name,
-                "similarity_score":  match_result["similarity_score"],
-                "hiring_probability": prob_result["probability"],
-                "matched_keywords":  match_result["matched_keywords"],
-                "skill_gaps":        match_result["skill_gaps"],
-                "explanation":       prob_result["explanation"],
-                "role_prediction":   role_info,
-                "anomalies":         anomalies,
-            })
+def _match_ann(
+    jd_text: str,
+    pool: Optional[str],
+    top_k: int,
+    rerank: int,
+    must_have: Optional[List[str]] = None,
+    nice_to_have: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Retrieve-then-rerank over the ANN index: the `rerank` nearest resumes
+    by projected cosine are scored exactly and the best `top_k` returned.
+    With must_have / nice_to_have, retrieval is restricted to the skill
+    index's survivors.
+    """
+    only, nice = None, {}
+    if must_have or nice_to_have:
+        ids, counts = skill_index.get_index().filter(must_have, nice_to_have, pool)
+        only, nice = ids, dict(zip(ids, counts))
 
-        # Sort by hiring probability
-        results.sort(key=lambda x: x["hiring_probability"], reverse=True)
-        for i, r in enumerate(results):
-            r["rank"] = i + 1
+    index = ann.get_index()
+    rows, scanned = index.retrieve(jd_text, pool, max(rerank, top_k), only=only)
+    results, factors = ann.rerank(index.records(rows), jd_text)
+    if nice_to_have:
+        for r in results:
+            r["nice_to_have_matched"] = nice[r["resume_id"]]
+    _attach_probability(results, factors)
 
+    order = rank_candidates([r["hiring_probability"] for r in results], top_k).tolist()
+    matches = [{**results[i], "rank": pos + 1} for pos, i in enumerate(order)]
+    return {
+        "mode": "full",
+        "retrieval": "ann",
+        "matches": matches,
+        "rank_changes": [],
+        "removed": [],
+        "total": len(matches),
+        "candidates": scanned,
+        "scored": len(results),
+    }
+
+
+def _match_stream(header: MatchRequest, lines) -> Tuple[streaming.RankedSpill, Dict[str, Any]]:
+    """
+    Score an NDJSON resume stream STREAM_BATCH resumes at a time, spilling
+    results to disk; memory stays bounded by the batch, not the pool size
+    (bar a few numbers and bits per resume for the feature / skill-gap stores).
+    Streamed runs are always full runs: no per-resume match state is kept
+    (the job's previous state is dropped).
+    """
+    spill = streaming.RankedSpill()
+    filtered_out = invalid = 0
+    requirements = header.must_have or header.nice_to_have
+    match_features: List[feature_store.MatchFeatures] = []
+    coverage: Dict[str, np.ndarray] = {}
+    keywords = jd_keyword_list(header.jd_text)
+
+    def flush(batch: List[ResumeForMatch]) -> None:
+        nonlocal filtered_out
+        nice = None
+        if requirements:
+            kept, nice = _filter_by_skills(batch, header.must_have, header.nice_to_have)
+            filtered_out += len(batch) - len(kept)
+            batch = kept
+        results, factors = _score_batch(batch, header.jd_text, nice if header.nice_to_have else None)
+        for result, f in zip(results, factors):
+            spill.append(result, result["hiring_probability"])
+            match_features.append((result["resume_id"], result["similarity_score"], *f))
+        coverage.update(skill_gaps.masks(keywords, results))
+
+    batch: List[ResumeForMatch] = []
+    for record in streaming.records(lines):
+        try:
+            batch.append(ResumeForMatch.model_validate(record or {}))
+        except ValidationError:
+            invalid += 1
+            continue
+        if len(batch) == STREAM_BATCH:
+            flush(batch)
+            batch = []
+    flush(batch)
+
+    match_state.STORE.drop(header.job_id)
+    _store_match_features(header.job_id, match_features)
+    _update_skill_gaps(header.job_id, keywords, coverage, replace=True)
+    return spill, {
+        "mode": "full",
+        "rank_changes": [],
+        "removed": [],
+        "total": len(spill),
+        "scored": len(spill),
+        "filtered_out": filtered_out,
+        "invalid": invalid,
+        "streamed": True,
+    }
+
+
+async def run_match_stream(header: MatchRequest, lines, callback_url: str) -> None:
+    try:
+        spill, summary = _match_stream(header, lines)
+        try:
+            body, headers = payloads.encode_stream(streaming.json_payload(spill, summary))
+            async with httpx.AsyncClient(timeout=60) as client:
+                resp = await client.post(callback_url, content=body, headers=headers)
+                resp.raise_for_status()
+        finally:
+            spill.close()
+
+    except Exception as exc:
+        print(f"[match] Error for streamed job {header.job_id}: {exc}")
+        try:
+            async with httpx.AsyncClient(timeout=5) as client:
+                await client.post(callback_url, json={"error": str(exc)})
+        except Exception:
+            pass
+    finally:
+        lines.close()
+
+
+async def run_match_pipeline(
+    job_id: str,
+    jd_text: str,
+    resumes: List[ResumeForMatch],
+    callback_url: str,
+    incremental: bool = False,
+    retrieval: Optional[str] = None,
+    pool: Optional[str] = None,
+    top_k: int = 50,
+    rerank: int = 200,
+    must_have: Optional[List[str]] = None,
+    nice_to_have: Optional[List[str]] = None,
+) -> None:
+    try:
+        state = None
+        if retrieval == "ann":
+            payload = _match_ann(jd_text, pool, top_k, rerank, must_have, nice_to_have)
+        else:
+            payload, state = _match_resumes(job_id, jd_text, resumes, incremental, must_have, nice_to_have)
+
+        body, headers = payloads.encode(payload)
         async with httpx.AsyncClient(timeout=15) as client:
-            await client.post(callback_url, json={"matches": results})
+            resp = await client.post(callback_url, content=body, headers=headers)
+            resp.raise_for_status()
+        # Only a delivered run may become the base of the next incremental one
+        if state is not None:
+            match_state.STORE.put(job_id, state)
 
     except Exception as exc:
         print(f"[match] Error for job {job_id}: {exc}")
+        match_state.STORE.drop(job_id)  # next run is a full run
         try:
             async with httpx.AsyncClient(timeout=5) as client:
                 await client.post(callback_url, json={"error": str(exc)})
@@ -224,57 +754,657 @@ async def health():
     return {"status": "ok", "service": "ml-service", "version": "3.0.0"}
 
 
+@app.on_event("shutdown")
+async def flush_corpus_stats():
+    get_corpus().flush()
+
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    # Per worker: started after the prefork fork, on the worker's own loop
+    if loop_monitor.ENABLED:
+        loop_monitor.MONITOR.start()
+
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    loop_monitor.MONITOR.stop()
+
+
+@app.on_event("shutdown")
+async def stop_process_pool():
+    procpool.shutdown()
+
+
+# ──────────────────────────────────────────────────────────────
+# Cluster mode (consistent-hash routing, see cluster.py)
+# ──────────────────────────────────────────────────────────────
+
+_CLUSTER_LEAVING = False
+_cluster_task: Optional[asyncio.Task] = None
+
+
+def _cluster_owner(request: Request, key: str) -> Optional[str]:
+    """Owner node to forward to, or None to serve here."""
+    if request.headers.get(cluster.FORWARDED_HEADER):
+        return None
+    return cluster.owner_of(key)
+
+
+async def _forward(
+    owner: str,
+    path: str,
+    content: Any,
+    headers: Dict[str, str],
+    params: Any = None,
+    method: str = "POST",
+) -> Optional[Response]:
+    """Relay a request to its owner node; None (serve locally) if the owner is unreachable."""
+    try:
+        async with httpx.AsyncClient(timeout=30) as client:
+            resp = await client.request(
+                method, f"{owner}{path}", content=content, params=params,
+                headers={**headers, cluster.FORWARDED_HEADER: cluster.SELF},
+            )
+    except httpx.HTTPError as exc:
+        print(f"[cluster] forward to {owner} failed, serving locally: {exc}")
+        return None
+    return Response(
+        resp.content, status_code=resp.status_code,
+        media_type=resp.headers.get("content-type"), headers={"X-Cluster-Node": owner},
+    )
+
+
+async def _hand_off(ring: Optional[cluster.HashRing] = None) -> Dict[str, int]:
+    """Send the match state of jobs this worker no longer owns to their owners."""
+    plan = cluster.handoff_plan(match_state.STORE.items(), ring or cluster.get_membership().ring())
+    sent: Dict[str, int] = {}
+    async with httpx.AsyncClient(timeout=15) as client:
+        for owner, jobs in plan.items():
+            try:
+                resp = await client.post(
+                    f"{owner}/cluster/handoff", json={"match_state": jobs},
+                    headers={cluster.FORWARDED_HEADER: cluster.SELF},
+                )
+                resp.raise_for_status()
+            except httpx.HTTPError as exc:
+                print(f"[cluster] handoff of {len(jobs)} job(s) to {owner} failed: {exc}")
+                continue
+            for job_id in jobs:
+                match_state.STORE.drop(job_id)
+            sent[owner] = len(jobs)
+    return sent
+
+
+async def _broadcast_members() -> None:
+    view = cluster.get_membership().members()
+    peers = [node for node in cluster.live_nodes(view) if node != cluster.SELF]
+    async with httpx.AsyncClient(timeout=5) as client:
+        await asyncio.gather(
+            *(client.post(f"{peer}/cluster/members", json={"members": view}) for peer in peers),
+            return_exceptions=True,
+        )
+
+
+async def _membership_changed() -> None:
+    await _broadcast_members()
+    await _hand_off()
+
+
+async def _cluster_heartbeat() -> None:
+    """Join, then periodically exchange views with the seeds and one random peer."""
+    membership = cluster.get_membership()
+    while True:
+        changed = membership.join(cluster.SELF)
+        peers = [n for n in cluster.live_nodes(membership.members()) if n != cluster.SELF]
+        targets = set(cluster.SEEDS) | ({random.choice(peers)} if peers else set())
+        targets.discard(cluster.SELF)
+        async with httpx.AsyncClient(timeout=5) as client:
+            for target in targets:
+                try:
+                    resp = await client.post(f"{target}/cluster/members", json={"members": membership.members()})
+                    resp.raise_for_status()
+                    changed |= membership.merge(resp.json()["members"], refute=not _CLUSTER_LEAVING)
+                except (httpx.HTTPError, ValueError, KeyError) as exc:
+                    print(f"[cluster] sync with {target} failed: {exc}")
+        if changed:
+            await _membership_changed()
+        await asyncio.sleep(cluster.HEARTBEAT_SECS)
+
+
+@app.on_event("startup")
+async def join_cluster():
+    global _cluster_task
+    if cluster.ENABLED:
+        _cluster_task = asyncio.create_task(_cluster_heartbeat())
+
+
+@app.on_event("shutdown")
+async def leave_cluster():
+    """Graceful leave: hand every job's match state to its new owner, then announce."""
+    global _CLUSTER_LEAVING
+    if not cluster.ENABLED:
+        return
+    _CLUSTER_LEAVING = True
+    if _cluster_task is not None:
+        _cluster_task.cancel()
+    membership = cluster.get_membership()
+    membership.leave(cluster.SELF)
+    await _hand_off(membership.ring())
+    await _broadcast_members()
+
+
+@app.get("/cluster/members")
+async def cluster_members():
+    return cluster.get_membership().snapshot()
+
+
+@app.post("/cluster/members")
+async def cluster_sync_members(req: ClusterMembersRequest):
+    """Anti-entropy: merge a peer's membership view and return the merged one."""
+    if cluster.get_membership().merge(req.members, refute=cluster.ENABLED and not _CLUSTER_LEAVING):
+        await _membership_changed()
+    return cluster.get_membership().snapshot()
+
+
+@app.post("/cluster/join")
+async def cluster_join(req: ClusterNodeRequest):
+    if cluster.get_membership().join(req.node.rstrip("/")):
+        await _membership_changed()
+    return cluster.get_membership().snapshot()
+
+
+@app.post("/cluster/leave")
+async def cluster_leave(req: ClusterNodeRequest):
+    if cluster.get_membership().leave(req.node.rstrip("/")):
+        await _membership_changed()
+    return cluster.get_membership().snapshot()
+
+
+@app.post("/cluster/handoff")
+async def cluster_handoff(req: ClusterHandoffRequest):
+    """Receive match state for jobs this node now owns."""
+    for job_id, state in req.match_state.items():
+        match_state.STORE.put(job_id, state)
+    return {"received": len(req.match_state)}
+
+
+@app.get("/cluster/owner")
+async def cluster_owner(key: str):
+    """Which node owns a resume_id / job_id."""
+    owner = cluster.get_membership().ring().owner(key) if cluster.ENABLED else None
+    return {"key": key, "owner": owner or cluster.SELF or None, "local": owner in (None, cluster.SELF)}
+
+
+@app.get("/corpus")
+async def corpus_stats():
+    """Document-frequency statistics behind the matcher's IDF weights."""
+    return get_corpus().stats()
+
+
+@app.post("/corpus/documents")
+async def corpus_add_documents(body: Dict[str, Any]):
+    """
+    POST { fingerprints?: list[fingerprint], texts?: list[str] }
+    Backfill document frequencies from already analysed resumes.
+    """
+    corpus = get_corpus()
+    added = 0
+    for fp in body.get("fingerprints", []):
+        if is_current(fp):
+            corpus.observe(unpack_terms(fp)[0])
+            added += 1
+    for text in body.get("texts", []):
+        if text:
+            corpus.observe(hashed_term_counts(text)[0])
+            added += 1
+    corpus.flush()
+    return {"added": added, **corpus.stats()}
+
+
+@app.get("/health/memory")
+async def health_memory():
+    """Resident / shared / private memory per worker (prefork CoW check)."""
+    return worker_memory()
+
+
+@app.get("/health/loop")
+async def health_loop(top: int = Query(10, ge=1, le=100)):
+    """Event-loop lag percentiles and the call sites that blocked it longest (this worker)."""
+    return loop_monitor.MONITOR.stats(top)
+
+
+def _validate_tier(req: AnalyzeRequest) -> str:
+    tier = req.tier or DEFAULT_TIER
+    if tier not in TIERS:
+        raise HTTPException(400, f"tier must be one of: {', '.join(TIERS)}")
+    if req.budget_ms is not None and req.budget_ms <= 0:
+        raise HTTPException(400, "budget_ms must be positive")
+    return tier
+
+
 @app.post("/analyze")
-async def analyze_resume(req: AnalyzeRequest, background_tasks: BackgroundTasks):
+async def analyze_resume(req: AnalyzeRequest, background_tasks: BackgroundTasks, request: Request):
+    tier = _validate_tier(req)
+    owner = _cluster_owner(request, req.resume_id)
+    if owner:
+        forwarded = await _forward(owner, "/analyze", await request.body(), {"content-type": "application/json"})
+        if forwarded is not None:
+            return forwarded
     callback_url = req.callback_url or f"{BACKEND_URL}/api/resumes/{req.resume_id}/analysis"
     background_tasks.add_task(
         run_analysis_pipeline,
         req.resume_id, req.s3_key, req.file_type or "pdf", req.text, callback_url,
+        tier, req.budget_ms,
+        DEDUP_REUSE if req.reuse_duplicates is None else req.reuse_duplicates,
+        req.pool,
     )
     return {"resume_id": req.resume_id, "status": "processing"}
 
 
 @app.post("/analyze/sync")
-async def analyze_sync(req: AnalyzeRequest):
+async def analyze_sync(
+    req: AnalyzeRequest,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated result fields"),
+):
+    """
+    Synchronous analysis. `tier` (fast | standard | full) and `budget_ms`
+    trade fidelity for latency; `degraded` lists stages that were approximated.
+    `fields` (query string or body) restricts the result to the given fields
+    and runs only the stages they need, e.g. ?fields=role_prediction,ats_score.
+    """
+    tier = _validate_tier(req)
     if not req.text:
         raise HTTPException(400, "text is required for sync mode")
-    raw_text = req.text
-    sections       = detect_sections(raw_text)
-    skills         = extract_skills(raw_text)
-    grammar_issues = check_grammar(raw_text)
-    ats_score      = compute_ats_score(raw_text, sections)
-    quality_score  = compute_quality_score(raw_text, sections, grammar_issues, skills, ats_score)
-    strength       = classify_strength(quality_score)
-    insights       = build_insights(ats_score, quality_score, sections, grammar_issues, skills)
-    role_info      = predict_role(skills, raw_text)
-    anomalies      = detect_anomalies(raw_text, sections, len(raw_text.split()))
+    owner = _cluster_owner(request, req.resume_id)
+    if owner:
+        forwarded = await _forward(
+            owner, "/analyze/sync", await request.body(), {"content-type": "application/json"},
+            params=request.query_params,
+        )
+        if forwarded is not None:
+            return forwarded
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else req.fields
+    if selected is not None:
+        unknown = validate_fields(selected)
+        if unknown:
+            raise HTTPException(400, f"Unknown field(s): {', '.join(unknown)}")
+    key = f"sync:{tier}|{req.budget_ms}|{'*' if selected is None else ','.join(sorted(selected))}|{match_state.content_hash(req.text)}"
+    (result, _sections, _fingerprint), _shared = await FLIGHTS.run(key, lambda: asyncio.to_thread(
+        analyze_text, req.text, tier, req.budget_ms, with_fingerprint=False, fields=selected,
+    ))
+    if req.compact:
+        compact = payloads.compact_analysis({"resume_id": req.resume_id, **result})
+        return Response(payloads.dumps(compact), media_type="application/json")
+    return {"resume_id": req.resume_id, **result}
+
+
+@app.get("/analyze/coalescing")
+async def analysis_coalescing():
+    """Single-flight counters: executions vs. calls that joined one already in flight."""
+    return FLIGHTS.stats()
+
+
+@app.get("/analyze/tiers")
+async def analysis_tiers():
+    """Available tiers, selectable fields and the per-stage cost estimates used for budgeting."""
     return {
-        "resume_id": req.resume_id,
-        "ats_score": ats_score, "quality_score": quality_score,
-        "strength": strength, "extracted_skills": skills,
-        "grammar_issues": grammar_issues,
-        "sections_detected": get_detected_section_names(sections),
-        "word_count": len(raw_text.split()),
-        "insights": insights,
-        "role_prediction": role_info,
-        "anomalies": anomalies,
+        "tiers": list(TIERS),
+        "default": DEFAULT_TIER,
+        "fields": list(FIELDS),
+        "stage_costs": STAGE_COSTS.snapshot(),
+    }
+
+
+@app.get("/analyze/anomaly-rules")
+async def analysis_anomaly_rules():
+    """Anomaly engine signals / rules with their calls, hits and accumulated cost (this worker)."""
+    return rule_stats()
+
+
+def _content_encoding(request: Request) -> str:
+    encoding = request.headers.get("content-encoding", "identity").strip().lower() or "identity"
+    if encoding not in streaming.supported_encodings():
+        raise HTTPException(415, f"Content-Encoding must be one of: {', '.join(streaming.supported_encodings())}")
+    return encoding
+
+
+async def _match_ndjson(request: Request, background_tasks: BackgroundTasks):
+    """NDJSON /match: spool the body, validate the header line, score the rest in the background."""
+    encoding = _content_encoding(request)
+    raw = await streaming.spool(request.stream())
+    lines = streaming.decoded(raw, encoding)
+    try:
+        first = json.loads(lines.readline())
+        if not isinstance(first, dict):
+            raise ValueError("expected a JSON object")
+        header = MatchRequest.model_validate({**first, "resumes": []})
+    except ValidationError as exc:
+        lines.close()
+        raise RequestValidationError(exc.errors())
+    except (ValueError,) + streaming.DECODE_ERRORS as exc:
+        lines.close()
+        raise HTTPException(400, f"Invalid NDJSON header line: {exc}")
+    if header.retrieval is not None:
+        lines.close()
+        raise HTTPException(400, "retrieval is not supported for NDJSON bodies")
+    owner = _cluster_owner(request, header.job_id)
+    if owner:
+        # Relay the body exactly as received (still compressed).
+        raw.seek(0)
+        forwarded = await _forward(owner, "/match", streaming.chunks(raw), {
+            "content-type": request.headers["content-type"],
+            "content-encoding": request.headers.get("content-encoding", "identity"),
+        })
+        if forwarded is not None:
+            lines.close()
+            raw.close()
+            return forwarded
+        raw.seek(0)
+        lines = streaming.decoded(raw, encoding)
+        lines.readline()
+
+    callback_url = header.callback_url or f"{BACKEND_URL}/api/jobs/{header.job_id}/match-result"
+    background_tasks.add_task(run_match_stream, header, lines, callback_url)
+    return {
+        "job_id": header.job_id,
+        "status": "processing",
+        "streamed": True,
+        "content_encoding": encoding,
+        "must_have": header.must_have or [],
+        "message": "Matching pipeline started",
     }
 
 
 @app.post("/match")
-async def match_jd(req: MatchRequest, background_tasks: BackgroundTasks):
+async def match_jd(request: Request, background_tasks: BackgroundTasks):
+    """
+    Body: MatchRequest as JSON, or NDJSON (Content-Type application/x-ndjson)
+    with the match header on the first line and one resume per line,
+    parsed and scored incrementally (see streaming.py). Either may be
+    gzip / zstd compressed (Content-Encoding).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in streaming.NDJSON_TYPES:
+        return await _match_ndjson(request, background_tasks)
+
+    encoding = _content_encoding(request)
+    try:
+        if encoding == "identity":
+            req = MatchRequest.model_validate_json(await request.body())
+        else:
+            with streaming.decoded(await streaming.spool(request.stream()), encoding) as body:
+                req = MatchRequest.model_validate_json(body.read())
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
+    except streaming.DECODE_ERRORS as exc:
+        raise HTTPException(400, f"Could not decode {encoding} body: {exc}")
+
+    if req.retrieval not in (None, "ann"):
+        raise HTTPException(400, "retrieval must be 'ann' or omitted")
+    if req.retrieval == "ann" and (req.top_k <= 0 or req.rerank <= 0):
+        raise HTTPException(400, "top_k and rerank must be positive")
+    if req.retrieval == "ann" and not req.pool:
+        # Without a pool the search would span every user's resumes
+        raise HTTPException(400, "retrieval 'ann' requires a pool")
+    owner = _cluster_owner(request, req.job_id)
+    if owner:
+        forwarded = await _forward(owner, "/match", req.model_dump_json(), {"content-type": "application/json"})
+        if forwarded is not None:
+            return forwarded
     callback_url = req.callback_url or f"{BACKEND_URL}/api/jobs/{req.job_id}/match-result"
     background_tasks.add_task(
-        run_match_pipeline, req.job_id, req.jd_text, req.resumes, callback_url,
+        run_match_pipeline, req.job_id, req.jd_text, req.resumes, callback_url, req.incremental,
+        req.retrieval, req.pool, req.top_k, req.rerank, req.must_have, req.nice_to_have,
     )
     return {
         "job_id": req.job_id,
         "status": "processing",
         "resume_count": len(req.resumes),
+        "incremental": req.incremental,
+        "retrieval": req.retrieval or "exhaustive",
+        "must_have": req.must_have or [],
         "message": "Matching pipeline started",
     }
 
 
+@app.get("/match/state")
+async def match_state_stats():
+    """Per-job match state kept for incremental re-ranking."""
+    return match_state.STORE.stats()
+
+
+@app.delete("/match/state/{job_id}")
+async def drop_match_state(job_id: str):
+    return {"job_id": job_id, "dropped": match_state.STORE.drop(job_id)}
+
+
+@app.post("/dedup/check")
+async def dedup_check(req: DedupCheckRequest):
+    """Resumes of `pool` that are near-duplicates of `text` (estimated Jaccard)."""
+    threshold = dedup.DUPLICATE_THRESHOLD if req.threshold is None else req.threshold
+    found = dedup.get_index().query(dedup.signature(req.text), threshold, pool=req.pool)
+    return {"duplicates": [{"resume_id": rid, "similarity": round(s, 4)} for rid, s in found]}
+
+
+@app.post("/dedup/clusters")
+async def dedup_clusters(req: DedupClustersRequest):
+    """Near-duplicate clusters within a candidate pool (e.g. a job's applicants)."""
+    threshold = dedup.DUPLICATE_THRESHOLD if req.threshold is None else req.threshold
+    return dedup.get_index().clusters(req.resume_ids, threshold)
+
+
+@app.delete("/dedup/{resume_id}")
+async def dedup_forget(resume_id: str):
+    return {"resume_id": resume_id, "removed": dedup.get_index().remove(resume_id)}
+
+
+@app.get("/dedup")
+async def dedup_stats():
+    return dedup.get_index().stats()
+
+
+@app.post("/ann/resumes")
+async def ann_insert(req: AnnInsertRequest):
+    """
+    Add or replace resumes in the ANN index (backfill from stored fingerprints).
+    Their skill sets go into the skill index too, so must-have filtering over
+    ANN retrieval does not silently drop resumes analysed before it existed.
+    """
+    items = [r.model_dump() for r in req.resumes if is_current(r.fingerprint)]
+    inserted = ann.get_index().insert(items)
+    skill_index.get_index().add([
+        {"resume_id": i["resume_id"], "skills": i["fingerprint"]["skills"], "pool": i["pool"]} for i in items
+    ])
+    return {"inserted": inserted, "skipped": len(req.resumes) - len(items), **ann.get_index().stats()}
+
+
+@app.delete("/ann/resumes/{resume_id}")
+async def ann_delete(resume_id: str):
+    return {"resume_id": resume_id, "removed": ann.get_index().delete(resume_id)}
+
+
+@app.get("/ann")
+async def ann_stats():
+    return ann.get_index().stats()
+
+
+@app.delete("/resumes/{resume_id}")
+async def forget_resume(resume_id: str):
+    """Drop a deleted resume from every resume-level index (dedup, ANN, skills, features)."""
+    return {
+        "resume_id": resume_id,
+        "dedup": dedup.get_index().remove(resume_id),
+        "ann": ann.get_index().delete(resume_id),
+        "skills": skill_index.get_index().remove(resume_id),
+        "features": feature_store.get_store().remove(resume_id),
+    }
+
+
+@app.post("/skills/resumes")
+async def skills_index_resumes(req: SkillIndexRequest):
+    """Add or replace resumes' skill sets in the must-have filter index (backfill)."""
+    added = skill_index.get_index().add([r.model_dump() for r in req.resumes])
+    return {"indexed": added, **skill_index.get_index().stats()}
+
+
+@app.post("/skills/filter")
+async def skills_filter(req: SkillFilterRequest):
+    """Indexed resumes holding every must-have skill, with nice-to-have match counts."""
+    ids, nice = skill_index.get_index().filter(req.must_have, req.nice_to_have, req.pool)
+    return {"count": len(ids), "resume_ids": ids, "nice_to_have_matched": nice}
+
+
+@app.get("/skills/index")
+async def skills_index_stats():
+    return skill_index.get_index().stats()
+
+
+@app.post("/jobs/index")
+async def index_jobs(req: JobIndexRequest):
+    """Add or replace JDs in the persistent JD index used by /match/jobs."""
+    indexed = get_index().upsert([job.model_dump() for job in req.jobs])
+    return {"indexed": indexed, **get_index().stats()}
+
+
+@app.delete("/jobs/index/{job_id}")
+async def unindex_job(job_id: str):
+    removed = get_index().delete([job_id])
+    return {"removed": removed, **get_index().stats()}
+
+
+@app.get("/jobs/index")
+async def job_index_stats():
+    return get_index().stats()
+
+
+@app.get("/jobs/{job_id}/skill-gaps")
+async def job_skill_gaps(job_id: str, request: Request, top: int = Query(10, ge=0)):
+    """
+    Skill supply / gap aggregate over the job's current candidates (from
+    its /match runs): per-JD-keyword coverage counts, a histogram of gaps
+    per candidate, coverage percentiles and the scarcest keywords.
+    """
+    owner = _cluster_owner(request, job_id)
+    if owner:
+        forwarded = await _forward(
+            owner, f"/jobs/{job_id}/skill-gaps", None, {}, params=request.query_params, method="GET",
+        )
+        if forwarded is not None:
+            return forwarded
+    aggregate = skill_gaps.get_store().aggregate(job_id, top)
+    if aggregate is None:
+        raise HTTPException(404, "No match results for this job yet")
+    return aggregate
+
+
+@app.post("/match/jobs")
+async def match_jobs(req: MatchJobsRequest):
+    """
+    Top-k indexed JDs for one resume, with similarity, matched keywords and
+    gaps — scored in one sparse pass over the JD index.
+    """
+    if req.top_k <= 0:
+        raise HTTPException(400, "top_k must be positive")
+    if is_current(req.fingerprint):
+        resume_idx, resume_tf = unpack_terms(req.fingerprint)
+    elif req.text:
+        resume_idx, resume_tf = hashed_term_counts(req.text)
+    else:
+        raise HTTPException(400, "text or fingerprint is required")
+
+    matches = get_index().query(resume_idx, resume_tf, req.top_k, req.min_score)
+    return {"resume_id": req.resume_id, "count": len(matches), "matches": matches}
+
+
+@app.post("/hiring-probability/batch")
+async def hiring_probability_batch(req: HiringProbabilityBatchRequest):
+    """
+    Columnar batch scoring: element i of every input list is candidate i.
+    Returns probabilities and per-factor explanations as parallel arrays,
+    plus `order` (row indices, best first — top_k only if given) and `rank`
+    (1-based per row, null outside top_k).
+    """
+    n = len(req.similarity_scores)
+    columns = [req.ats_scores, req.quality_scores, req.skills_matched_counts, req.total_jd_keywords]
+    if any(len(c) != n for c in columns) or (req.ids is not None and len(req.ids) != n):
+        raise HTTPException(400, "all input arrays must have the same length")
+
+    batch = compute_hiring_probability_batch(
+        req.similarity_scores, req.ats_scores, req.quality_scores,
+        req.skills_matched_counts, req.total_jd_keywords,
+    )
+    order = rank_candidates(batch["probability"], req.top_k).tolist()
+    rank: List[Optional[int]] = [None] * n
+    for position, row in enumerate(order):
+        rank[row] = position + 1
+
+    return {
+        "count": n,
+        "ids": req.ids,
+        "probability": batch["probability"].tolist(),
+        "explanation": {k: v.tolist() for k, v in batch["explanation"].items()},
+        "order": order,
+        "rank": rank,
+    }
+
+
+def _score_texts(req: ScoreBatchRequest) -> Dict[str, Any]:
+    sections = [detect_sections(t) for t in req.texts]
+    skills = req.skills if req.skills is not None else [extract_skills_fast(t) for t in req.texts]
+    grammar = req.grammar_issues if req.grammar_issues is not None else [quick_grammar_check(t) for t in req.texts]
+    features = batch_scoring.extract_features(req.texts, sections, skills, grammar)
+    return batch_scoring.score_features(features, req.ats_weights, req.quality_weights)
+
+
+@app.post("/score/batch")
+async def score_batch(req: ScoreBatchRequest):
+    """
+    Columnar ATS / quality / strength / anomaly scoring: element i of every
+    input list is resume i, and the result arrays are parallel to them.
+    Missing `skills` / `grammar_issues` are computed with the fast-tier
+    approximations. Optional `ats_weights` / `quality_weights` override the
+    point allotment per component (see batch_scoring.ATS_WEIGHTS / QUALITY_WEIGHTS).
+    """
+    n = len(req.texts)
+    columns = [c for c in (req.ids, req.skills, req.grammar_issues) if c is not None]
+    if any(len(c) != n for c in columns):
+        raise HTTPException(400, "all input arrays must have the same length")
+    try:
+        scores = await asyncio.to_thread(_score_texts, req)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    return {
+        "count": n,
+        "ids": req.ids,
+        "ats_score": scores["ats_score"].tolist(),
+        "quality_score": scores["quality_score"].tolist(),
+        "strength": scores["strength"],
+        "anomalies": scores["anomalies"],
+    }
+
+
+@app.post("/rescore")
+async def rescore_corpus(req: RescoreRequest):
+    """
+    Re-score every stored resume and job ranking with a new weight
+    configuration, from persisted raw features (no re-analysis). Reports
+    strength-label transitions and per-job rank changes against the
+    current defaults; `scores` adds the full new scores. See rescore.py.
+    """
+    config = req.model_dump(exclude={"top", "scores"}, exclude_none=True)
+    try:
+        return await asyncio.to_thread(rescore.rescore, config, None, req.top, req.scores)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
+
+@app.get("/features")
+async def features_stats():
+    return feature_store.get_store().stats()
+
+
 @app.post("/predict-role")
 async def predict_role_endpoint(body: Dict[str, Any]):
     skills = body.get("skills", [])
@@ -286,30 +1416,36 @@ async def predict_role_endpoint(body: Dict[str, Any]):
 async def keyword_scan(body: Dict[str, Any]):
     """
     POST { text: str, keywords: list[str] }
-    Returns keyword coverage stats and color-coded match results.
+    Returns keyword coverage stats, color-coded match results and the
+    character spans of each match (word-boundary semantics).
     """
     text = body.get("text", "")
     keywords = body.get("keywords", [])
     if not text or not keywords:
         raise HTTPException(400, "text and keywords are required")
+    return get_scanner(keywords).scan(text)
 
-    text_lower = text.lower()
-    matched, missing = [], []
-    for kw in keywords:
-        if kw.lower() in text_lower:
-            matched.append(kw)
-        else:
-            missing.append(kw)
 
-    coverage = round(len(matched) / max(len(keywords), 1) * 100, 2)
-    return {
-        "total": len(keywords),
-        "matched_count": len(matched),
-        "missing_count": len(missing),
-        "coverage_pct": coverage,
-        "matched": matched,
-        "missing": missing,
-    }
+@app.post("/keyword-scan/batch")
+async def keyword_scan_batch(body: Dict[str, Any]):
+    """
+    POST { keywords: list[str], texts: list[str | { id, text }] }
+    Scans a whole candidate pool against one keyword set; the keyword
+    automaton is compiled once and reused (and cached across calls).
+    """
+    keywords = body.get("keywords", [])
+    texts = body.get("texts", [])
+    if not keywords or not texts:
+        raise HTTPException(400, "keywords and texts are required")
+
+    scanner = get_scanner(keywords)
+    results = []
+    for item in texts:
+        if isinstance(item, dict):
+            results.append({"id": item.get("id"), **scanner.scan(item.get("text") or "")})
+        else:
+            results.append(scanner.scan(item or ""))
+    return {"keywords": len(keywords), "results": results, "cache": scanner_cache_info()}
 
 
 @app.post("/interview-questions")
@@ -325,6 +1461,24 @@ async def interview_questions(body: Dict[str, Any]):
     return generate_interview_questions(skills, role)
 
 
+@app.post("/interview-questions/batch")
+async def interview_questions_batch(body: Dict[str, Any]):
+    """
+    POST { candidates: [{ id, skills: list[str], role?: str }] }
+    Generates question sets for a whole shortlist in one call.
+    Candidates with the same canonical skill set + role share one cached build.
+    """
+    candidates = body.get("candidates", [])
+    if not candidates:
+        raise HTTPException(400, "candidates list is required")
+
+    results = [
+        {"id": c.get("id"), **generate_interview_questions(c.get("skills", []), c.get("role", ""))}
+        for c in candidates
+    ]
+    return {"results": results, "cache": question_cache_info()}
+
+
 @app.post("/learning-recommendations")
 async def learning_recommendations(body: Dict[str, Any]):
     """
@@ -334,3 +1488,16 @@ async def learning_recommendations(body: Dict[str, Any]):
     skill_gaps = body.get("skill_gaps", [])
     role       = body.get("role", "")
     return get_learning_recommendations(skill_gaps, role)
+
+
+@app.post("/learning-recommendations/batch")
+async def learning_recommendations_batch(body: Dict[str, Any]):
+    """
+    POST { candidates: [{ id, skill_gaps: list[str] }], role?: str }
+    Job-level recommendations with a shared resource table; each distinct
+    gap across the candidate pool is resolved once.
+    """
+    candidates = body.get("candidates", [])
+    if not candidates:
+        raise HTTPException(400, "candidates list is required")
+    return get_learning_recommendations_batch(candidates, body.get("role", ""))
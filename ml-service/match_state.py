@@ -0,0 +1,149 @@
+"""
+Per-job match state for incremental re-ranking.
+
+After every /match run the service keeps, per job, the JD hash and each
+resume's content hash + scored result. An incremental run diffs the
+submitted resume list against that state, scores only new or changed
+resumes, re-ranks the merged set and reports just the deltas:
+
+    matches       full results for new / changed resumes (with rank)
+    rank_changes  [{resume_id, rank, previous_rank}] for unchanged resumes that moved
+    removed       resume ids present last time but absent now
+
+Ranking is over the whole merged set in request order, so it is identical
+to what a full run would produce.
+
+State is held in memory per worker (LRU over jobs, ML_MATCH_STATE_JOBS)
+and is plain JSON-serialisable data.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from hiring_probability import rank_candidates
+
+MAX_JOBS = int(os.getenv("ML_MATCH_STATE_JOBS", "64"))
+
+# job state: {"jd_hash": str, "entries": {resume_id: {"hash": str, "result": {...}, "factors"?: (...)}},
+#             "ranks": {resume_id: int}}
+JobState = Dict[str, Any]
+
+
+def content_hash(payload: Any) -> str:
+    """Stable hash of a JSON-serialisable payload."""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class MatchStateStore:
+    def __init__(self, max_jobs: int = MAX_JOBS) -> None:
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, JobState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Optional[JobState]:
+        with self._lock:
+            state = self._jobs.get(job_id)
+            if state is not None:
+                self._jobs.move_to_end(job_id)
+            return state
+
+    def put(self, job_id: str, state: JobState) -> None:
+        with self._lock:
+            self._jobs[job_id] = state
+            self._jobs.move_to_end(job_id)
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    def drop(self, job_id: str) -> bool:
+        with self._lock:
+            return self._jobs.pop(job_id, None) is not None
+
+    def items(self) -> List[Tuple[str, JobState]]:
+        """Snapshot of (job_id, state) pairs, least recently used first."""
+        with self._lock:
+            return list(self._jobs.items())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "jobs": len(self._jobs),
+                "max_jobs": self.max_jobs,
+                "resumes": sum(len(s["entries"]) for s in self._jobs.values()),
+            }
+
+
+STORE = MatchStateStore()
+
+
+def diff(
+    state: Optional[JobState],
+    jd_hash: str,
+    resumes: List[Tuple[str, str]],
+) -> Optional[List[str]]:
+    """
+    Resume ids that need scoring, given (resume_id, content_hash) pairs.
+    None means the state is unusable (missing or JD changed): score all.
+    """
+    if state is None or state["jd_hash"] != jd_hash:
+        return None
+    entries = state["entries"]
+    return [
+        rid for rid, h in resumes
+        if rid not in entries or entries[rid]["hash"] != h
+    ]
+
+
+def merge(
+    state: Optional[JobState],
+    jd_hash: str,
+    resumes: List[Tuple[str, str]],
+    fresh: Dict[str, Dict[str, Any]],
+    factors: Optional[Dict[str, Tuple[float, float, int, int]]] = None,
+) -> Tuple[JobState, Dict[str, Any]]:
+    """
+    Merge freshly scored results into the job state and re-rank.
+
+    `fresh` maps resume id → result (with hiring_probability, without rank);
+    `factors` optionally maps it to its hiring-probability factors, kept
+    alongside the result (see feature_store.py).
+    Returns (new state, delta payload). With no usable prior state every
+    result is reported under "matches".
+    """
+    prior = state if state is not None and state["jd_hash"] == jd_hash else None
+    old_entries = prior["entries"] if prior else {}
+    old_ranks = prior["ranks"] if prior else {}
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    for rid, h in resumes:
+        if rid in fresh:
+            entries[rid] = {"hash": h, "result": fresh[rid]}
+            if factors is not None:
+                entries[rid]["factors"] = factors[rid]
+        else:
+            entries[rid] = {**old_entries[rid], "hash": h}
+
+    ids = list(entries)
+    order = rank_candidates([entries[rid]["result"]["hiring_probability"] for rid in ids])
+    ranks = {ids[i]: pos + 1 for pos, i in enumerate(order.tolist())}
+
+    matches, rank_changes = [], []
+    for i in order.tolist():
+        rid = ids[i]
+        if rid in fresh or rid not in old_ranks:
+            matches.append({**entries[rid]["result"], "rank": ranks[rid]})
+        elif old_ranks[rid] != ranks[rid]:
+            rank_changes.append({"resume_id": rid, "rank": ranks[rid], "previous_rank": old_ranks[rid]})
+
+    delta = {
+        "mode": "incremental" if prior else "full",
+        "matches": matches,
+        "rank_changes": rank_changes,
+        "removed": [rid for rid in old_entries if rid not in entries],
+        "total": len(ids),
+    }
+    return {"jd_hash": jd_hash, "entries": entries, "ranks": ranks}, delta
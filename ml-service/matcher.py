@@ -1,37 +1,57 @@
 """
 TF-IDF cosine similarity matcher for resume ↔ JD matching.
+
+Both sides live in the hashed term space of vectorizer.py and are
+weighted with the corpus-level IDF snapshot, so nothing is fitted per
+request.
 """
 
-import re
+import functools
 from typing import List, Tuple, Dict, Any
 
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
+from vectorizer import hash_term, hashed_term_counts, hashed_terms_with_names, get_corpus
 
-def _preprocess(text: str) -> str:
-    """Lowercase and strip punctuation."""
-    text = text.lower()
-    text = re.sub(r"[^\w\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+JD_KEYWORDS = 30
+MATCHED_LIMIT = 20  # matched_keywords / skill_gaps are truncated to these lengths
+GAPS_LIMIT = 15
 
 
-def _extract_top_keywords(vectorizer: TfidfVectorizer, tfidf_row, top_n: int = 20) -> List[str]:
-    """Return top-N terms by TF-IDF weight from a single document row."""
-    feature_names = vectorizer.get_feature_names_out()
-    row = tfidf_row.toarray()[0]
-    top_indices = row.argsort()[-top_n:][::-1]
-    return [feature_names[i] for i in top_indices if row[i] > 0]
+def _empty_match() -> Dict[str, Any]:
+    return {"similarity_score": 0.0, "matched_keywords": [], "skill_gaps": [], "jd_keywords": []}
 
 
-def match_resume_to_jd(
-    resume_text: str,
+@functools.lru_cache(maxsize=32)
+def _jd_terms(jd_text: str) -> Tuple[np.ndarray, np.ndarray, Dict[int, str]]:
+    """JD side of hashed matching — cached so a job's JD is analysed once per match run."""
+    return hashed_terms_with_names(jd_text)
+
+
+def jd_keywords(idx: np.ndarray, weights: np.ndarray, names: Dict[int, str]) -> List[str]:
+    """Top JD terms by TF-IDF weight (ties alphabetical)."""
+    weighted = sorted((-weights[i], names[int(idx[i])]) for i in np.flatnonzero(weights))
+    return [term for _w, term in weighted[:JD_KEYWORDS]]
+
+
+@functools.lru_cache(maxsize=32)
+def _jd_vector(jd_text: str, idf_version: int) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """(bucket indices, L2-normalised TF-IDF weights, keywords) for a JD under one IDF snapshot."""
+    idx, tf, names = _jd_terms(jd_text)
+    _version, idf = get_corpus().idf()
+    w = tf * idf[idx]
+    norm = np.linalg.norm(w)
+    return idx, (w / norm if norm else w), jd_keywords(idx, w, names)
+
+
+def match_terms_to_jd(
+    resume_idx: np.ndarray,
+    resume_tf: np.ndarray,
     jd_text: str,
 ) -> Dict[str, Any]:
     """
-    Compute TF-IDF cosine similarity between a resume and a job description.
+    Match pre-hashed resume term counts (e.g. from a resume fingerprint)
+    against a JD, so the resume is never re-tokenised.
 
     Returns:
         similarity_score  : float 0.0–1.0
@@ -39,41 +59,59 @@ def match_resume_to_jd(
         skill_gaps        : List[str] — JD keywords absent from resume
         jd_keywords       : List[str] — all extracted JD keywords
     """
-    clean_resume = _preprocess(resume_text)
-    clean_jd = _preprocess(jd_text)
-
-    if not clean_resume or not clean_jd:
-        return {
-            "similarity_score": 0.0,
-            "matched_keywords": [],
-            "skill_gaps": [],
-            "jd_keywords": [],
-        }
-
-    vectorizer = TfidfVectorizer(
-        stop_words="english",
-        ngram_range=(1, 2),  # unigrams + bigrams
-        max_features=500,
-        min_df=1,
-    )
-
-    try:
-        tfidf_matrix = vectorizer.fit_transform([clean_resume, clean_jd])
-    except ValueError:
-        return {"similarity_score": 0.0, "matched_keywords": [], "skill_gaps": [], "jd_keywords": []}
-
-    score = float(cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0])
-
-    # JD keyword set
-    jd_keywords = _extract_top_keywords(vectorizer, tfidf_matrix[1:2], top_n=30)
-    resume_words = set(clean_resume.split())
-
-    matched = [kw for kw in jd_keywords if all(w in resume_words for w in kw.split())]
-    gaps = [kw for kw in jd_keywords if kw not in matched]
+    version, idf = get_corpus().idf()
+    jd_idx, jd_w, keywords = _jd_vector(jd_text, version)
+    if not len(resume_idx) or not len(jd_idx):
+        return _empty_match()
+
+    r_w = np.asarray(resume_tf, dtype=np.float64) * idf[resume_idx]
+    r_norm = np.linalg.norm(r_w)
+    if not r_norm:
+        return _empty_match()
+    _common, ri, ji = np.intersect1d(resume_idx, jd_idx, assume_unique=True, return_indices=True)
+    score = float(r_w[ri] @ jd_w[ji] / r_norm)
+
+    resume_buckets = set(resume_idx.tolist())
+    matched = [
+        kw for kw in keywords
+        if all(hash_term(w) in resume_buckets for w in kw.split())
+    ]
+    gaps = [kw for kw in keywords if kw not in matched]
 
     return {
-        "similarity_score": round(score, 4),
-        "matched_keywords": matched[:20],
-        "skill_gaps": gaps[:15],
-        "jd_keywords": jd_keywords,
+        "similarity_score": round(min(score, 1.0), 4),
+        "matched_keywords": matched[:MATCHED_LIMIT],
+        "skill_gaps": gaps[:GAPS_LIMIT],
+        "jd_keywords": keywords,
     }
+
+
+def jd_keyword_list(jd_text: str) -> List[str]:
+    """The JD keywords match_terms_to_jd() reports under the current IDF snapshot."""
+    version, _idf = get_corpus().idf()
+    return _jd_vector(jd_text, version)[2]
+
+
+def keyword_mask(keywords: List[str], matched: List[str], gaps: List[str]) -> np.ndarray:
+    """
+    Which JD keywords a match result covers, from its truncated matched /
+    gap lists: with JD_KEYWORDS <= MATCHED_LIMIT + GAPS_LIMIT, at least one
+    of the two is always complete.
+    """
+    if len(matched) < MATCHED_LIMIT:
+        covered = set(matched)
+        return np.fromiter((kw in covered for kw in keywords), dtype=bool, count=len(keywords))
+    missing = set(gaps)
+    return np.fromiter((kw not in missing for kw in keywords), dtype=bool, count=len(keywords))
+
+
+def match_resume_to_jd(
+    resume_text: str,
+    jd_text: str,
+) -> Dict[str, Any]:
+    """
+    Compute TF-IDF cosine similarity between a resume and a job description.
+    See match_terms_to_jd() for the result shape.
+    """
+    idx, tf = hashed_term_counts(resume_text)
+    return match_terms_to_jd(idx, tf, jd_text)
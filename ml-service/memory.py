@@ -0,0 +1,97 @@
+"""
+Per-process memory accounting (resident / shared / private) read from /proc.
+Used to verify the copy-on-write saving of the prefork server.
+"""
+
+import os
+import resource
+from typing import Any, Dict, List, Optional
+
+# Set by prefork.py in the parent before forking workers
+PREFORK_PARENT_ENV = "ML_PREFORK_PARENT"
+
+_PAGE_KB = resource.getpagesize() // 1024
+
+_SMAPS_FIELDS = {
+    "Rss": "rss_kb",
+    "Pss": "pss_kb",
+    "Shared_Clean": "shared_clean_kb",
+    "Shared_Dirty": "shared_dirty_kb",
+    "Private_Clean": "private_clean_kb",
+    "Private_Dirty": "private_dirty_kb",
+}
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Memory usage of a process in kB.
+
+    Returns:
+        pid, rss_kb, shared_kb, private_kb (+ pss_kb and the clean/dirty
+        split when /proc/<pid>/smaps_rollup is available).
+    """
+    pid = pid or os.getpid()
+    stats: Dict[str, Any] = {"pid": pid}
+
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in _SMAPS_FIELDS:
+                    stats[_SMAPS_FIELDS[key]] = int(rest.split()[0])
+        stats["shared_kb"] = stats.get("shared_clean_kb", 0) + stats.get("shared_dirty_kb", 0)
+        stats["private_kb"] = stats.get("private_clean_kb", 0) + stats.get("private_dirty_kb", 0)
+        return stats
+    except (OSError, ValueError, IndexError):
+        pass
+
+    # Older kernels: fall back to statm (pages)
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            _size, resident, shared = (int(x) for x in f.read().split()[:3])
+        stats["rss_kb"] = resident * _PAGE_KB
+        stats["shared_kb"] = shared * _PAGE_KB
+        stats["private_kb"] = (resident - shared) * _PAGE_KB
+    except (OSError, ValueError):
+        stats["error"] = "memory stats unavailable"
+    return stats
+
+
+def _worker_pids(parent_pid: int) -> List[int]:
+    """Children of the prefork parent running our interpreter (skips the LanguageTool JVM)."""
+    try:
+        with open(f"/proc/{parent_pid}/task/{parent_pid}/children") as f:
+            children = [int(p) for p in f.read().split()]
+        exe = os.readlink("/proc/self/exe")
+    except (OSError, ValueError):
+        return []
+
+    pids = []
+    for pid in children:
+        try:
+            if os.readlink(f"/proc/{pid}/exe") == exe:
+                pids.append(pid)
+        except OSError:
+            continue
+    return pids
+
+
+def worker_memory() -> Dict[str, Any]:
+    """
+    Memory for this process and, under prefork, the parent and every sibling worker.
+    """
+    parent = os.getenv(PREFORK_PARENT_ENV)
+    if not parent:
+        return {"mode": "single", "self": os.getpid(), "workers": [process_memory()]}
+
+    parent_pid = int(parent)
+    workers = [process_memory(pid) for pid in _worker_pids(parent_pid)] or [process_memory()]
+    return {
+        "mode": "prefork",
+        "self": os.getpid(),
+        "parent": process_memory(parent_pid),
+        "workers": workers,
+        "total_rss_kb": sum(w.get("rss_kb", 0) for w in workers),
+        "total_shared_kb": sum(w.get("shared_kb", 0) for w in workers),
+        "total_private_kb": sum(w.get("private_kb", 0) for w in workers),
+    }
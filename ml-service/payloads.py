@@ -0,0 +1,149 @@
+"""
+Encoding of analysis / match payloads: fast JSON, compact mode, compression.
+
+dumps() uses orjson when it is installed (several times faster than the
+stdlib encoder on these payloads, and it serialises numpy scalars / arrays
+natively) and falls back to json.dumps with compact separators.
+
+Compact mode (`compact: true` on /analyze/sync) drops grammar_issues[].context
+and replaces role names with integer ids into a table sent with the
+response:
+
+    role_prediction.role / alternatives are ids into "roles" and
+    role_prediction.scores is a list in "roles" order
+
+    "tables": {"roles": [...]}
+
+Roles are seeded in role_predictor.ROLE_SKILLS order, so role ids are
+stable across responses. Callbacks are never compacted: the backend
+stores them as-is and reads raw_result.text and the string fields back.
+
+Callbacks larger than ML_CALLBACK_COMPRESS_MIN bytes are compressed with
+ML_CALLBACK_COMPRESSION (gzip | zstd | none) and sent with the matching
+Content-Encoding. Express' body parser inflates gzip; zstd needs a
+receiver that understands it (and the zstandard package here).
+"""
+
+import gzip
+import json
+import os
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from role_predictor import ROLE_SKILLS
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # optional: stdlib json is used without it
+    orjson = None
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # optional: only needed for ML_CALLBACK_COMPRESSION=zstd
+    zstandard = None
+
+_ROLES = tuple(ROLE_SKILLS)
+_NO_SCORES = (0,) * len(_ROLES)
+
+COMPRESSION = os.getenv("ML_CALLBACK_COMPRESSION", "none").lower()
+COMPRESS_MIN = int(os.getenv("ML_CALLBACK_COMPRESS_MIN", "16384"))
+
+if COMPRESSION not in ("none", "gzip", "zstd"):
+    print(f"[payloads] unknown ML_CALLBACK_COMPRESSION={COMPRESSION!r}, sending uncompressed")
+    COMPRESSION = "none"
+elif COMPRESSION == "zstd" and zstandard is None:
+    print("[payloads] ML_CALLBACK_COMPRESSION=zstd needs the zstandard package, using gzip")
+    COMPRESSION = "gzip"
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# ── compact mode ─────────────────────────────────────────────
+
+class Interner:
+    """String → small integer id, in first-seen order."""
+
+    def __init__(self, seed: Tuple[str, ...] = ()) -> None:
+        self.names: List[str] = list(seed)
+        self.ids: Dict[str, int] = {s: i for i, s in enumerate(self.names)}
+
+    def __call__(self, name: str) -> int:
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def many(self, names: List[str]) -> List[int]:
+        ids = self.ids
+        try:
+            return [ids[n] for n in names]  # fast path: all seen before
+        except KeyError:
+            return [self(n) for n in names]
+
+
+class Tables:
+    """Per-payload id tables for compact mode."""
+
+    def __init__(self) -> None:
+        self.roles = Interner(_ROLES)
+
+    def role_prediction(self, prediction: Dict[str, Any]) -> Dict[str, Any]:
+        scores = prediction.get("scores") or {}
+        return {
+            "role": self.roles(prediction["role"]),
+            "confidence": prediction["confidence"],
+            "alternatives": self.roles.many(prediction.get("alternatives", [])),
+            "scores": list(map(scores.get, _ROLES, _NO_SCORES)),
+        }
+
+    def dump(self) -> Dict[str, List[str]]:
+        return {"roles": self.roles.names}
+
+
+def compact_analysis(result: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(result)
+    if "grammar_issues" in out:
+        out["grammar_issues"] = [{k: v for k, v in g.items() if k != "context"} for g in out["grammar_issues"]]
+    tables = Tables()
+    if out.get("role_prediction"):
+        out["role_prediction"] = tables.role_prediction(out["role_prediction"])
+    out["tables"] = tables.dump()
+    return out
+
+
+# ── callbacks ────────────────────────────────────────────────
+
+def encode(obj: Any) -> Tuple[bytes, Dict[str, str]]:
+    """(body, headers) for a JSON callback, compressed above COMPRESS_MIN bytes."""
+    body = dumps(obj)
+    headers = {"content-type": "application/json"}
+    if COMPRESSION == "none" or len(body) < COMPRESS_MIN:
+        return body, headers
+    if COMPRESSION == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(body), {**headers, "content-encoding": "zstd"}
+    return gzip.compress(body, compresslevel=5), {**headers, "content-encoding": "gzip"}
+
+
+def encode_stream(chunks: AsyncIterator[bytes]) -> Tuple[AsyncIterator[bytes], Dict[str, str]]:
+    """(body, headers) for a streamed JSON callback; compressed whenever compression is on."""
+    headers = {"content-type": "application/json"}
+    if COMPRESSION == "none":
+        return chunks, headers
+    return _compressed(chunks), {**headers, "content-encoding": COMPRESSION}
+
+
+async def _compressed(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    if COMPRESSION == "zstd":
+        co: Optional[Any] = zstandard.ZstdCompressor(level=3).compressobj()
+    else:
+        co = zlib.compressobj(5, zlib.DEFLATED, 31)  # gzip container
+    async for chunk in chunks:
+        out = co.compress(chunk)
+        if out:
+            yield out
+    yield co.flush()
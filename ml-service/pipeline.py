@@ -0,0 +1,362 @@
+"""
+Resume analysis pipeline — runs the analysis stages with explicit tiers
+and an optional latency budget.
+
+Tiers:
+  fast      : sections, ATS, PhraseMatcher-only skills, regex grammar
+              approximation, role, anomalies — for live upload previews
+  standard  : + full spaCy skills (NER); grammar still approximated
+  full      : + LanguageTool grammar (default)
+
+Documents longer than chunking.CHUNK_THRESHOLD characters have their
+skills, grammar and anomaly word counts processed chunk by chunk (see
+chunking.py); the result is then marked "chunked".
+
+With a budget, each expensive stage is checked against a running cost
+estimate before it starts; if it would not fit in the remaining time it
+is replaced by its cheaper approximation. The result lists every stage
+that did not run at full fidelity under "degraded".
+
+Stages are declared in STAGES with their dependencies. A caller can ask
+for a subset of the result fields; only the stages those fields need are
+run, in dependency waves, and the expensive independent stages of a wave
+(skills, grammar) run concurrently.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sections import detect_sections, get_detected_section_names
+from skills import extract_skills, extract_skills_fast, extract_skills_chunked
+from grammar import check_grammar, check_grammar_chunked, quick_grammar_check, recheck_grammar
+from ats import extract_ats_features, ats_score_from_features
+from quality import (
+    extract_quality_features, quality_score_from_features, classify_strength, build_insights,
+)
+from role_predictor import score_roles, role_from_scores
+from anomaly import extract_anomaly_features, extract_anomaly_features_chunked, anomalies_from_features
+from fingerprint import build_fingerprint
+from keyword_scan import get_scanner
+import chunking
+
+TIERS = ("fast", "standard", "full")
+DEFAULT_TIER = "full"
+
+# Highest-fidelity mode each tier allows for the expensive stages
+_TIER_MODES: Dict[str, Dict[str, str]] = {
+    "fast":     {"skills": "approximate", "grammar": "approximate"},
+    "standard": {"skills": "full",        "grammar": "approximate"},
+    "full":     {"skills": "full",        "grammar": "full"},
+}
+
+
+class _StageCosts:
+    """
+    Running cost model per expensive stage: fixed overhead + ms per 1k chars,
+    seeded with conservative priors and updated (EWMA) after every full run.
+    """
+
+    _ALPHA = 0.2
+
+    def __init__(self) -> None:
+        self._model: Dict[str, List[float]] = {
+            "skills":  [5.0, 15.0],
+            "grammar": [40.0, 60.0],
+        }
+
+    def estimate(self, stage: str, n_chars: int) -> float:
+        base, per_kchar = self._model[stage]
+        return base + per_kchar * n_chars / 1000.0
+
+    def observe(self, stage: str, n_chars: int, elapsed_ms: float) -> None:
+        base, per_kchar = self._model[stage]
+        observed = max(elapsed_ms - base, 0.0) / max(n_chars / 1000.0, 0.1)
+        self._model[stage][1] = (1 - self._ALPHA) * per_kchar + self._ALPHA * observed
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {"base_ms": round(b, 2), "ms_per_kchar": round(k, 2)}
+            for stage, (b, k) in self._model.items()
+        }
+
+
+STAGE_COSTS = _StageCosts()
+
+
+class _Budget:
+    def __init__(self, budget_ms: Optional[float]) -> None:
+        self.deadline = time.perf_counter() + budget_ms / 1000.0 if budget_ms else None
+
+    def remaining_ms(self) -> float:
+        if self.deadline is None:
+            return float("inf")
+        return (self.deadline - time.perf_counter()) * 1000.0
+
+
+def _run_stage(
+    stage: str,
+    tier: str,
+    budget: _Budget,
+    n_chars: int,
+    degraded: List[Dict[str, Any]],
+    full_fn,
+    approx_fn,
+):
+    """Run `stage` at the best fidelity the tier and remaining budget allow."""
+    if _TIER_MODES[tier][stage] != "full":
+        degraded.append({"stage": stage, "mode": "approximate", "reason": "tier"})
+        return approx_fn()
+
+    estimate = STAGE_COSTS.estimate(stage, n_chars)
+    remaining = budget.remaining_ms()
+    if estimate > remaining:
+        degraded.append({
+            "stage": stage, "mode": "approximate", "reason": "budget",
+            "estimated_ms": round(estimate, 1), "remaining_ms": round(max(remaining, 0.0), 1),
+        })
+        return approx_fn()
+
+    started = time.perf_counter()
+    out = full_fn()
+    STAGE_COSTS.observe(stage, n_chars, (time.perf_counter() - started) * 1000.0)
+    return out
+
+
+class _Stage:
+    def __init__(
+        self,
+        deps: Tuple[str, ...],
+        fn: Callable[["_Context"], Any],
+        concurrent: bool = False,
+    ) -> None:
+        self.deps = deps
+        self.fn = fn
+        self.concurrent = concurrent  # worth a thread of its own
+
+
+class _Context:
+    def __init__(self, raw_text: str, tier: str, budget: _Budget) -> None:
+        self.raw_text = raw_text
+        self.tier = tier
+        self.budget = budget
+        self.n_chars = len(raw_text)
+        self.chunked = chunking.is_long(raw_text)
+        self.degraded: List[Dict[str, Any]] = []
+        self.out: Dict[str, Any] = {}
+
+    def chunks(self) -> Iterable[str]:
+        return (chunk for _, chunk in chunking.split_chunks(self.raw_text))
+
+
+def _skills(ctx: _Context) -> List[str]:
+    if ctx.chunked:
+        return _run_stage(
+            "skills", ctx.tier, ctx.budget, ctx.n_chars, ctx.degraded,
+            lambda: extract_skills_chunked(ctx.chunks()),
+            lambda: extract_skills_chunked(ctx.chunks(), fast=True),
+        )
+    return _run_stage(
+        "skills", ctx.tier, ctx.budget, ctx.n_chars, ctx.degraded,
+        lambda: extract_skills(ctx.raw_text), lambda: extract_skills_fast(ctx.raw_text),
+    )
+
+
+def _grammar(ctx: _Context) -> List[Dict[str, Any]]:
+    if ctx.chunked:
+        full = lambda: check_grammar_chunked(chunking.split_chunks(ctx.raw_text))  # noqa: E731
+    else:
+        full = lambda: check_grammar(ctx.raw_text)  # noqa: E731
+    return _run_stage(
+        "grammar", ctx.tier, ctx.budget, ctx.n_chars, ctx.degraded,
+        full, lambda: quick_grammar_check(ctx.raw_text),
+    )
+
+
+def _anomaly_features(ctx: _Context) -> Dict[str, Any]:
+    if ctx.chunked:
+        return extract_anomaly_features_chunked(
+            ctx.raw_text, ctx.chunks(), ctx.out["sections"], ctx.out["word_count"],
+        )
+    return extract_anomaly_features(ctx.raw_text, ctx.out["sections"], ctx.out["word_count"])
+
+
+def _insights(ctx: _Context) -> List[str]:
+    o = ctx.out
+    return build_insights(o["ats_score"], o["quality_score"], o["sections"], o["grammar"], o["skills"])
+
+
+# stage → (dependencies, function); declaration order is a valid topological order
+STAGES: Dict[str, _Stage] = {
+    "sections":          _Stage((), lambda c: detect_sections(c.raw_text)),
+    "word_count":        _Stage((), lambda c: len(c.raw_text.split())),
+    "skills":            _Stage((), _skills, concurrent=True),
+    "grammar":           _Stage((), _grammar, concurrent=True),
+    "ats_features":      _Stage(("sections",), lambda c: extract_ats_features(c.raw_text, c.out["sections"])),
+    "ats_score":         _Stage(("ats_features",), lambda c: ats_score_from_features(c.out["ats_features"])),
+    "quality_features":  _Stage(
+        ("sections", "grammar", "skills"),
+        lambda c: extract_quality_features(c.out["sections"], c.out["grammar"], c.out["skills"]),
+    ),
+    "quality_score":     _Stage(
+        ("quality_features", "ats_score"),
+        lambda c: quality_score_from_features(c.out["quality_features"], c.out["ats_score"]),
+    ),
+    "strength":          _Stage(("quality_score",), lambda c: classify_strength(c.out["quality_score"])),
+    "insights":          _Stage(("ats_score", "quality_score", "sections", "grammar", "skills"), _insights),
+    "role_scores":       _Stage(("skills",), lambda c: score_roles(c.out["skills"], c.raw_text)),
+    "role_prediction":   _Stage(("role_scores",), lambda c: role_from_scores(c.out["role_scores"])),
+    "anomaly_features":  _Stage(("sections", "word_count"), _anomaly_features),
+    "anomalies":         _Stage(("anomaly_features",), lambda c: anomalies_from_features(c.out["anomaly_features"])),
+    "sections_detected": _Stage(("sections",), lambda c: get_detected_section_names(c.out["sections"])),
+}
+
+# result field → stage that produces it
+FIELDS: Dict[str, str] = {
+    "ats_score":         "ats_score",
+    "quality_score":     "quality_score",
+    "strength":          "strength",
+    "extracted_skills":  "skills",
+    "grammar_issues":    "grammar",
+    "sections_detected": "sections_detected",
+    "word_count":        "word_count",
+    "insights":          "insights",
+    "role_prediction":   "role_prediction",
+    "anomalies":         "anomalies",
+}
+
+# stages the fingerprint is built from
+_FINGERPRINT_STAGES = ("skills", "role_scores", "ats_features", "quality_features", "anomaly_features")
+
+_STAGE_ORDER = {name: i for i, name in enumerate(STAGES)}
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def _executor() -> ThreadPoolExecutor:
+    # Created on first use so prefork workers never inherit the parent's threads
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(
+            max_workers=int(os.getenv("ML_STAGE_THREADS", "4")),
+            thread_name_prefix="stage",
+        )
+    return _EXECUTOR
+
+
+def plan_stages(targets: Iterable[str], done: Iterable[str] = ()) -> List[List[str]]:
+    """
+    Dependency closure of `targets`, grouped into waves: every stage in a
+    wave depends only on stages in earlier waves. Stages in `done` are
+    already available and are neither run nor expanded.
+    """
+    done = set(done)
+    needed: Set[str] = set()
+    stack = list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in needed and name not in done:
+            needed.add(name)
+            stack.extend(STAGES[name].deps)
+
+    level: Dict[str, int] = {}
+    for name in STAGES:  # declaration order is topological
+        if name in needed:
+            level[name] = 1 + max((level.get(d, -1) for d in STAGES[name].deps), default=-1)
+
+    waves: List[List[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for name, lvl in level.items():
+        waves[lvl].append(name)
+    return waves
+
+
+def _run_wave(ctx: _Context, wave: List[str]) -> None:
+    threaded = [n for n in wave if STAGES[n].concurrent]
+    if len(threaded) < 2:
+        threaded = []
+    futures = {name: _executor().submit(STAGES[name].fn, ctx) for name in threaded}
+    for name in wave:
+        if name not in futures:
+            ctx.out[name] = STAGES[name].fn(ctx)
+    for name, fut in futures.items():
+        ctx.out[name] = fut.result()
+
+
+def validate_fields(fields: Iterable[str]) -> List[str]:
+    """Return unknown field names (empty when all are valid)."""
+    return [f for f in fields if f not in FIELDS]
+
+
+def analyze_text(
+    raw_text: str,
+    tier: str = DEFAULT_TIER,
+    budget_ms: Optional[float] = None,
+    with_fingerprint: bool = True,
+    fields: Optional[Iterable[str]] = None,
+    seed: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Optional[str]], Optional[Dict[str, Any]]]:
+    """
+    Run the analysis stages for one resume.
+
+    `fields` limits the result to those keys of FIELDS (default: all) and
+    runs only the stages they depend on. `seed` supplies precomputed stage
+    outputs (e.g. {"skills": [...], "grammar": [...]}) that are used as-is.
+
+    Returns:
+        (result, sections, fingerprint) — sections is {} and fingerprint is
+        None when they were not needed / requested
+    """
+    if tier not in _TIER_MODES:
+        raise ValueError(f"Unknown tier '{tier}' (expected one of {', '.join(TIERS)})")
+    fields = list(FIELDS) if fields is None else list(dict.fromkeys(fields))
+    unknown = validate_fields(fields)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+    started = time.perf_counter()
+    ctx = _Context(raw_text, tier, _Budget(budget_ms))
+    ctx.out.update(seed or {})
+    targets = [FIELDS[f] for f in fields]
+    if with_fingerprint:
+        targets.extend(_FINGERPRINT_STAGES)
+
+    for wave in plan_stages(targets, done=ctx.out):
+        _run_wave(ctx, wave)
+
+    out = ctx.out
+    result: Dict[str, Any] = {f: out[FIELDS[f]] for f in fields}
+    result["tier"] = tier
+    result["degraded"] = sorted(ctx.degraded, key=lambda d: _STAGE_ORDER[d["stage"]])
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+    if ctx.chunked:
+        result["chunked"] = True
+
+    fingerprint = None
+    if with_fingerprint:
+        fingerprint = build_fingerprint(
+            raw_text, out["skills"], out["role_scores"],
+            {"ats": out["ats_features"], "quality": out["quality_features"], "anomaly": out["anomaly_features"]},
+        )
+    return result, out.get("sections", {}), fingerprint
+
+
+def seed_from_prior(
+    raw_text: str,
+    prior_text: str,
+    prior_result: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Stage seed for a near-duplicate of an already analysed resume: grammar
+    is re-checked only on the changed lines, and skills are the prior
+    skills still present in the text plus a PhraseMatcher pass.
+    """
+    prior_skills = prior_result.get("extracted_skills", [])
+    hits = get_scanner(prior_skills).find(raw_text) if prior_skills else {}
+    skills = {s.lower(): s for s in extract_skills_fast(raw_text)}
+    for i in hits:
+        skills.setdefault(prior_skills[i].lower(), prior_skills[i])
+    return {
+        "skills": sorted(skills.values(), key=str.lower),
+        "grammar": recheck_grammar(prior_text, prior_result.get("grammar_issues", []), raw_text),
+    }
@@ -0,0 +1,147 @@
+"""
+Pre-fork server for the ML service.
+
+Loads every read-only model and lookup table (spaCy pipeline, PhraseMatcher,
+question banks, resource maps, LanguageTool JVM) once in a parent process,
+freezes the GC so those objects are never touched again, then forks uvicorn
+workers that share the pages copy-on-write.
+
+Usage:
+    ML_WORKERS=4 python prefork.py
+
+Env:
+    ML_WORKERS                 number of workers (default: CPU count)
+    ML_HOST / ML_PORT          bind address (default 0.0.0.0:8000)
+    ML_MEMORY_REPORT_SECS      log per-worker memory every N seconds (0 = off)
+"""
+
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+# Disable collection before anything is imported so the objects allocated while
+# loading models are not shuffled between generations (which dirties their pages).
+gc.disable()
+
+import uvicorn  # noqa: E402
+
+from memory import PREFORK_PARENT_ENV, process_memory  # noqa: E402
+
+WORKERS = int(os.getenv("ML_WORKERS", str(os.cpu_count() or 1)))
+HOST = os.getenv("ML_HOST", "0.0.0.0")
+PORT = int(os.getenv("ML_PORT", "8000"))
+MEMORY_REPORT_SECS = float(os.getenv("ML_MEMORY_REPORT_SECS", "0"))
+
+
+def _bind_socket() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, app, lt_url) -> None:
+    """Worker body — runs in the forked child and never returns."""
+    import grammar
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    gc.enable()
+    grammar.attach_shared_server(lt_url)
+
+    config = uvicorn.Config(app, lifespan="on", log_level="info")
+    server = uvicorn.Server(config)
+    try:
+        server.run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+
+def _spawn(sock: socket.socket, app, lt_url) -> int:
+    pid = os.fork()
+    if pid == 0:
+        _run_worker(sock, app, lt_url)
+    return pid
+
+
+def _report_memory(workers: Dict[int, int]) -> None:
+    parent = process_memory()
+    print(f"[prefork] parent pid={parent['pid']} rss={parent.get('rss_kb', 0)}kB")
+    for pid in sorted(workers):
+        m = process_memory(pid)
+        print(
+            f"[prefork] worker pid={pid} rss={m.get('rss_kb', 0)}kB "
+            f"shared={m.get('shared_kb', 0)}kB private={m.get('private_kb', 0)}kB"
+        )
+
+
+def main() -> None:
+    os.environ[PREFORK_PARENT_ENV] = str(os.getpid())
+
+    # ── Load every read-only model once ───────────────────────
+    started = time.perf_counter()
+    import main as service  # noqa: F401 — loads spaCy, matcher, banks
+    import grammar
+
+    lt_url = grammar.start_shared_server()
+    print(
+        f"[prefork] models loaded in {time.perf_counter() - started:.1f}s "
+        f"(LanguageTool: {lt_url or 'unavailable'})"
+    )
+
+    # Move everything allocated so far into the permanent generation
+    gc.freeze()
+
+    sock = _bind_socket()
+    workers: Dict[int, int] = {}
+    for slot in range(WORKERS):
+        workers[_spawn(sock, service.app, lt_url)] = slot
+    print(f"[prefork] {WORKERS} worker(s) listening on {HOST}:{PORT}")
+
+    stopping = False
+
+    def _shutdown(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    last_report = time.monotonic()
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+
+        if pid == 0:
+            if MEMORY_REPORT_SECS and time.monotonic() - last_report >= MEMORY_REPORT_SECS:
+                _report_memory(workers)
+                last_report = time.monotonic()
+            time.sleep(0.5)
+            continue
+
+        slot = workers.pop(pid, None)
+        if slot is None:
+            continue  # LanguageTool JVM or other helper
+        if not stopping:
+            print(f"[prefork] worker {pid} exited ({status}); respawning")
+            workers[_spawn(sock, service.app, lt_url)] = slot
+
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Optional process pool for text extraction and analysis.
+
+With ML_PROCESS_WORKERS > 0 each service worker runs PDF/DOCX extraction
+and analyze_text in a pool of that many processes instead of on its own
+threads, so CPU-bound stages run in parallel without the GIL. Inputs and
+extracted text travel through shared memory (see shm.py); only handles,
+options and the (small) analysis result are pickled.
+
+The pool uses the forkserver start method: the server imports the
+pipeline once and pool processes fork from it, sharing its pages
+copy-on-write (forking the service worker itself is unsafe: it already
+runs threads). That costs one extra copy of the models per service
+worker. Pool processes use the same LanguageTool server as their worker.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import grammar
+import shm
+from extractor import extract_text
+from pipeline import analyze_text
+
+WORKERS = int(os.getenv("ML_PROCESS_WORKERS", "0"))
+ENABLED = WORKERS > 0
+
+_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def _init_process(lt_url: Optional[str]) -> None:
+    grammar.attach_shared_server(lt_url)
+
+
+def _extract_job(file: shm.Transfer, file_type: str) -> shm.Transfer:
+    with shm.attached(file) as view:
+        text = extract_text(view, file_type)
+    return shm.export(text.encode("utf-8"))
+
+
+def _analyze_job(
+    text: shm.Transfer,
+    tier: str,
+    budget_ms: Optional[float],
+    seed: Optional[Dict[str, Any]],
+) -> Tuple[Dict[str, Any], Dict[str, str], str]:
+    with shm.attached(text) as view:
+        raw_text = str(view, "utf-8")
+    return analyze_text(raw_text, tier, budget_ms, seed=seed)
+
+
+def _discard_output(future: "asyncio.Future[shm.Transfer]") -> None:
+    if not future.cancelled() and future.exception() is None:
+        shm.adopt(future.result())
+
+
+def get_pool() -> ProcessPoolExecutor:
+    # Created on first use, inside the service worker that submits to it
+    global _POOL
+    if _POOL is None:
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(["pipeline", "extractor"])
+        _POOL = ProcessPoolExecutor(
+            max_workers=WORKERS, mp_context=ctx,
+            initializer=_init_process, initargs=(grammar.shared_server_url(),),
+        )
+    return _POOL
+
+
+async def extract(file_bytes: bytes, file_type: str) -> str:
+    loop = asyncio.get_running_loop()
+    with shm.shared(file_bytes) as handle:
+        future = loop.run_in_executor(get_pool(), _extract_job, handle, file_type)
+        try:
+            out = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The job still finishes; take its output segment so it is not leaked
+            future.add_done_callback(_discard_output)
+            raise
+    return shm.adopt(out).decode("utf-8")
+
+
+async def analyze(
+    raw_text: str,
+    tier: str,
+    budget_ms: Optional[float],
+    seed: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, str], str]:
+    loop = asyncio.get_running_loop()
+    with shm.shared(raw_text.encode("utf-8")) as handle:
+        return await loop.run_in_executor(get_pool(), _analyze_job, handle, tier, budget_ms, seed)
+
+
+def shutdown() -> None:
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(wait=True, cancel_futures=True)
+        _POOL = None
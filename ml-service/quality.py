@@ -14,15 +14,36 @@ THRESHOLDS = {
 }
 
 
-def compute_quality_score(
-    text: str,
+# Sections counted towards coverage
+QUALITY_SECTIONS = {
+    "contact", "summary", "experience", "education",
+    "skills", "projects", "certifications",
+}
+
+
+def extract_quality_features(
     sections: Dict[str, Optional[str]],
     grammar_issues: List[Dict[str, Any]],
     skills: List[str],
-    ats_score: float,
-) -> float:
+) -> Dict[str, int]:
     """
-    Composite quality score 0–100.
+    Raw, unweighted quality signals.
+
+    Returns:
+        skill_count, grammar_errors, grammar_warnings, sections_covered
+    """
+    detected = {k for k, v in sections.items() if v and v.strip()}
+    return {
+        "skill_count": len(skills),
+        "grammar_errors": sum(1 for i in grammar_issues if i.get("severity") == "error"),
+        "grammar_warnings": sum(1 for i in grammar_issues if i.get("severity") == "warning"),
+        "sections_covered": len(detected & QUALITY_SECTIONS),
+    }
+
+
+def quality_score_from_features(features: Dict[str, int], ats_score: float) -> float:
+    """
+    Composite quality score 0–100 from extract_quality_features() output.
 
     Weights:
       - Skills richness   : 25 pts
@@ -31,21 +52,14 @@ def compute_quality_score(
       - ATS contribution  : 25 pts
     """
     # 1. Skills richness (25 pts) — 15+ unique skills = full marks
-    skill_score = min((len(skills) / 15) * 25, 25)
+    skill_score = min((features["skill_count"] / 15) * 25, 25)
 
     # 2. Grammar quality (25 pts) — penalise per issue
-    errors = sum(1 for i in grammar_issues if i.get("severity") == "error")
-    warnings = sum(1 for i in grammar_issues if i.get("severity") == "warning")
-    grammar_penalty = (errors * 4) + (warnings * 2)
+    grammar_penalty = (features["grammar_errors"] * 4) + (features["grammar_warnings"] * 2)
     grammar_score = max(0, 25 - grammar_penalty)
 
     # 3. Section coverage (25 pts)
-    all_sections = {
-        "contact", "summary", "experience", "education",
-        "skills", "projects", "certifications",
-    }
-    detected = {k for k, v in sections.items() if v and v.strip()}
-    section_score = (len(detected & all_sections) / len(all_sections)) * 25
+    section_score = (features["sections_covered"] / len(QUALITY_SECTIONS)) * 25
 
     # 4. ATS contribution (25 pts)
     ats_contribution = (ats_score / 100) * 25
@@ -54,6 +68,19 @@ def compute_quality_score(
     return round(min(max(total, 0), 100), 2)
 
 
+def compute_quality_score(
+    text: str,
+    sections: Dict[str, Optional[str]],
+    grammar_issues: List[Dict[str, Any]],
+    skills: List[str],
+    ats_score: float,
+) -> float:
+    """Composite quality score 0–100. See quality_score_from_features()."""
+    return quality_score_from_features(
+        extract_quality_features(sections, grammar_issues, skills), ats_score
+    )
+
+
 def classify_strength(quality_score: float) -> str:
     """Map a quality score to a human-readable strength label."""
     if quality_score >= THRESHOLDS["excellent"]:
@@ -3,7 +3,10 @@ Learning recommendations engine.
 Maps skill gaps → curated resource suggestions.
 """
 
-from typing import List, Dict, Any
+import functools
+from typing import List, Dict, Any, Optional, Tuple
+
+from lookup import TermIndex
 
 _RESOURCE_MAP: Dict[str, List[Dict[str, str]]] = {
     "python": [
@@ -78,6 +81,44 @@ _GENERIC = [
 ]
 
 
+_GAP_ALIASES: Dict[str, str] = {
+    "js": "javascript",
+    "es6": "javascript",
+    "ts": "typescript",
+    "reactjs": "react",
+    "react.js": "react",
+    "node.js": "node",
+    "nodejs": "node",
+    "postgresql": "sql",
+    "postgres": "sql",
+    "mysql": "sql",
+    "sqlite": "sql",
+    "ml": "machine learning",
+    "k8s": "kubernetes",
+    "amazon web services": "aws",
+    "github": "git",
+    "gitlab": "git",
+}
+
+_GAP_INDEX = TermIndex(_RESOURCE_MAP, _GAP_ALIASES)
+
+
+@functools.lru_cache(maxsize=4096)
+def _resolve_gap(gap: str) -> Optional[str]:
+    """Resource-map key for a gap (JD gaps are n-grams, so match any token run)."""
+    return _GAP_INDEX.resolve(gap, anchored=False)
+
+
+@functools.lru_cache(maxsize=4096)
+def _fallback_resource(gap: str) -> Tuple[Tuple[str, str], ...]:
+    """Generic fallback for unknown skill — built once per distinct gap."""
+    return (
+        ("title", f"Search '{gap}' on roadmap.sh"),
+        ("url", f"https://roadmap.sh/search?q={gap.replace(' ', '+')}"),
+        ("type", "Roadmap"),
+    )
+
+
 def get_learning_recommendations(
     skill_gaps: List[str],
     role: str = "",
@@ -98,31 +139,19 @@ def get_learning_recommendations(
     covered: set = set()
 
     for gap in skill_gaps:
-        gap_lower = gap.lower()
         matched_resources: List[Dict[str, str]] = []
 
-        for key, resources in _RESOURCE_MAP.items():
-            if key in gap_lower or gap_lower in key:
-                for r in resources:
-                    if r["url"] not in covered:
-                        matched_resources.append(r)
-                        covered.add(r["url"])
-                break
+        key = _resolve_gap(gap)
+        if key is not None:
+            for r in _RESOURCE_MAP[key]:
+                if r["url"] not in covered:
+                    matched_resources.append(r)
+                    covered.add(r["url"])
 
         if matched_resources:
             recommendations.append({"skill": gap, "resources": matched_resources})
         else:
-            # Generic fallback for unknown skill
-            recommendations.append({
-                "skill": gap,
-                "resources": [
-                    {
-                        "title": f"Search '{gap}' on roadmap.sh",
-                        "url": f"https://roadmap.sh/search?q={gap.replace(' ', '+')}",
-                        "type": "Roadmap",
-                    }
-                ],
-            })
+            recommendations.append({"skill": gap, "resources": [dict(_fallback_resource(gap))]})
 
     total = sum(len(r["resources"]) for r in recommendations) + len(_GENERIC)
 
@@ -131,3 +160,62 @@ def get_learning_recommendations(
         "general": _GENERIC,
         "total_resources": total,
     }
+
+
+def get_learning_recommendations_batch(
+    candidates: List[Dict[str, Any]],
+    role: str = "",
+) -> Dict[str, Any]:
+    """
+    Job-level recommendations: every distinct gap across all candidates is
+    resolved once, and candidates reference shared entries, so the response
+    grows with distinct gaps rather than candidates × gaps.
+
+    Args:
+        candidates : [{ "id": str, "skill_gaps": [str] }]
+
+    Returns:
+        {
+          "resources":  [ {title, url, type} ],          # shared table
+          "skills":     { gap: [resource index] },       # one entry per distinct gap
+          "candidates": [ { "id": str, "skills": [gap] } ],
+          "general":    [resource index],
+          "distinct_gaps": int,
+        }
+    """
+    resources: List[Dict[str, str]] = []
+    resource_ids: Dict[str, int] = {}
+
+    def _ref(resource: Dict[str, str]) -> int:
+        rid = resource_ids.get(resource["url"])
+        if rid is None:
+            rid = resource_ids[resource["url"]] = len(resources)
+            resources.append(resource)
+        return rid
+
+    skills: Dict[str, List[int]] = {}
+    out_candidates: List[Dict[str, Any]] = []
+
+    for cand in candidates:
+        refs: List[str] = []
+        for gap in cand.get("skill_gaps", []):
+            label = gap.strip().lower()
+            if not label:
+                continue
+            if label not in skills:
+                key = _resolve_gap(label)
+                entries = _RESOURCE_MAP[key] if key is not None else [dict(_fallback_resource(label))]
+                skills[label] = [_ref(r) for r in entries]
+            if label not in refs:
+                refs.append(label)
+        out_candidates.append({"id": cand.get("id"), "skills": refs})
+
+    general = [_ref(r) for r in _GENERIC]
+
+    return {
+        "resources": resources,
+        "skills": skills,
+        "candidates": out_candidates,
+        "general": general,
+        "distinct_gaps": len(skills),
+    }
@@ -0,0 +1,214 @@
+"""
+Re-score the whole stored corpus with a new weight configuration.
+
+Reads the raw features persisted by feature_store.py and recomputes ATS,
+quality, strength and per-job hiring probability / rank twice — with the
+current defaults and with the given configuration — as array arithmetic
+over all resumes and all jobs at once. Nothing is re-analysed.
+
+    {
+      "ats_weights":         {"sections": 35, ...}     batch_scoring.ATS_WEIGHTS keys
+      "quality_weights":     {"skills": 25, ...}       batch_scoring.QUALITY_WEIGHTS keys
+      "strength_thresholds": {"excellent": 80, ...}    quality.THRESHOLDS keys
+      "hiring_weights":      {"jd_similarity": 0.35, ...}  hiring_probability.FACTOR_WEIGHTS keys
+    }
+
+Every section is optional; omitted keys keep their default. The report
+lists strength-label transitions and the largest quality moves, and per
+job how many candidates changed rank, the top-10 overlap and the largest
+rank moves. Job candidates without stored resume features keep the ATS /
+quality scores they were matched with.
+
+    cd ml-service && python rescore.py --config weights.json [--top 20] [--out scores.jsonl]
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import feature_store
+from batch_scoring import ats_scores, quality_scores, strength_labels
+from hiring_probability import compute_hiring_probability_batch
+
+CONFIG_KEYS = ("ats_weights", "quality_weights", "strength_thresholds", "hiring_weights")
+TOP_OVERLAP = 10
+
+
+def _check(config: Dict[str, Any]) -> None:
+    unknown = set(config) - set(CONFIG_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown config section(s): {', '.join(sorted(unknown))} (expected {', '.join(CONFIG_KEYS)})")
+
+
+def _resume_scores(X: np.ndarray, config: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ats = ats_scores(X, config.get("ats_weights"))
+    quality = quality_scores(X, ats, config.get("quality_weights"))
+    strength = np.array(strength_labels(quality, config.get("strength_thresholds")), dtype=object)
+    return ats, quality, strength
+
+
+def _ranks(job: np.ndarray, probability: np.ndarray) -> np.ndarray:
+    """1-based rank within each job; ties keep input order, like rank_candidates()."""
+    n = len(job)
+    order = np.lexsort((np.arange(n), -probability, job))
+    starts = np.searchsorted(job[order], job[order], side="left")
+    ranks = np.empty(n, dtype=np.int64)
+    ranks[order] = np.arange(n) - starts + 1
+    return ranks
+
+
+def _job_columns(
+    jobs: Dict[str, Dict[str, np.ndarray]],
+) -> Tuple[List[str], np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """Every job's candidates concatenated: (job ids, job index per row, resume ids, columns)."""
+    job_ids = list(jobs)
+    sizes = [len(jobs[j]["resume_ids"]) for j in job_ids]
+    job = np.repeat(np.arange(len(job_ids)), sizes)
+    resume_ids = np.concatenate([jobs[j]["resume_ids"] for j in job_ids]) if job_ids else np.zeros(0, dtype=str)
+    cols = {
+        c: np.concatenate([jobs[j][c] for j in job_ids]) if job_ids else np.zeros(0)
+        for c in feature_store.JOB_COLUMNS
+    }
+    return job_ids, job, resume_ids, cols
+
+
+def rescore(
+    config: Dict[str, Any],
+    store: Optional[feature_store.FeatureStore] = None,
+    top: int = 20,
+    scores: bool = False,
+) -> Dict[str, Any]:
+    """
+    Baseline-vs-config diff over the stored corpus. With `scores`, the new
+    per-resume scores and per-job probabilities / ranks are included too.
+    """
+    _check(config)
+    store = store or feature_store.get_store()
+    ids, X = store.resumes()
+
+    base_ats, base_quality, base_strength = _resume_scores(X, {})
+    ats, quality, strength = _resume_scores(X, config)
+
+    changed = np.flatnonzero(strength != base_strength)
+    transitions = Counter(zip(base_strength[changed].tolist(), strength[changed].tolist()))
+    delta = quality - base_quality
+    movers = np.argsort(-np.abs(delta), kind="stable")[:top]
+    movers = movers[delta[movers] != 0]
+    report: Dict[str, Any] = {
+        "resumes": {
+            "count": len(ids),
+            "strength_changed": int(len(changed)),
+            "strength_transitions": [
+                {"from": a, "to": b, "count": c} for (a, b), c in transitions.most_common()
+            ],
+            "strength_counts": dict(Counter(strength.tolist())),
+            "mean_ats_delta": round(float((ats - base_ats).mean()), 4) if len(ids) else 0.0,
+            "mean_quality_delta": round(float(delta.mean()), 4) if len(ids) else 0.0,
+            "top_quality_changes": [
+                {
+                    "resume_id": ids[i],
+                    "quality_score": float(quality[i]),
+                    "previous_quality_score": float(base_quality[i]),
+                    "strength": strength[i],
+                    "previous_strength": base_strength[i],
+                }
+                for i in movers.tolist()
+            ],
+        },
+    }
+
+    # All jobs' candidates in one pass: stored resumes get re-scored ATS / quality
+    job_ids, job, resume_ids, cols = _job_columns(store.jobs())
+    row_of = {rid: i for i, rid in enumerate(ids)}
+    rows = np.fromiter((row_of.get(r, -1) for r in resume_ids.tolist()), dtype=np.int64, count=len(resume_ids))
+    known = rows >= 0
+    take = np.where(known, rows, 0)
+    pick = lambda new, stored: np.where(known, new[take] if len(ids) else 0, stored)  # noqa: E731
+
+    before = compute_hiring_probability_batch(
+        cols["similarity"], pick(base_ats, cols["ats"]), pick(base_quality, cols["quality"]),
+        cols["matched"], cols["total"],
+    )["probability"]
+    after = compute_hiring_probability_batch(
+        cols["similarity"], pick(ats, cols["ats"]), pick(quality, cols["quality"]),
+        cols["matched"], cols["total"], weights=config.get("hiring_weights"),
+    )["probability"]
+    old_rank, new_rank = _ranks(job, before), _ranks(job, after)
+
+    report["jobs"] = []
+    bounds = np.searchsorted(job, np.arange(len(job_ids) + 1))
+    for j, job_id in enumerate(job_ids):
+        lo, hi = bounds[j], bounds[j + 1]
+        moved = new_rank[lo:hi] - old_rank[lo:hi]
+        order = np.argsort(-np.abs(moved), kind="stable")[:top]
+        order = order[moved[order] != 0]
+        entry = {
+            "job_id": job_id,
+            "candidates": int(hi - lo),
+            "rank_changed": int(np.count_nonzero(moved)),
+            "max_rank_move": int(np.abs(moved).max()) if hi > lo else 0,
+            f"top{TOP_OVERLAP}_overlap": int(np.count_nonzero(
+                (old_rank[lo:hi] <= TOP_OVERLAP) & (new_rank[lo:hi] <= TOP_OVERLAP)
+            )),
+            "top_rank_changes": [
+                {
+                    "resume_id": str(resume_ids[lo + i]),
+                    "rank": int(new_rank[lo + i]),
+                    "previous_rank": int(old_rank[lo + i]),
+                    "hiring_probability": float(after[lo + i]),
+                    "previous_hiring_probability": float(before[lo + i]),
+                }
+                for i in order.tolist()
+            ],
+        }
+        if scores:
+            entry["resume_ids"] = resume_ids[lo:hi].tolist()
+            entry["hiring_probability"] = after[lo:hi].tolist()
+            entry["rank"] = new_rank[lo:hi].tolist()
+        report["jobs"].append(entry)
+
+    if scores:
+        report["resumes"].update(
+            resume_ids=ids, ats_score=ats.tolist(), quality_score=quality.tolist(), strength=strength.tolist(),
+        )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config", required=True, help="JSON file with the weight configuration")
+    parser.add_argument("--top", type=int, default=20, help="changes listed per section")
+    parser.add_argument("--out", help="write new per-resume scores and per-job ranks here (JSON lines)")
+    args = parser.parse_args()
+
+    with open(args.config) as fh:
+        config = json.load(fh)
+    try:
+        report = rescore(config, top=args.top, scores=bool(args.out))
+    except ValueError as exc:
+        sys.exit(f"rescore: {exc}")
+
+    if args.out:
+        resumes = report["resumes"]
+        with open(args.out, "w") as fh:
+            for i, rid in enumerate(resumes.pop("resume_ids")):
+                fh.write(json.dumps({
+                    "resume_id": rid, "ats_score": resumes["ats_score"][i],
+                    "quality_score": resumes["quality_score"][i], "strength": resumes["strength"][i],
+                }) + "\n")
+            for job in report["jobs"]:
+                for rid, p, r in zip(job.pop("resume_ids"), job.pop("hiring_probability"), job.pop("rank")):
+                    fh.write(json.dumps({
+                        "job_id": job["job_id"], "resume_id": rid, "hiring_probability": p, "rank": r,
+                    }) + "\n")
+        for key in ("ats_score", "quality_score", "strength"):
+            resumes.pop(key)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -96,23 +96,11 @@ ROLE_SKILLS: Dict[str, List[str]] = {
 }
 
 
-def predict_role(
+def score_roles(
     skills: List[str],
     text: str = "",
-) -> Dict[str, object]:
-    """
-    Predict the most likely role for a candidate.
-
-    Args:
-        skills  : List of extracted skill strings
-        text    : Full resume text (for fallback keyword matching)
-
-    Returns:
-        role         : str — predicted role name
-        confidence   : float 0–1
-        alternatives : List[str] — top 3 alternative roles
-        scores       : Dict[str, int] — all role match counts
-    """
+) -> Dict[str, int]:
+    """Count how many of each role's fingerprint keywords the candidate covers."""
     lower_skills = {s.lower() for s in skills}
     lower_text   = text.lower()
 
@@ -123,7 +111,11 @@ def predict_role(
             if kw in lower_skills or kw in lower_text
         )
         scores[role] = matched
+    return scores
+
 
+def role_from_scores(scores: Dict[str, int]) -> Dict[str, object]:
+    """Turn score_roles() output into a prediction (see predict_role())."""
     # Sort by score descending
     ranked: List[Tuple[str, int]] = sorted(scores.items(), key=lambda x: x[1], reverse=True)
 
@@ -147,3 +139,23 @@ def predict_role(
         "alternatives": alternatives,
         "scores": scores,
     }
+
+
+def predict_role(
+    skills: List[str],
+    text: str = "",
+) -> Dict[str, object]:
+    """
+    Predict the most likely role for a candidate.
+
+    Args:
+        skills  : List of extracted skill strings
+        text    : Full resume text (for fallback keyword matching)
+
+    Returns:
+        role         : str — predicted role name
+        confidence   : float 0–1
+        alternatives : List[str] — top 3 alternative roles
+        scores       : Dict[str, int] — all role match counts
+    """
+    return role_from_scores(score_roles(skills, text))
@@ -0,0 +1,104 @@
+"""
+Run a local ml-service cluster for trying out cluster mode.
+
+Starts N `uvicorn main:app` processes on consecutive ports, each with its
+own ML_DATA_DIR, all seeded with the first node, waits until they agree on
+membership and prints how keys spread over the ring. With --stop-one the
+last node is stopped again after startup so the leave / handoff path can
+be watched in the other nodes' logs.
+
+    cd ml-service && python scripts/cluster_local.py --nodes 3 --port 8101
+
+Runs until Ctrl-C, then stops every node (each hands off before exiting).
+"""
+
+import argparse
+import collections
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _start(port: int, seed: str, heartbeat: float) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        ML_DATA_DIR=tempfile.mkdtemp(prefix=f"ml-node-{port}-"),
+        ML_CLUSTER_SELF=f"http://127.0.0.1:{port}",
+        ML_CLUSTER_SEEDS=seed,
+        ML_CLUSTER_HEARTBEAT_SECS=str(heartbeat),
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ML_DIR, env=env,
+    )
+
+
+def _wait(urls, timeout: float, want_live: int) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            views = [httpx.get(f"{u}/cluster/members", timeout=2).json() for u in urls]
+            if all(len(v["live"]) == want_live for v in views):
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"nodes did not converge on {want_live} live members within {timeout:.0f}s")
+
+
+def _distribution(url: str, keys: int) -> collections.Counter:
+    return collections.Counter(
+        httpx.get(f"{url}/cluster/owner", params={"key": f"job-{i}"}).json()["owner"] for i in range(keys)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--heartbeat", type=float, default=2.0)
+    parser.add_argument("--keys", type=int, default=1000, help="sample keys for the ownership table")
+    parser.add_argument("--stop-one", action="store_true", help="stop the last node once the cluster is up")
+    args = parser.parse_args()
+
+    urls = [f"http://127.0.0.1:{args.port + i}" for i in range(args.nodes)]
+    procs = [_start(args.port + i, urls[0], args.heartbeat) for i in range(args.nodes)]
+    try:
+        _wait(urls, 120, args.nodes)
+        print(f"{args.nodes} nodes up: {', '.join(urls)}")
+        for node, count in sorted(_distribution(urls[0], args.keys).items()):
+            print(f"  {node}  owns {count / args.keys:6.1%} of {args.keys} sample job ids")
+
+        if args.stop_one and args.nodes > 1:
+            procs[-1].send_signal(signal.SIGINT)
+            procs[-1].wait(timeout=30)
+            _wait(urls[:-1], 60, args.nodes - 1)
+            print(f"stopped {urls[-1]}; ownership after handoff:")
+            for node, count in sorted(_distribution(urls[0], args.keys).items()):
+                print(f"  {node}  owns {count / args.keys:6.1%}")
+
+        print("Ctrl-C to stop")
+        while all(p.poll() is None for p in procs if p is not procs[-1] or not args.stop_one):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in procs:
+            if p.poll() is None:
+                p.send_signal(signal.SIGINT)
+        for p in procs:
+            try:
+                p.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -80,6 +80,21 @@ COMPILED_PATTERNS = {
 }
 
 
+def heading_of(line: str) -> Optional[str]:
+    """Return section name if line looks like a section heading, else None."""
+    stripped = line.strip()
+    # Headings are typically short (< 60 chars) and capitalized
+    if not stripped or len(stripped) > 60:
+        return None
+    for section, pattern in COMPILED_PATTERNS.items():
+        if pattern.fullmatch(stripped.rstrip(":").strip()):
+            return section
+        # Looser match for lines that mostly match
+        if pattern.search(stripped) and len(stripped) < 40:
+            return section
+    return None
+
+
 def detect_sections(text: str) -> Dict[str, Optional[str]]:
     """
     Returns a dict mapping section names to their extracted text content.
@@ -92,22 +107,8 @@ def detect_sections(text: str) -> Dict[str, Optional[str]]:
     current_lines: List[str] = []
     section_order: List[str] = []
 
-    def _is_heading(line: str) -> Optional[str]:
-        """Return section name if line looks like a section heading, else None."""
-        stripped = line.strip()
-        # Headings are typically short (< 60 chars) and capitalized
-        if not stripped or len(stripped) > 60:
-            return None
-        for section, pattern in COMPILED_PATTERNS.items():
-            if pattern.fullmatch(stripped.rstrip(":").strip()):
-                return section
-            # Looser match for lines that mostly match
-            if pattern.search(stripped) and len(stripped) < 40:
-                return section
-        return None
-
     for line in lines:
-        heading = _is_heading(line)
+        heading = heading_of(line)
         if heading:
             # Save current section buffer
             if current_section:
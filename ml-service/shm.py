@@ -0,0 +1,137 @@
+"""
+Shared-memory transfer of large buffers to and from worker processes.
+
+Submitting a 10 MB PDF (or a long extracted text) to a process pool
+pickles it into the pool's pipe and unpickles a second copy on the other
+side. Here the bytes are copied once into a POSIX shared-memory segment
+and only a Handle(name, size) crosses the process boundary.
+
+Ownership is explicit:
+
+    parent → worker   with shared(data) as handle: submit(job, handle)
+                      the parent creates the segment and unlinks it when
+                      the block exits; the worker only attaches:
+                      with attached(handle) as view: ...
+    worker → parent   handle = export(data)   (in the worker)
+                      data = adopt(handle)    (in the parent: copy out, unlink)
+
+Buffers under INLINE_MAX are cheaper to pickle than to map (see
+benchmarks/shm_transfer.py), so shared() / export() pass them through as
+plain bytes and attached() / adopt() accept either form.
+
+Pool processes (spawn / forkserver) share the parent's resource tracker,
+which keeps a set of names per process tree. Attaching re-registers a
+name the owner already registered (a no-op) and must never unregister
+it; export() unregisters the segment it creates, because the tracker
+entry passes to the parent with the segment and adopt() registers and
+unregisters it again around its unlink. Segments the parent still owns
+at exit are unlinked by an atexit hook.
+"""
+
+import atexit
+import contextlib
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterator, NamedTuple, Union
+
+INLINE_MAX = 256 * 1024
+
+
+class Handle(NamedTuple):
+    name: str
+    size: int
+
+
+Transfer = Union[Handle, bytes]
+
+_OWNED: Dict[str, shared_memory.SharedMemory] = {}
+_LOCK = threading.Lock()
+
+
+def _create(data) -> shared_memory.SharedMemory:
+    size = len(data)
+    segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    segment.buf[:size] = data
+    return segment
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach without taking part in the segment's cleanup."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Registers with the shared tracker, where the owner's entry already exists
+        return shared_memory.SharedMemory(name=name)
+
+
+def _release(name: str) -> None:
+    with _LOCK:
+        segment = _OWNED.pop(name, None)
+    if segment is not None:
+        segment.close()
+        with contextlib.suppress(FileNotFoundError):
+            segment.unlink()
+
+
+@contextlib.contextmanager
+def shared(data) -> Iterator[Transfer]:
+    """Copy `data` (bytes-like) into a new segment owned by this process for the block."""
+    if len(data) < INLINE_MAX:
+        yield bytes(data)
+        return
+    segment = _create(data)
+    with _LOCK:
+        _OWNED[segment.name] = segment
+    try:
+        yield Handle(segment.name, len(data))
+    finally:
+        _release(segment.name)
+
+
+@contextlib.contextmanager
+def attached(handle: Transfer) -> Iterator[memoryview]:
+    """Read-only-by-convention view of a segment owned by another process."""
+    if not isinstance(handle, Handle):
+        yield memoryview(handle)
+        return
+    segment = _attach(handle.name)
+    view = segment.buf[:handle.size]
+    try:
+        yield view
+    finally:
+        view.release()
+        segment.close()
+
+
+def export(data) -> Transfer:
+    """Hand `data` to the parent in a new segment; the parent must adopt() it."""
+    if len(data) < INLINE_MAX:
+        return bytes(data)
+    segment = _create(data)
+    resource_tracker.unregister(segment._name, "shared_memory")
+    handle = Handle(segment.name, len(data))
+    segment.close()
+    return handle
+
+
+def adopt(handle: Transfer) -> bytes:
+    """Take ownership of an exported segment: copy its bytes out and unlink it."""
+    if not isinstance(handle, Handle):
+        return handle
+    segment = shared_memory.SharedMemory(name=handle.name)
+    try:
+        return bytes(segment.buf[:handle.size])
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+def owned() -> int:
+    """Segments currently owned by this process (should drop back to 0 between requests)."""
+    return len(_OWNED)
+
+
+@atexit.register
+def _release_all() -> None:
+    for name in list(_OWNED):
+        _release(name)
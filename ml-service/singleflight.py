@@ -0,0 +1,73 @@
+"""
+Single-flight coalescing of identical concurrent work.
+
+Uploads and backend retries can fire /analyze for the same resume (or the
+same file content) several times within seconds. A call made while an
+identical one is still running attaches to the running computation
+instead of starting its own, and every caller receives the same result
+or the same exception. /analyze runs are keyed by resume_id (plus the
+request's options), the analysis itself by a hash of the text, so the
+same file uploaded under two resume ids is analysed once:
+
+    result, shared = await FLIGHTS.run("resume:r1|full|...", compute)
+
+The computation runs as its own task, so cancelling one caller does not
+cancel it for the others. Nothing is kept after the flight lands: this is
+in-flight deduplication, not a result cache.
+
+Flights are per worker process; the counters (GET /analyze/coalescing)
+show how much work was coalesced, by kind (the key prefix before ':').
+"""
+
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._flights: Dict[str, "asyncio.Task[Any]"] = {}
+        self._started: Counter = Counter()
+        self._coalesced: Counter = Counter()
+        self._failed: Counter = Counter()
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Await fn(), or the flight already running under `key`. Returns (result, shared)."""
+        kind = key.split(":", 1)[0]
+        task = self._flights.get(key)
+        shared = task is not None
+        if shared:
+            self._coalesced[kind] += 1
+        else:
+            self._started[kind] += 1
+            task = self._flights[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._land(kind, key, t))
+        return await asyncio.shield(task), shared
+
+    def _land(self, kind: str, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if task.cancelled() or task.exception() is not None:
+            self._failed[kind] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        kinds: List[str] = sorted(set(self._started) | set(self._coalesced))
+        per_kind = {}
+        for kind in kinds:
+            calls = self._started[kind] + self._coalesced[kind]
+            per_kind[kind] = {
+                "calls": calls,
+                "executions": self._started[kind],
+                "coalesced": self._coalesced[kind],
+                "failed": self._failed[kind],
+                "coalesced_ratio": round(self._coalesced[kind] / calls, 4) if calls else 0.0,
+            }
+        return {
+            "in_flight": len(self._flights),
+            "executions": sum(self._started.values()),
+            "coalesced": sum(self._coalesced.values()),
+            "kinds": per_kind,
+        }
+
+
+FLIGHTS = SingleFlight()
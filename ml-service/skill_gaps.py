@@ -0,0 +1,142 @@
+"""
+Per-job skill supply / gap aggregation over match results.
+
+For every job the store keeps one bit per (candidate, JD keyword): does
+the candidate's match result cover the keyword. Each /match run updates
+it incrementally — rows for freshly scored resumes are set from their
+results, removed resumes are dropped, unchanged rows are kept — so the
+aggregate always describes the job's current candidate set.
+
+aggregate() is one vectorised pass over the (candidates, keywords) bit
+matrix:
+
+    covered               candidates covering each JD keyword (column sums)
+    gap_histogram         candidates by number of JD keywords they miss (bincount)
+    coverage_percentiles  per-candidate share of JD keywords covered
+    scarce                keywords covered by under SCARCE_RATIO of candidates
+
+State is one .npz per job under ML_DATA_DIR/skill_gaps (keywords,
+resume ids, bit rows packed 8 per byte), replaced atomically under a
+per-job lock, so every worker sees the same aggregate.
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from matcher import keyword_mask
+from storage import atomic_write, data_path, locked
+
+SCARCE_RATIO = float(os.getenv("ML_SKILL_GAP_SCARCE_RATIO", "0.1"))
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def masks(keywords: Sequence[str], results: Iterable[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """resume_id → JD keyword coverage row for match results ({resume_id, matched_keywords, skill_gaps})."""
+    keywords = list(keywords)
+    return {r["resume_id"]: keyword_mask(keywords, r["matched_keywords"], r["skill_gaps"]) for r in results}
+
+
+class SkillGapStore:
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.dir = directory or data_path("skill_gaps")
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, job_id: str) -> str:
+        digest = hashlib.blake2b(job_id.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.dir, f"{digest}.npz")
+
+    def _load(self, path: str) -> Optional[Dict[str, np.ndarray]]:
+        try:
+            with np.load(path) as data:
+                return {k: data[k] for k in data.files}
+        except FileNotFoundError:
+            return None
+
+    def update(
+        self,
+        job_id: str,
+        keywords: Sequence[str],
+        fresh: Dict[str, np.ndarray],
+        removed: Iterable[str] = (),
+        replace: bool = False,
+    ) -> int:
+        """
+        Set the coverage rows of freshly scored resumes (see masks()) and
+        drop removed ones. `replace` (a full run) or a changed JD keyword
+        list starts from an empty matrix. Returns the candidate count.
+        """
+        keywords = list(keywords)
+        path = self._path(job_id)
+        with locked(path):
+            state = None if replace else self._load(path)
+            if state is not None and state["keywords"].tolist() != keywords:
+                state = None
+            if state is None:
+                ids: List[str] = []
+                bits = np.zeros((0, len(keywords)), dtype=bool)
+            else:
+                ids = state["resume_ids"].tolist()
+                bits = np.unpackbits(state["bits"], axis=1, count=len(keywords)).astype(bool)
+
+            gone = set(removed) | set(fresh)
+            keep = np.array([rid not in gone for rid in ids], dtype=bool)
+            ids = [rid for rid, k in zip(ids, keep.tolist()) if k] + list(fresh)
+            bits = np.vstack([bits[keep], np.array(list(fresh.values()), dtype=bool).reshape(-1, len(keywords))])
+
+            with atomic_write(path) as fh:
+                np.savez(
+                    fh, job_id=np.array(job_id), keywords=np.array(keywords, dtype=str),
+                    resume_ids=np.array(ids, dtype=str), bits=np.packbits(bits, axis=1),
+                )
+        return len(ids)
+
+    def drop(self, job_id: str) -> bool:
+        try:
+            os.unlink(self._path(job_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def aggregate(self, job_id: str, top: int = 10) -> Optional[Dict[str, Any]]:
+        """Coverage / gap aggregate for a job, or None if it has no match results yet."""
+        state = self._load(self._path(job_id))
+        if state is None:
+            return None
+        keywords = state["keywords"].tolist()
+        k = len(keywords)
+        bits = np.unpackbits(state["bits"], axis=1, count=k).astype(bool)
+        n = len(bits)
+
+        covered = bits.sum(axis=0, dtype=np.int64)
+        per_candidate = bits.sum(axis=1, dtype=np.int64)
+        ratio = covered / n if n else np.zeros(k)
+        share = per_candidate / k if k else np.zeros(n)
+        scarce = np.flatnonzero(ratio < SCARCE_RATIO)
+        scarce = scarce[np.argsort(covered[scarce], kind="stable")][:top]
+        return {
+            "job_id": job_id,
+            "candidates": n,
+            "keywords": keywords,
+            "covered": covered.tolist(),
+            "coverage": np.round(ratio, 4).tolist(),
+            "gap_histogram": np.bincount(k - per_candidate, minlength=k + 1).tolist(),
+            "coverage_percentiles": {
+                f"p{p}": round(float(v), 4)
+                for p, v in zip(PERCENTILES, np.percentile(share, PERCENTILES) if n else [0.0] * len(PERCENTILES))
+            },
+            "full_coverage": int(np.count_nonzero(per_candidate == k)) if k else 0,
+            "scarce": [{"keyword": keywords[i], "covered": int(covered[i])} for i in scarce.tolist()],
+        }
+
+
+_STORE: Optional[SkillGapStore] = None
+
+
+def get_store() -> SkillGapStore:
+    global _STORE
+    if _STORE is None:
+        _STORE = SkillGapStore()
+    return _STORE
@@ -0,0 +1,259 @@
+"""
+Skill bitset index for must-have / nice-to-have pre-filtering.
+
+Every canonical (lower-case) skill gets a bit: the skills vocabulary
+(data/skills_vocab.json) first, then any other skill interned when a
+resume holding it is indexed. Skills in a query are never interned, so
+request input cannot grow the vocabulary. A resume's skill set is a row
+of uint64 words, so a must-have filter over the whole index is one
+vectorised AND + compare:
+
+    survivors = ((bits & must) == must).all(axis=1)
+
+and nice-to-have coverage is a popcount of (bits & nice).
+
+The index is an append-only JSON-lines log under ML_DATA_DIR/skills
+(add / remove records with the resume's skill names, appended under a
+file lock); each worker replays records it has not seen yet before every
+query and interns skills into its own vocabulary, so bit positions never
+need to agree across workers.
+"""
+
+import functools
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from storage import data_path, locked
+
+_VOCAB_PATH = Path(__file__).parent / "data" / "skills_vocab.json"
+_INITIAL_ROWS = 1024
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def canonical(skill: str) -> str:
+    return " ".join(skill.lower().split())
+
+
+@functools.lru_cache(maxsize=1)
+def _base_vocab() -> Tuple[str, ...]:
+    if not _VOCAB_PATH.exists():
+        return ()
+    with open(_VOCAB_PATH) as f:
+        data = json.load(f)
+    skills = data if isinstance(data, list) else data.get("skills", [])
+    return tuple(dict.fromkeys(canonical(s) for s in skills))
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    """Set bits per row of a (n, words) uint64 array."""
+    as_bytes = np.ascontiguousarray(bits).view(np.uint8).reshape(len(bits), -1)
+    return _POPCOUNT8[as_bytes].sum(axis=1, dtype=np.int64)
+
+
+class SkillVocab:
+    """Canonical skill → bit position; unknown skills are interned."""
+
+    def __init__(self) -> None:
+        self.names: List[str] = list(_base_vocab())
+        self.bit: Dict[str, int] = {s: i for i, s in enumerate(self.names)}
+
+    def intern(self, skill: str) -> int:
+        skill = canonical(skill)
+        pos = self.bit.get(skill)
+        if pos is None:
+            pos = self.bit[skill] = len(self.names)
+            self.names.append(skill)
+        return pos
+
+    @property
+    def words(self) -> int:
+        return max(1, -(-len(self.names) // 64))
+
+    def mask(self, skills: Iterable[str]) -> Tuple[np.ndarray, bool]:
+        """Single-row bitset of the known skills, and whether every skill was known. Nothing is interned."""
+        out = np.zeros(self.words, dtype=np.uint64)
+        known = True
+        for s in skills:
+            if not (s and s.strip()):
+                continue
+            pos = self.bit.get(canonical(s))
+            if pos is None:
+                known = False
+            else:
+                out[pos >> 6] |= np.uint64(1) << np.uint64(pos & 63)
+        return out, known
+
+    def encode(self, skill_lists: Iterable[Iterable[str]]) -> np.ndarray:
+        """(n, words) uint64 bitsets, one row per skill list."""
+        positions = [[self.intern(s) for s in skills if s and s.strip()] for skills in skill_lists]
+        out = np.zeros((len(positions), self.words), dtype=np.uint64)
+        for row, pos in enumerate(positions):
+            if pos:
+                p = np.asarray(pos, dtype=np.int64)
+                np.bitwise_or.at(out[row], p >> 6, np.left_shift(np.uint64(1), (p & 63).astype(np.uint64)))
+        return out
+
+
+def requirement_masks(
+    vocab: SkillVocab,
+    must_have: Optional[List[str]],
+    nice_to_have: Optional[List[str]],
+) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """
+    (must, nice) single-row masks over the vocabulary as it is; request
+    skills are never interned. No row can hold a skill the vocabulary has
+    not seen, so must is None (nothing survives) when a must-have is
+    unknown, and unknown nice-to-haves count for nothing.
+    """
+    must, known = vocab.mask(must_have or [])
+    nice, _ = vocab.mask(nice_to_have or [])
+    return (must if known else None), nice
+
+
+def apply_requirements(
+    bits: np.ndarray,
+    must: Optional[np.ndarray],
+    nice: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorised filter over (n, words) bitsets.
+    Returns (survivor mask, nice-to-have matches per row).
+    """
+    words = max(bits.shape[1], len(nice))
+    if bits.shape[1] < words:
+        bits = np.pad(bits, ((0, 0), (0, words - bits.shape[1])))
+    nice = np.pad(nice, (0, words - len(nice)))
+    if must is None:
+        survivors = np.zeros(len(bits), dtype=bool)
+    else:
+        must = np.pad(must, (0, words - len(must)))
+        survivors = ((bits & must) == must).all(axis=1)
+    return survivors, popcount(bits & nice)
+
+
+class SkillIndex:
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.dir = directory or data_path("skills")
+        os.makedirs(self.dir, exist_ok=True)
+        self.log_path = os.path.join(self.dir, "resumes.log")
+        self.vocab = SkillVocab()
+        self._offset = 0
+        self._bits = np.zeros((_INITIAL_ROWS, self.vocab.words), dtype=np.uint64)
+        self._alive = np.zeros(_INITIAL_ROWS, dtype=bool)
+        self._pool = np.zeros(_INITIAL_ROWS, dtype=np.int32)
+        self._pools: Dict[str, int] = {}
+        self._id_row: Dict[str, int] = {}
+        self._row_id: List[str] = []
+        self._lock = threading.Lock()
+
+    # ── log replay ────────────────────────────────────────────
+
+    def _apply(self, rec: Dict[str, Any]) -> None:
+        old = self._id_row.pop(rec["id"], None)
+        if old is not None:
+            self._alive[old] = False
+        if rec["op"] != "add":
+            return
+        row = len(self._row_id)
+        if row == len(self._alive):
+            grow = len(self._alive)
+            self._bits = np.pad(self._bits, ((0, grow), (0, 0)))
+            self._alive = np.pad(self._alive, (0, grow))
+            self._pool = np.pad(self._pool, (0, grow))
+        encoded = self.vocab.encode([rec["skills"]])[0]
+        if len(encoded) > self._bits.shape[1]:
+            self._bits = np.pad(self._bits, ((0, 0), (0, len(encoded) - self._bits.shape[1])))
+        self._bits[row, :len(encoded)] = encoded
+        self._alive[row] = True
+        self._pool[row] = self._pools.setdefault(rec.get("pool") or "", len(self._pools))
+        self._id_row[rec["id"]] = row
+        self._row_id.append(rec["id"])
+
+    def _catch_up(self) -> None:
+        try:
+            size = os.path.getsize(self.log_path)
+        except FileNotFoundError:
+            return
+        if size <= self._offset:
+            return
+        with open(self.log_path, "rb") as fh:
+            fh.seek(self._offset)
+            data = fh.read(size - self._offset)
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            self._apply(json.loads(line))
+        self._offset += len(complete)
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        payload = b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in records)
+        with locked(self.log_path):
+            with open(self.log_path, "ab") as fh:
+                fh.write(payload)
+        self._catch_up()
+
+    # ── public API ────────────────────────────────────────────
+
+    def add(self, resumes: List[Dict[str, Any]]) -> int:
+        """Add or replace resumes: {resume_id, skills, pool?}."""
+        records = [
+            {"op": "add", "id": r["resume_id"], "pool": r.get("pool") or "",
+             "skills": sorted({canonical(s) for s in r.get("skills") or [] if s and s.strip()})}
+            for r in resumes
+        ]
+        if records:
+            with self._lock:
+                self._append(records)
+        return len(records)
+
+    def remove(self, resume_id: str) -> bool:
+        with self._lock:
+            self._catch_up()
+            if resume_id not in self._id_row:
+                return False
+            self._append([{"op": "remove", "id": resume_id}])
+            return True
+
+    def filter(
+        self,
+        must_have: Optional[List[str]] = None,
+        nice_to_have: Optional[List[str]] = None,
+        pool: Optional[str] = None,
+    ) -> Tuple[List[str], List[int]]:
+        """Indexed resumes holding every must-have skill, with their nice-to-have match counts."""
+        with self._lock:
+            self._catch_up()
+            n = len(self._row_id)
+            must, nice = requirement_masks(self.vocab, must_have, nice_to_have)
+            survivors, nice_counts = apply_requirements(self._bits[:n], must, nice)
+            survivors &= self._alive[:n]
+            if pool is not None:
+                survivors &= self._pool[:n] == self._pools.get(pool, -1)
+            rows = np.flatnonzero(survivors)
+            return [self._row_id[r] for r in rows.tolist()], nice_counts[rows].tolist()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._catch_up()
+            return {
+                "resumes": len(self._id_row),
+                "rows": len(self._row_id),
+                "vocabulary": len(self.vocab.names),
+                "interned": len(self.vocab.names) - len(_base_vocab()),
+                "words_per_resume": self._bits.shape[1],
+                "log_bytes": self._offset,
+            }
+
+
+_INDEX: Optional[SkillIndex] = None
+
+
+def get_index() -> SkillIndex:
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = SkillIndex()
+    return _INDEX
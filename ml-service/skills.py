@@ -4,7 +4,7 @@ Skill extraction using spaCy PhraseMatcher + curated vocabulary.
 
 import json
 from pathlib import Path
-from typing import List
+from typing import Iterable, List, Set
 
 import spacy
 from spacy.matcher import PhraseMatcher
@@ -26,6 +26,7 @@ def _load_vocab() -> List[str]:
     return []
 
 _SKILLS_VOCAB: List[str] = _load_vocab()
+_VOCAB_LOWER = {s.lower() for s in _SKILLS_VOCAB}
 
 # ── Build PhraseMatcher ───────────────────────────────────────
 _matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
@@ -42,11 +43,12 @@ def extract_skills(text: str) -> List[str]:
     if not text.strip():
         return []
 
-    doc = nlp(text)
-    matches = _matcher(doc)
+    return sorted(_doc_skills(nlp(text)), key=str.lower)
 
-    found: set[str] = set()
-    for _match_id, start, end in matches:
+
+def _doc_skills(doc) -> Set[str]:
+    found: Set[str] = set()
+    for _match_id, start, end in _matcher(doc):
         skill = doc[start:end].text
         found.add(skill)
 
@@ -54,7 +56,38 @@ def extract_skills(text: str) -> List[str]:
     for ent in doc.ents:
         if ent.label_ in ("PRODUCT", "ORG", "WORK_OF_ART"):
             candidate = ent.text.strip()
-            if candidate.lower() in {s.lower() for s in _SKILLS_VOCAB}:
+            if candidate.lower() in _VOCAB_LOWER:
                 found.add(candidate)
+    return found
+
+
+def extract_skills_fast(text: str) -> List[str]:
+    """
+    Cheap approximation of extract_skills(): PhraseMatcher over a
+    tokenizer-only doc (no tagger / parser / NER). Misses only the
+    NER-recovered entities.
+    """
+    if not text.strip():
+        return []
+
+    doc = nlp.make_doc(text)
+    found = {doc[start:end].text for _match_id, start, end in _matcher(doc)}
+    return sorted(found, key=str.lower)
 
+
+def extract_skills_chunked(chunks: Iterable[str], fast: bool = False) -> List[str]:
+    """
+    extract_skills() (or extract_skills_fast()) over a long document given
+    as consecutive chunks (see chunking.py). Chunks go through nlp.pipe one
+    at a time, so only one chunk's Doc is alive at once; matches are merged.
+    Chunks end at line breaks, which skill phrases never span.
+    """
+    found: Set[str] = set()
+    if fast:
+        for chunk in chunks:
+            doc = nlp.make_doc(chunk)
+            found.update(doc[start:end].text for _match_id, start, end in _matcher(doc))
+    else:
+        for doc in nlp.pipe(chunks, batch_size=1):
+            found |= _doc_skills(doc)
     return sorted(found, key=str.lower)
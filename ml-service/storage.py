@@ -0,0 +1,57 @@
+"""
+On-disk state shared by all workers (JD index, ...).
+
+Files live under ML_DATA_DIR. Writers take an exclusive flock on a
+sidecar lock file and replace the data file atomically, so prefork
+workers never see a half-written file; readers reload when the file's
+stat signature changes.
+"""
+
+import contextlib
+import fcntl
+import os
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+DATA_DIR = os.getenv("ML_DATA_DIR", "/app/state")
+
+
+def data_path(name: str) -> str:
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
+
+
+@contextlib.contextmanager
+def locked(path: str) -> Iterator[None]:
+    """Exclusive cross-process lock for read-modify-write of `path`."""
+    with open(path + ".lock", "a+") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def atomic_write(path: str, mode: str = "wb") -> Iterator:
+    """Write to a temp file in the same directory, then rename over `path`."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+    try:
+        with os.fdopen(fd, mode) as fh:
+            yield fh
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, size, mtime_ns) — changes whenever the file is replaced."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
@@ -0,0 +1,127 @@
+"""
+Bounded-memory ingestion for very large /match payloads.
+
+An NDJSON body (optionally gzip / zstd compressed, per Content-Encoding)
+is spooled to a temporary file as it arrives, then decoded and parsed one
+line at a time:
+
+    {"job_id": ..., "jd_text": ..., "callback_url"?: ..., "must_have"?: [...], ...}
+    {"id": ..., "name": ..., "skills": [...], "text": ..., "fingerprint": ...}
+    {"id": ..., ...}
+    ...
+
+The first line is the match header (MatchRequest without `resumes`),
+every following line one ResumeForMatch. Scored results are spilled to a
+second temporary file; only (offset, length, hiring probability) per
+candidate stays in memory for ranking, and the callback body is streamed
+back out of the spill file in rank order.
+"""
+
+import gzip
+import io
+import json
+import tempfile
+from array import array
+from typing import IO, Any, AsyncIterator, Dict, Iterator, Optional
+
+import numpy as np
+
+from hiring_probability import rank_candidates
+from payloads import dumps
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # optional: only needed for Content-Encoding: zstd
+    zstandard = None
+
+DECODE_ERRORS = (OSError, EOFError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+SPOOL_MEMORY = 8 * 1024 * 1024   # bodies above this go to disk
+
+
+def supported_encodings() -> tuple:
+    return ("identity", "gzip") + (("zstd",) if zstandard is not None else ())
+
+
+async def spool(chunks: AsyncIterator[bytes]) -> IO[bytes]:
+    """Copy a request body to a temporary file (in memory while small)."""
+    fh = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY)
+    async for chunk in chunks:
+        fh.write(chunk)
+    fh.seek(0)
+    return fh
+
+
+async def chunks(fh: IO[bytes], size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """Re-stream a spooled body (e.g. to forward it) without reading it all into memory."""
+    while True:
+        chunk = fh.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def decoded(raw: IO[bytes], encoding: str) -> IO[bytes]:
+    """Line-iterable, decompressing view over a spooled body."""
+    if encoding == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd bodies need the zstandard package")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw))
+    return raw
+
+
+def records(lines: IO[bytes]) -> Iterator[Optional[Dict[str, Any]]]:
+    """Parse NDJSON lines one at a time (None for a line that is not a JSON object)."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield record if isinstance(record, dict) else None
+
+
+class RankedSpill:
+    """
+    Scored results kept on disk; only offset, length and score per row are
+    held in memory (16 bytes per candidate).
+    """
+
+    def __init__(self) -> None:
+        self._fh = tempfile.TemporaryFile()
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        self._scores = array("d")
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def append(self, result: Dict[str, Any], score: float) -> None:
+        line = dumps(result)
+        self._offsets.append(self._fh.tell())
+        self._lengths.append(len(line))
+        self._scores.append(score)
+        self._fh.write(line)
+
+    def ranked(self, top_k: Optional[int] = None) -> Iterator[bytes]:
+        """Results as JSON objects (with `rank`), best first — see rank_candidates()."""
+        self._fh.flush()
+        scores = np.frombuffer(self._scores, dtype=np.float64) if len(self) else np.zeros(0)
+        for position, row in enumerate(rank_candidates(scores, top_k).tolist()):
+            self._fh.seek(self._offsets[row])
+            line = self._fh.read(self._lengths[row])
+            yield line[:-1] + b',"rank":' + str(position + 1).encode("ascii") + b"}"
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+async def json_payload(spill: RankedSpill, fields: Dict[str, Any]) -> AsyncIterator[bytes]:
+    """Stream {"matches": [ranked spill...], **fields} as one JSON document."""
+    yield b'{"matches":['
+    for i, item in enumerate(spill.ranked()):
+        yield (b"," if i else b"") + item
+    yield b"]" + (b"," + dumps(fields)[1:] if fields else b"}")
@@ -0,0 +1,170 @@
+"""
+Stateless hashed feature space + corpus-level document frequencies.
+
+Terms (the TF-IDF analyzer's unigrams and bigrams, stop words removed)
+are hashed into N_FEATURES buckets, so vectorising needs no fitted
+vocabulary and memory is fixed regardless of corpus size.
+
+IDF comes from document-frequency counters kept over every analysed
+resume: observing a document costs O(its distinct terms). Each worker
+accumulates counts locally and periodically merges them into the shared
+counter file under a file lock (read, add, atomic replace), so prefork
+workers never overwrite each other's updates.
+
+Matching reads IDF from a snapshot that is refreshed only once the corpus
+has grown by ML_IDF_REFRESH_RATIO, so scores (and incremental match
+state) stay stable between refreshes. The snapshot's document count is
+its version.
+
+    idf(t) = ln((1 + N) / (1 + df(t))) + 1        (smooth IDF)
+
+With an empty corpus every idf is 1 and matching degrades to plain
+term-frequency cosine.
+"""
+
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from storage import data_path, locked, atomic_write, file_signature
+
+N_FEATURES = 2 ** 18
+_ANALYZER = TfidfVectorizer(stop_words="english", ngram_range=(1, 2)).build_analyzer()
+
+DF_FILE = "df_counts.npy"
+FLUSH_DOCS = int(os.getenv("ML_DF_FLUSH_DOCS", "25"))
+FLUSH_SECS = float(os.getenv("ML_DF_FLUSH_SECS", "30"))
+REFRESH_RATIO = float(os.getenv("ML_IDF_REFRESH_RATIO", "0.05"))
+
+
+def preprocess(text: str) -> str:
+    """Lowercase and strip punctuation."""
+    text = text.lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def hash_term(term: str) -> int:
+    """Stable (process-independent) bucket for a unigram / bigram."""
+    return zlib.crc32(term.encode("utf-8")) & (N_FEATURES - 1)
+
+
+def hashed_term_counts(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hash the unigrams + bigrams of `text`.
+
+    Returns:
+        (bucket indices sorted ascending, counts) as uint32 arrays
+    """
+    counts = Counter(hash_term(t) for t in _ANALYZER(preprocess(text)))
+    if not counts:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint32)
+    idx = np.fromiter(counts.keys(), dtype=np.uint32, count=len(counts))
+    tf = np.fromiter(counts.values(), dtype=np.uint32, count=len(counts))
+    order = np.argsort(idx)
+    return idx[order], tf[order]
+
+
+def hashed_terms_with_names(text: str) -> Tuple[np.ndarray, np.ndarray, Dict[int, str]]:
+    """hashed_term_counts() plus a bucket → first term name map (for keywords)."""
+    counts = Counter(_ANALYZER(preprocess(text)))
+    by_bucket: Dict[int, int] = {}
+    names: Dict[int, str] = {}
+    for term, c in counts.items():
+        b = hash_term(term)
+        by_bucket[b] = by_bucket.get(b, 0) + c
+        names.setdefault(b, term)
+    idx = np.array(sorted(by_bucket), dtype=np.uint32)
+    tf = np.array([by_bucket[b] for b in idx.tolist()], dtype=np.float64)
+    return idx, tf, names
+
+
+class CorpusStats:
+    """Document frequencies over analysed resumes; last slot holds the document count."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or data_path(DF_FILE)
+        self._df = np.zeros(N_FEATURES + 1, dtype=np.uint64)
+        self._signature = None
+        self._pending = np.zeros(N_FEATURES + 1, dtype=np.uint32)
+        self._last_flush = time.monotonic()
+        self._idf: Optional[np.ndarray] = None
+        self._version = -1
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        sig = file_signature(self.path)
+        if sig is not None and sig != self._signature:
+            self._df = np.load(self.path, allow_pickle=False)
+            self._signature = sig
+
+    def observe(self, idx: np.ndarray) -> None:
+        """Count one document given its distinct term buckets."""
+        with self._lock:
+            self._pending[np.unique(idx)] += 1
+            self._pending[-1] += 1
+            due = (
+                self._pending[-1] >= FLUSH_DOCS
+                or time.monotonic() - self._last_flush >= FLUSH_SECS
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Merge locally observed counts into the shared counter file."""
+        with self._lock:
+            if not self._pending[-1]:
+                return
+            with locked(self.path):
+                self._signature = None
+                self._refresh()
+                merged = self._df + self._pending
+                with atomic_write(self.path) as fh:
+                    np.save(fh, merged)
+                self._df = merged
+                self._signature = file_signature(self.path)
+            self._pending[:] = 0
+            self._last_flush = time.monotonic()
+
+    def idf(self) -> Tuple[int, np.ndarray]:
+        """(version, idf per bucket) — the current IDF snapshot."""
+        with self._lock:
+            self._refresh()
+            n = int(self._df[-1]) + int(self._pending[-1])
+            if self._idf is None or n > self._version * (1.0 + REFRESH_RATIO):
+                df = self._df[:-1] + self._pending[:-1]
+                self._idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+                self._version = n
+            return self._version, self._idf
+
+    def version(self) -> int:
+        return self.idf()[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._refresh()
+            return {
+                "documents": int(self._df[-1]) + int(self._pending[-1]),
+                "pending_documents": int(self._pending[-1]),
+                "terms_seen": int(np.count_nonzero(self._df[:-1] + self._pending[:-1])),
+                "idf_version": self._version,
+                "n_features": N_FEATURES,
+            }
+
+
+_CORPUS: Optional[CorpusStats] = None
+
+
+def get_corpus() -> CorpusStats:
+    global _CORPUS
+    if _CORPUS is None:
+        _CORPUS = CorpusStats()
+    return _CORPUS